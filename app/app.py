@@ -1,29 +1,47 @@
 # app.py
 from flask import Flask, render_template, request, redirect, session, url_for, flash
 from markupsafe import Markup
+from jinja2.utils import htmlsafe_json_dumps
 import os
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 import pytz
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2 import sql as pgsql
+from psycopg2.extras import RealDictCursor, execute_values
 import smtplib
 from email.mime.text import MIMEText
 from email.utils import formataddr
 import secrets
-from flask import send_file
-from io import BytesIO
+import click
+from flask import send_file, g
 from datetime import datetime
-import pandas as pd
 import json
+import unicodedata
 import subprocess
 import tempfile
+import threading
+import time
+import select
+import queue
+import hashlib
+import functools
+import zipfile
+import gzip
+import re
+import csv
+import io
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 # ===============================
 # Aplicación Flask
 # ===============================
 
 from sqlalchemy import create_engine
+import psycopg2.extensions
+from prometheus_client import (Counter, Histogram, CollectorRegistry, REGISTRY, CONTENT_TYPE_LATEST,
+                               generate_latest, multiprocess)
 
 # ===============================
 # Aplicación Flask & Config
@@ -47,6 +65,7 @@ SMTP_USER = os.getenv("SMTP_USER", "")
 SMTP_PASS = os.getenv("SMTP_PASS", "")
 SMTP_TLS = str(os.getenv("SMTP_TLS", "true")).lower() in {"1", "true", "yes", "on"}
 SMTP_FROM = os.getenv("SMTP_FROM", "")  # opcional (si no se especifica, usa SMTP_USER)
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30") or 30)
 APP_BASE_URL = os.getenv("APP_BASE_URL", "https://reportesdtcd.arconel.gob.ec")
 
 # DATABASE_URL primero; fallback a POSTGRES_*
@@ -59,25 +78,334 @@ if not DATABASE_URL:
     pg_pass = os.getenv("POSTGRES_PASSWORD", "postgres")
     DATABASE_URL = f"postgresql://{pg_user}:{pg_pass}@{pg_host}:{pg_port}/{pg_db}"
 
-# SQLAlchemy engine for Pandas
-engine = create_engine(DATABASE_URL)
+# ===============================
+# Instrumentación: consultas y latencia por request
+# ===============================
+# Todas las conexiones del pool (get_conn y lo que pase por `engine`) usan
+# MeasuredConnection, cuyos cursores miden cada sentencia: cuántas, cuántas
+# filas y cuánto tiempo. Lo acumulado se asigna al request en curso del hilo
+# (o a "fondo" fuera de un request) y se publica en /metrics en formato
+# Prometheus. Con gunicorn cada worker escribe sus valores en
+# PROMETHEUS_MULTIPROC_DIR y /metrics suma los de todos; sin esa variable
+# sólo se ven los del proceso que responde.
+# SLOW_QUERY_MS: las sentencias más lentas que esto se registran con su huella.
+# METRICS_TOKEN: si se define, /metrics también acepta "Authorization: Bearer <token>".
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500") or 500)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+if METRICS_MULTIPROC_DIR:
+    os.makedirs(METRICS_MULTIPROC_DIR, exist_ok=True)
+
+# Segundos; las exportaciones y respaldos llegan a minutos
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+METRIC_REQUEST_SECONDS = Histogram(
+    "actas_http_request_duration_seconds", "Duración del request hasta enviar el último byte",
+    ["endpoint", "method"], buckets=LATENCY_BUCKETS)
+METRIC_REQUESTS = Counter(
+    "actas_http_requests_total", "Requests atendidos", ["endpoint", "method", "status"])
+METRIC_REQUEST_QUERIES = Histogram(
+    "actas_http_request_db_queries", "Sentencias SQL por request",
+    ["endpoint"], buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000))
+METRIC_REQUEST_DB_SECONDS = Histogram(
+    "actas_http_request_db_seconds", "Tiempo en la base por request",
+    ["endpoint"], buckets=LATENCY_BUCKETS)
+METRIC_DB_QUERIES = Counter("actas_db_queries_total", "Sentencias SQL ejecutadas", ["endpoint"])
+METRIC_DB_ROWS = Counter("actas_db_rows_total", "Filas devueltas o afectadas", ["endpoint"])
+METRIC_DB_SECONDS = Counter("actas_db_seconds_total", "Tiempo esperando a la base", ["endpoint"])
+METRIC_DB_SLOW = Counter("actas_db_slow_queries_total", "Sentencias sobre SLOW_QUERY_MS", ["endpoint"])
+
+_metrics_local = threading.local()
+
+
+def new_request_metrics(endpoint):
+    return {"endpoint": endpoint, "consultas": 0, "filas": 0, "db": 0.0, "lentas": 0,
+            "inicio": time.perf_counter()}
+
+
+def current_request_metrics():
+    """Acumulador del request que atiende este hilo, o None."""
+    return getattr(_metrics_local, "actual", None)
+
+
+def bind_request_metrics(metricas):
+    """Asigna al hilo actual el acumulador de un request (p. ej. desde el hilo de un streaming)."""
+    _metrics_local.actual = metricas
+
+
+_SQL_STRING = re.compile(r"'(?:[^']|'')*'")
+_SQL_NUMBER = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_SQL_PARAM = re.compile(r"%(?:\([^)]*\))?s")
+_SQL_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_SQL_REPEATED = re.compile(r"(\([^()]*\))(?:\s*,\s*\1)+")
+
+
+def sql_fingerprint(query):
+    """(huella, texto normalizado) de una sentencia: sin literales ni parámetros.
+
+    Dos ejecuciones de la misma consulta con distintos valores, o un VALUES /
+    IN de distinto largo, dan la misma huella; el texto normalizado no lleva
+    datos de los documentos, así que se puede registrar.
+    """
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    texto = _SQL_STRING.sub("?", str(query))
+    texto = _SQL_PARAM.sub("?", texto)
+    texto = _SQL_NUMBER.sub("?", texto)
+    texto = " ".join(texto.split())
+    texto = _SQL_LIST.sub("?, ...", texto)
+    texto = _SQL_REPEATED.sub(r"\1, ...", texto)
+    return hashlib.md5(texto.encode("utf-8")).hexdigest()[:12], texto
+
+
+def record_query(cur, query, segundos, filas):
+    metricas = current_request_metrics()
+    endpoint = metricas["endpoint"] if metricas else "fondo"
+    lenta = segundos * 1000 >= SLOW_QUERY_MS
+    if metricas:
+        metricas["consultas"] += 1
+        metricas["filas"] += filas
+        metricas["db"] += segundos
+        metricas["lentas"] += lenta
+    else:
+        METRIC_DB_QUERIES.labels(endpoint).inc()
+        METRIC_DB_ROWS.labels(endpoint).inc(filas)
+        METRIC_DB_SECONDS.labels(endpoint).inc(segundos)
+        if lenta:
+            METRIC_DB_SLOW.labels(endpoint).inc()
+    if lenta:
+        if isinstance(query, pgsql.Composable):
+            query = query.as_string(cur)
+        huella, texto = sql_fingerprint(query)
+        app.logger.warning("Consulta lenta: %.0f ms, %d filas, en %s, huella %s: %s",
+                           segundos * 1000, filas, endpoint, huella, texto[:1000])
+
+
+class MeasuredCursor:
+    """Mezcla para cualquier clase de cursor: mide execute, executemany y copy_expert.
+
+    En los cursores con nombre (del lado del servidor) las filas llegan con
+    cada fetchmany/fetchall, así que esos FETCH también cuentan como sentencia.
+    """
+
+    def execute(self, query, vars=None):
+        inicio = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            record_query(self, query, time.perf_counter() - inicio, max(self.rowcount, 0))
+
+    def executemany(self, query, vars_list):
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            record_query(self, query, time.perf_counter() - inicio, max(self.rowcount, 0))
+
+    def copy_expert(self, sql, file, size=8192):
+        inicio = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            record_query(self, sql, time.perf_counter() - inicio, max(self.rowcount, 0))
+
+    def fetchmany(self, size=None):
+        if self.name is None:
+            return super().fetchmany(size) if size is not None else super().fetchmany()
+        inicio = time.perf_counter()
+        filas = super().fetchmany(size) if size is not None else super().fetchmany()
+        record_query(self, f"FETCH {self.name}", time.perf_counter() - inicio, len(filas))
+        return filas
+
+    def fetchall(self):
+        if self.name is None:
+            return super().fetchall()
+        inicio = time.perf_counter()
+        filas = super().fetchall()
+        record_query(self, f"FETCH ALL {self.name}", time.perf_counter() - inicio, len(filas))
+        return filas
+
+
+_measured_cursor_classes = {}
+
+
+class MeasuredConnection(psycopg2.extensions.connection):
+    """Conexión cuyos cursores (de la clase que se pida) pasan por MeasuredCursor."""
+
+    def cursor(self, *args, **kwargs):
+        base = kwargs.get("cursor_factory") or self.cursor_factory or psycopg2.extensions.cursor
+        clase = _measured_cursor_classes.get(base)
+        if clase is None:
+            clase = type(f"Measured{base.__name__}", (MeasuredCursor, base), {})
+            _measured_cursor_classes[base] = clase
+        kwargs["cursor_factory"] = clase
+        return super().cursor(*args, **kwargs)
+
+
+@app.before_request
+def start_request_metrics():
+    bind_request_metrics(new_request_metrics(request.endpoint or "sin_ruta"))
+
+
+@app.after_request
+def finish_request_metrics(response):
+    metricas = current_request_metrics()
+    if metricas is None:
+        return response
+    method, status = request.method, response.status_code
+    if not response.is_streamed:
+        response.headers["Server-Timing"] = (
+            f'db;dur={metricas["db"] * 1000:.1f};desc="{metricas["consultas"]} consultas", '
+            f'app;dur={(time.perf_counter() - metricas["inicio"]) * 1000:.1f}'
+        )
+    # Las descargas siguen consultando mientras se envían: se cierra al terminar de enviar
+    response.call_on_close(lambda: record_request(metricas, method, status))
+    return response
+
+
+def record_request(metricas, method, status):
+    if current_request_metrics() is metricas:
+        bind_request_metrics(None)
+    endpoint = metricas["endpoint"]
+    METRIC_REQUEST_SECONDS.labels(endpoint, method).observe(time.perf_counter() - metricas["inicio"])
+    METRIC_REQUESTS.labels(endpoint, method, str(status)).inc()
+    METRIC_REQUEST_QUERIES.labels(endpoint).observe(metricas["consultas"])
+    METRIC_REQUEST_DB_SECONDS.labels(endpoint).observe(metricas["db"])
+    if metricas["consultas"]:
+        METRIC_DB_QUERIES.labels(endpoint).inc(metricas["consultas"])
+        METRIC_DB_ROWS.labels(endpoint).inc(metricas["filas"])
+        METRIC_DB_SECONDS.labels(endpoint).inc(metricas["db"])
+    if metricas["lentas"]:
+        METRIC_DB_SLOW.labels(endpoint).inc(metricas["lentas"])
+
+
+@app.route('/metrics')
+def metrics():
+    autorizado = METRICS_TOKEN and secrets.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {METRICS_TOKEN}")
+    if not autorizado and not require_admin():
+        return {"error": "Unauthorized"}, 403
+    if METRICS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return app.response_class(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+# ===============================
+# Pool de conexiones (compartido por get_conn y Pandas)
+# ===============================
+# DB_POOL_MIN: conexiones que se mantienen abiertas por worker.
+# DB_POOL_MAX: tope de conexiones simultáneas por worker (MIN + overflow).
+# DB_POOL_TIMEOUT: segundos que un request espera por una conexión libre.
+# DB_POOL_RECYCLE: vida máxima (segundos) de una conexión antes de reabrirla.
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "2") or 2)
+DB_POOL_MAX = max(int(os.getenv("DB_POOL_MAX", "10") or 10), DB_POOL_MIN)
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30") or 30)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800") or 1800)
+
+# SQLAlchemy engine: su QueuePool es el pool único del worker.
+# pool_pre_ping valida la conexión al sacarla (health-check) y pool_recycle
+# descarta las que superan la vida máxima.
+engine = create_engine(
+    DATABASE_URL,
+    pool_size=DB_POOL_MIN,
+    max_overflow=DB_POOL_MAX - DB_POOL_MIN,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+    connect_args={"connection_factory": MeasuredConnection},
+)
+
+
+def _new_pool_counters():
+    return {"checkouts": 0, "waiting": 0, "checkout_errors": 0, "wait_total": 0.0, "wait_max": 0.0}
+
+
+_pool_lock = threading.Lock()
+_pool_counters = _new_pool_counters()
+
+
+def _reset_pool_after_fork():
+    """En el hijo de un fork (gunicorn --preload) no se reutilizan sockets del padre."""
+    global _pool_lock
+    engine.dispose(close=False)
+    _pool_lock = threading.Lock()
+    _pool_counters.update(_new_pool_counters())
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pool_after_fork)
+
+
+def pool_stats():
+    """Estadísticas del pool de este worker (para dimensionarlo contra los workers de gunicorn)."""
+    pool = engine.pool
+    with _pool_lock:
+        counters = dict(_pool_counters)
+    checkouts = counters["checkouts"]
+    return {
+        "pid": os.getpid(),
+        "min": DB_POOL_MIN,
+        "max": DB_POOL_MAX,
+        "open": pool.checkedin() + pool.checkedout(),
+        "idle": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "waiting": counters["waiting"],
+        "checkouts": checkouts,
+        "checkout_errors": counters["checkout_errors"],
+        "wait_total_ms": round(counters["wait_total"] * 1000, 3),
+        "wait_avg_ms": round(counters["wait_total"] * 1000 / checkouts, 3) if checkouts else 0.0,
+        "wait_max_ms": round(counters["wait_max"] * 1000, 3),
+    }
 
 
 # ===============================
 # Utilidades
 # ===============================
+@contextmanager
 def get_conn():
-    """Nueva conexión por request (seguro para Gunicorn)."""
-    return psycopg2.connect(DATABASE_URL)
+    """Conexión psycopg2 tomada del pool del worker.
+
+    Al salir del bloque hace commit (o rollback si hubo excepción) y devuelve
+    la conexión al pool en lugar de cerrarla.
+    """
+    with _pool_lock:
+        _pool_counters["waiting"] += 1
+    started = time.perf_counter()
+    try:
+        fairy = engine.raw_connection()
+    except Exception:
+        with _pool_lock:
+            _pool_counters["waiting"] -= 1
+            _pool_counters["checkout_errors"] += 1
+        raise
+    waited = time.perf_counter() - started
+    with _pool_lock:
+        _pool_counters["waiting"] -= 1
+        _pool_counters["checkouts"] += 1
+        _pool_counters["wait_total"] += waited
+        if waited > _pool_counters["wait_max"]:
+            _pool_counters["wait_max"] = waited
+
+    conn = fairy.dbapi_connection
+    try:
+        yield conn
+        if not conn.closed:
+            conn.commit()
+    except Exception:
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        fairy.close()
 
 def password_matches(db_password: str, provided: str) -> bool:
     return db_password == provided
 
 
-def send_email(to_email: str, subject: str, html: str):
-    if not SMTP_SERVER:
-        print("[WARN] SMTP no configurado; no se envía correo.")
-        return
+def build_email_message(to_email: str, subject: str, html: str):
     msg = MIMEText(html, "html", "utf-8")
     sender = SMTP_FROM or SMTP_USER or "no-reply@example.com"
     if "<" in sender and ">" in sender:
@@ -87,13 +415,141 @@ def send_email(to_email: str, subject: str, html: str):
         msg["From"] = formataddr(("Notificaciones", sender))
     msg["To"] = to_email
     msg["Subject"] = subject
+    return msg
 
-    with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-        if SMTP_TLS:
-            server.starttls()
-        if SMTP_USER:
-            server.login(SMTP_USER, SMTP_PASS)
-        server.send_message(msg)
+
+def smtp_connect():
+    server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=SMTP_TIMEOUT)
+    if SMTP_TLS:
+        server.starttls()
+    if SMTP_USER:
+        server.login(SMTP_USER, SMTP_PASS)
+    return server
+
+
+def send_email(to_email: str, subject: str, html: str):
+    """Envío síncrono. Los requests deben usar enqueue_email() en su lugar."""
+    if not SMTP_SERVER:
+        print("[WARN] SMTP no configurado; no se envía correo.")
+        return
+    with smtp_connect() as server:
+        server.send_message(build_email_message(to_email, subject, html))
+
+
+# ===============================
+# Outbox de correos
+# ===============================
+# Los correos se insertan en email_outbox dentro de la transacción que los
+# origina y un hilo por worker los envía en lotes reutilizando una sola sesión
+# SMTP. Las filas se reclaman con FOR UPDATE SKIP LOCKED, así que varios
+# workers pueden convivir sin enviar dos veces el mismo correo.
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20") or 20)
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "15") or 15)
+OUTBOX_MAX_INTENTOS = int(os.getenv("OUTBOX_MAX_INTENTOS", "8") or 8)
+OUTBOX_BACKOFF_MAX = 3600
+_outbox_wakeup = threading.Event()
+
+
+def enqueue_email(cur, to_email: str, subject: str, html: str):
+    """Encola un correo usando el cursor (y la transacción) de quien llama."""
+    cur.execute("""
+        INSERT INTO email_outbox (destinatario, asunto, html)
+        VALUES (%s, %s, %s)
+    """, (to_email, subject, html))
+
+
+def wake_outbox_worker():
+    """Despierta al worker del outbox de este proceso (llamar tras el COMMIT)."""
+    _outbox_wakeup.set()
+
+
+def _outbox_backoff(intentos):
+    return min(30 * 2 ** (intentos - 1), OUTBOX_BACKOFF_MAX)
+
+
+def process_outbox_batch(server=None):
+    """Envía un lote de correos pendientes. Devuelve (server, enviados_en_el_lote)."""
+    with get_conn() as conn, conn.cursor() as cur:
+        # Las filas 'enviando' viejas quedaron de un worker que murió a mitad de lote
+        cur.execute("""
+            UPDATE email_outbox
+            SET estado='enviando', intentos=intentos + 1, actualizado_at=NOW()
+            WHERE id IN (
+                SELECT id FROM email_outbox
+                WHERE (estado='pendiente' AND proximo_intento <= NOW())
+                   OR (estado='enviando' AND actualizado_at < NOW() - INTERVAL '10 minutes')
+                ORDER BY id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, destinatario, asunto, html, intentos
+        """, (OUTBOX_BATCH_SIZE,))
+        lote = cur.fetchall()
+        conn.commit()
+
+    if not lote:
+        return server, 0
+
+    enviados = []
+    fallidos = []
+    for outbox_id, destinatario, asunto, html, intentos in lote:
+        try:
+            if server is None:
+                server = smtp_connect()
+            server.send_message(build_email_message(destinatario, asunto, html))
+            enviados.append(outbox_id)
+        except Exception as e:
+            fallidos.append((outbox_id, intentos, str(e)[:500]))
+            if isinstance(e, (smtplib.SMTPServerDisconnected, OSError)):
+                # La sesión quedó inutilizable; se reabre con el siguiente correo
+                try:
+                    if server is not None:
+                        server.close()
+                except Exception:
+                    pass
+                server = None
+
+    with get_conn() as conn, conn.cursor() as cur:
+        if enviados:
+            cur.execute("""
+                UPDATE email_outbox
+                SET estado='enviado', enviado_at=NOW(), actualizado_at=NOW(), ultimo_error=NULL
+                WHERE id = ANY(%s)
+            """, (enviados,))
+        for outbox_id, intentos, error in fallidos:
+            estado = 'fallido' if intentos >= OUTBOX_MAX_INTENTOS else 'pendiente'
+            cur.execute("""
+                UPDATE email_outbox
+                SET estado=%s, ultimo_error=%s, actualizado_at=NOW(),
+                    proximo_intento=NOW() + make_interval(secs => %s)
+                WHERE id=%s
+            """, (estado, error, _outbox_backoff(intentos), outbox_id))
+            print(f"[WARN] Correo {outbox_id} no enviado (intento {intentos}): {error}")
+        conn.commit()
+
+    return server, len(lote)
+
+
+def _outbox_worker():
+    server = None
+    while True:
+        _outbox_wakeup.wait(OUTBOX_POLL_SECONDS)
+        _outbox_wakeup.clear()
+        try:
+            # Vaciar la cola mientras haya lotes completos, con la misma sesión SMTP
+            while True:
+                server, procesados = process_outbox_batch(server)
+                if procesados < OUTBOX_BATCH_SIZE:
+                    break
+        except Exception as e:
+            print(f"[WARN] Error en el worker del outbox: {e}")
+        # No mantener la sesión SMTP abierta mientras la cola está vacía
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                pass
+            server = None
 
 
 def local_time_str(fecha, hora, tz_name=APP_TZ):
@@ -104,6 +560,125 @@ def local_time_str(fecha, hora, tz_name=APP_TZ):
     dt_local = dt_utc.astimezone(local_tz)
     return dt_local.strftime("%H:%M:%S")
 
+# ===============================
+# Invalidación entre workers (LISTEN/NOTIFY)
+# ===============================
+# Cada worker mantiene una conexión dedicada escuchando este canal. Los avisos
+# se publican con pg_notify dentro de la misma transacción que hace el cambio,
+# así que sólo llegan a los demás workers si el COMMIT se completa.
+INVALIDATION_CHANNEL = "actas_invalidacion"
+_invalidation_handlers = {}
+_background_lock = threading.Lock()
+_background_pids = {}
+
+
+def on_invalidation(tema):
+    """Registra un handler para un tema. Recibe el argumento del aviso, o None = invalidar todo."""
+    def decorator(fn):
+        _invalidation_handlers[tema] = fn
+        return fn
+    return decorator
+
+
+def publish_invalidation(cur, tema, arg=""):
+    """Publica un aviso de invalidación (se entrega al hacer COMMIT de la transacción de `cur`)."""
+    cur.execute("SELECT pg_notify(%s, %s)", (INVALIDATION_CHANNEL, f"{tema}:{arg}"))
+
+
+def _dispatch_invalidation(payload):
+    tema, _, arg = (payload or "").partition(":")
+    handler = _invalidation_handlers.get(tema)
+    if handler:
+        handler(arg or None)
+
+
+def _invalidation_listener():
+    while True:
+        conn = None
+        try:
+            conn = psycopg2.connect(DATABASE_URL)
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {INVALIDATION_CHANNEL}")
+            # Mientras estuvimos desconectados pudimos perder avisos: vaciar todo
+            for handler in list(_invalidation_handlers.values()):
+                handler(None)
+            while True:
+                if select.select([conn], [], [], 60) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    _dispatch_invalidation(conn.notifies.pop(0).payload)
+        except Exception as e:
+            print(f"[WARN] Listener de invalidación desconectado: {e}")
+        finally:
+            if conn is not None and not conn.closed:
+                conn.close()
+        time.sleep(5)
+
+
+def start_background_thread(name, target):
+    """Arranca `target` en un hilo daemon una vez por proceso (también en cada worker tras el fork)."""
+    pid = os.getpid()
+    if _background_pids.get(name) == pid:
+        return
+    with _background_lock:
+        if _background_pids.get(name) == pid:
+            return
+        threading.Thread(target=target, name=name, daemon=True).start()
+        _background_pids[name] = pid
+
+
+@app.before_request
+def ensure_background_threads():
+    start_background_thread("invalidation-listener", _invalidation_listener)
+    if SMTP_SERVER:
+        start_background_thread("email-outbox", _outbox_worker)
+    if JOBS_WORKER_THREAD:
+        start_background_thread("jobs-worker", run_jobs_worker)
+
+
+# ===============================
+# Caché de autenticación
+# ===============================
+# La sesión guarda auth_version; el worker guarda por usuario
+# (auth_version, rol, nombre) durante AUTH_CACHE_TTL segundos. editar_usuario y
+# eliminar_usuario incrementan la versión / borran la fila y avisan a todos los
+# workers, de modo que el TTL sólo es la cota si se pierde un aviso.
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "5") or 5)
+_auth_cache = {}
+_auth_cache_lock = threading.Lock()
+
+
+def get_auth_info(uid):
+    """Devuelve (auth_version, rol, nombre) del usuario o None si ya no existe."""
+    now = time.monotonic()
+    with _auth_cache_lock:
+        entry = _auth_cache.get(uid)
+    if entry and entry[1] > now:
+        return entry[0]
+
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("SELECT auth_version, rol, nombre FROM usuarios WHERE id=%s", (uid,))
+        row = cur.fetchone()
+
+    info = tuple(row) if row else None
+    if info:
+        with _auth_cache_lock:
+            _auth_cache[uid] = (info, now + AUTH_CACHE_TTL)
+    return info
+
+
+@on_invalidation("usuario")
+def invalidate_auth(uid=None):
+    """Olvida la entrada de un usuario (o todas si uid es None) en este worker."""
+    with _auth_cache_lock:
+        if uid is None:
+            _auth_cache.clear()
+        else:
+            _auth_cache.pop(int(uid), None)
+
+
 # ===============================
 # Middlewares de sesión
 # ===============================
@@ -112,19 +687,26 @@ def require_login():
     if not uid:
         flash("Inicia sesión primero.", "warning")
         return False
-    
-    # Verificar si el usuario aún existe en la BD (por si hubo reset de BD)
+
+    # Verificar si el usuario aún existe (por si fue eliminado o hubo reset de BD)
     try:
-        with get_conn() as conn, conn.cursor() as cur:
-            cur.execute("SELECT 1 FROM usuarios WHERE id=%s", (uid,))
-            if not cur.fetchone():
-                session.clear()
-                flash("Sesión inválida (usuario no encontrado). Inicia sesión de nuevo.", "warning")
-                return False
+        info = get_auth_info(uid)
     except Exception:
         # Si falla la BD, asumimos error pero no crasheamos aqui
         return False
 
+    if not info:
+        session.clear()
+        flash("Sesión inválida (usuario no encontrado). Inicia sesión de nuevo.", "warning")
+        return False
+
+    # Si un admin modificó al usuario, refrescar rol/nombre de la sesión
+    auth_version, rol, nombre = info
+    if session.get("auth_version") != auth_version:
+        session["auth_version"] = auth_version
+        session["rol"] = rol
+        session["nombre"] = nombre
+
     return True
 
 def require_admin():
@@ -138,90 +720,207 @@ def require_admin():
 # ===============================
 # Helpers Catalogos
 # ===============================
-def get_catalogo(categoria):
-    """Retorna lista plana de opciones activas para una categoría dada."""
+# Todo el contenido de `catalogos` se carga con una sola consulta y se guarda
+# como una instantánea por worker. catalogos_version se incrementa con un
+# trigger en cada escritura, que además publica "catalogos:<version>" en el
+# canal de invalidación; CATALOG_CACHE_TTL es sólo la red de seguridad.
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300") or 300)
+_catalog_snapshot = None
+_catalog_lock = threading.Lock()
+_catalog_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def _load_catalog_snapshot():
     with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        # La versión se lee primero: si alguien escribe entre ambas consultas,
+        # su aviso trae una versión mayor y vuelve a invalidar.
+        cur.execute("SELECT version FROM catalogos_version WHERE id = 1")
+        row = cur.fetchone()
+        version = row['version'] if row else 0
         cur.execute("""
-            SELECT id, nombre, valor, padre_id, meta_data
+            SELECT id, categoria, nombre, valor, padre_id, activo, orden, meta_data
             FROM catalogos
-            WHERE categoria = %s AND activo = TRUE
-            ORDER BY orden ASC
-        """, (categoria,))
-        return cur.fetchall()
+            ORDER BY categoria, orden ASC, id ASC
+        """)
+        rows = cur.fetchall()
+
+    todos = {}
+    activos = {}
+    for r in rows:
+        todos.setdefault(r['categoria'], []).append(r)
+        if r['activo']:
+            activos.setdefault(r['categoria'], []).append(r)
+
+    return {
+        "version": version,
+        "expira": time.monotonic() + CATALOG_CACHE_TTL,
+        "todos": todos,
+        "activos": activos,
+    }
+
+
+def get_catalog_snapshot():
+    global _catalog_snapshot
+    snap = _catalog_snapshot
+    if snap is not None and snap["expira"] > time.monotonic():
+        _catalog_stats["hits"] += 1
+        return snap
+    with _catalog_lock:
+        snap = _catalog_snapshot
+        if snap is None or snap["expira"] <= time.monotonic():
+            _catalog_stats["misses"] += 1
+            snap = _load_catalog_snapshot()
+            _catalog_snapshot = snap
+        else:
+            _catalog_stats["hits"] += 1
+    return snap
+
+
+@on_invalidation("catalogos")
+def invalidate_catalog_cache(version=None):
+    """Descarta la instantánea de este worker si es anterior a `version` (o siempre si es None)."""
+    global _catalog_snapshot
+    with _catalog_lock:
+        snap = _catalog_snapshot
+        if snap is None:
+            return
+        if version is not None and int(version) <= snap["version"]:
+            return
+        _catalog_snapshot = None
+        _catalog_stats["invalidations"] += 1
+
+
+def catalog_cache_stats():
+    snap = _catalog_snapshot
+    return {
+        "pid": os.getpid(),
+        "version": snap["version"] if snap else None,
+        **_catalog_stats,
+    }
+
+
+def get_catalogo(categoria, incluir_inactivos=False):
+    """Retorna lista plana de opciones (activas por defecto) para una categoría dada.
+
+    Las filas son compartidas por el caché del worker: no modificarlas.
+    """
+    snap = get_catalog_snapshot()
+    return snap["todos" if incluir_inactivos else "activos"].get(categoria, [])
+
+def empresa_clave(nombre):
+    """Clave de comparación de una empresa: sin tildes, en minúsculas y con espacios simples."""
+    texto = unicodedata.normalize('NFKD', nombre or '')
+    texto = ''.join(ch for ch in texto if not unicodedata.combining(ch))
+    return ' '.join(texto.lower().split())
+
+def get_empresas_directorio():
+    """Escrituras de empresa usadas en documentos, [(empresa, documentos)], la más usada primero.
+
+    Sale de empresas_directorio (mantenida por triggers), así que es una sola
+    lectura de una tabla chica sin importar cuántos documentos haya. Se guarda
+    en `g` para no repetirla dentro del mismo request.
+    """
+    if 'empresas_directorio' not in g:
+        with get_conn() as conn, conn.cursor() as cur:
+            cur.execute("""
+                SELECT empresa, documentos FROM empresas_directorio
+                WHERE documentos > 0
+                ORDER BY documentos DESC, empresa
+            """)
+            g.empresas_directorio = cur.fetchall()
+    return g.empresas_directorio
 
 def get_all_companies():
-    """Obtiene empresas del catálogo + empresas únicas encontradas en documentos (manualmente ingresadas)."""
-    with get_conn() as conn, conn.cursor() as cur:
-        # 1. Empresas del catálogo
-        cur.execute("SELECT nombre, valor FROM catalogos WHERE categoria = 'EMPRESA' AND activo = TRUE ORDER BY orden")
-        catalogo = cur.fetchall()
-        
-        empresas_dict = {}
-        for c in catalogo:
-            nombre = c[0]
-            valor = c[1] if c[1] else c[0]
-            empresas_dict[valor] = nombre
-            
-        # 2. Empresas en tablas de documentos
-        tablas = ['actas', 'informes', 'reportes', 'comisiones']
-        for t in tablas:
-            cur.execute(f"SELECT DISTINCT empresa FROM {t} WHERE empresa IS NOT NULL AND empresa != ''")
-            for row in cur.fetchall():
-                emp = row[0]
-                if emp not in empresas_dict:
-                    empresas_dict[emp] = emp # Si no está en catálogo, usamos su nombre como valor
-                    
-    # Convertir a lista de dicts para compatibilidad con el template
-    res = []
+    """Obtiene empresas del catálogo + empresas encontradas en documentos (manualmente ingresadas).
+
+    Las escrituras que sólo difieren en tildes, mayúsculas o espacios se agrupan
+    bajo una misma entrada: gana la del catálogo y, si no hay, la más usada.
+    """
+    # 1. Empresas del catálogo
+    empresas_dict = {}
+    for c in get_catalogo('EMPRESA'):
+        valor = c['valor'] if c['valor'] else c['nombre']
+        empresas_dict.setdefault(empresa_clave(valor), {'nombre': c['nombre'], 'valor': valor})
+
+    # 2. Empresas escritas a mano en los documentos
+    for emp, _ in get_empresas_directorio():
+        empresas_dict.setdefault(empresa_clave(emp), {'nombre': emp, 'valor': emp})
+
     # Ordenar alfabéticamente
-    for valor in sorted(empresas_dict.keys()):
-        res.append({
-            'nombre': empresas_dict[valor],
-            'valor': valor
-        })
-    return res
+    return sorted(empresas_dict.values(), key=lambda e: e['valor'])
+
+def empresa_variantes(valor):
+    """Todas las escrituras de `valor` presentes en documentos (incluida la propia)."""
+    clave = empresa_clave(valor)
+    variantes = {valor}
+    variantes.update(emp for emp, _ in get_empresas_directorio() if empresa_clave(emp) == clave)
+    return sorted(variantes)
 
 def build_hierarchy(items, parent_id=None):
-    """Construye estructura recursiva para el JS de Reportes."""
+    """Construye el árbol para el JS de Reportes.
+
+    Indexa los hijos por padre_id en una pasada y recorre con una pila, así que
+    es O(n) y no depende del límite de recursión de Python.
+    """
+    hijos = {}
+    for item in items:
+        hijos.setdefault(item['padre_id'], []).append(item)
+
     result = []
-    # Filtrar items hijos del parent_id actual
-    children = [x for x in items if x['padre_id'] == parent_id]
-    
-    for child in children:
-        node = {
-            'label': child['nombre'],
-            'value': child['valor'] or child['nombre']
-        }
-        
-        # Metadatos (banderas especiales)
-        if child['meta_data']:
-            # Extraer claves si existen
+    visitados = set()
+    pendientes = [(parent_id, result)]
+    while pendientes:
+        padre, destino = pendientes.pop()
+        for child in hijos.get(padre, ()):
+            if child['id'] in visitados:
+                # Ciclo en padre_id: no volver a expandir el nodo
+                continue
+            visitados.add(child['id'])
+
+            node = {
+                'label': child['nombre'],
+                'value': child['valor'] or child['nombre']
+            }
+
+            # Metadatos (banderas especiales)
             # psycopg2 con RealDictCursor devuelve dict, y meta_data es jsonb (dict)
             md = child['meta_data']
-            if md.get('special'):
+            if md and md.get('special'):
                 node['special'] = md['special']
 
-        # Recursión
-        grand_children = build_hierarchy(items, child['id'])
-        if grand_children:
-            node['children'] = grand_children
-            
-        result.append(node)
+            if child['id'] in hijos:
+                node['children'] = []
+                pendientes.append((child['id'], node['children']))
+
+            destino.append(node)
     return result
 
+def _jerarquia_informes():
+    """Árbol TIPO_INFORME ya construido y serializado; se rehace sólo con la instantánea de catálogos."""
+    snap = get_catalog_snapshot()
+    cached = snap.get("jerarquia_informes")
+    if cached is None:
+        # Construir árbol empezando por los que tienen padre_id IS NULL
+        tree = build_hierarchy(snap["activos"].get('TIPO_INFORME', []), None)
+        cached = {
+            "tree": tree,
+            "api_json": json.dumps({"data": tree}, ensure_ascii=False).encode("utf-8"),
+            "html": htmlsafe_json_dumps(tree),
+        }
+        snap["jerarquia_informes"] = cached
+    return cached
+
 def get_jerarquia_informes():
-    """Obtiene toda la categoría TIPO_INFORME y la estructura para el frontend."""
-    with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
-        cur.execute("""
-            SELECT id, nombre, valor, padre_id, meta_data 
-            FROM catalogos 
-            WHERE categoria = 'TIPO_INFORME' AND activo = TRUE 
-            ORDER BY orden ASC
-        """)
-        all_items = cur.fetchall()
-    
-    # Construir árbol empezando por los que tienen padre_id IS NULL
-    return build_hierarchy(all_items, None)
+    """Obtiene toda la categoría TIPO_INFORME y la estructura para el frontend (no modificar)."""
+    return _jerarquia_informes()["tree"]
+
+def get_jerarquia_informes_html():
+    """Árbol TIPO_INFORME como JSON seguro para incrustar en <script> (Markup)."""
+    return _jerarquia_informes()["html"]
+
+def get_jerarquia_informes_api_json():
+    """Respuesta completa de /api/catalogos/TIPO_INFORME_TREE en bytes."""
+    return _jerarquia_informes()["api_json"]
 
 
 # ===============================
@@ -237,13 +936,14 @@ def login():
     password = request.form.get('password', '')
 
     with get_conn() as conn, conn.cursor() as cur:
-        cur.execute("SELECT id, nombre, rol, password FROM usuarios WHERE LOWER(email)=%s", (email,))
+        cur.execute("SELECT id, nombre, rol, password, auth_version FROM usuarios WHERE LOWER(email)=%s", (email,))
         row = cur.fetchone()
 
     if row and password_matches(row[3], password):
         session['user_id'] = row[0]
         session['nombre'] = row[1]
         session['rol'] = row[2]
+        session['auth_version'] = row[4]
         return redirect('/dashboard')
 
     flash("Correo o contraseña incorrecta", "danger")
@@ -263,208 +963,1121 @@ def dashboard():
 # ==============================================
 # Exportar documentos (actas, informes, reportes, comisiones)
 # ==============================================
+# La exportación no arma el archivo en memoria: un cursor con nombre (del lado
+# del servidor) entrega las filas por lotes de EXPORT_FETCH_SIZE y XlsxWriter,
+# en modo constant_memory, las va bajando a disco. El .xlsx terminado se envía
+# por partes y se borra al cerrar la respuesta, así que la memoria del worker
+# no depende del tamaño de la tabla.
+EXPORT_TIPOS = ('actas', 'informes', 'reportes', 'comisiones')
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", 2000))
+EXPORT_CHUNK_SIZE = 64 * 1024
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Renombrar columnas a español
+EXPORT_COLUMN_NAMES = {
+    'codigo': 'Código',
+    'empresa': 'Empresa',
+    'tipo_informe': 'Tipo de Informe',
+    'tipo_reporte': 'Tipo de Reporte',
+    'gestiones': 'Gestiones',
+    'productos_asociados': 'Productos Asociados',
+    'caso_tipo': 'Elemento Afectado',
+    'nombre_alimentador': 'Nombre de Alimentador',
+    'alimentador_subestacion': 'Subestación',
+    'linea_subtransmision_nombre': 'Línea Subtransmisión',
+    'fecha_interrupcion': 'Fecha Interrupción',
+    'asunto': 'Asunto',
+    'observaciones': 'Observaciones',
+    'fecha': 'Fecha Registro',
+    'hora': 'Hora Registro',
+    'funcionario': 'Funcionario'
+}
+
+# OIDs de PostgreSQL que se escriben como fecha en Excel
+PG_DATE_OIDS = {1082, 1114, 1184}
+
+def export_query(tipo, filtros=None):
+    """SELECT de exportación de `tipo` (ya validado contra EXPORT_TIPOS) y sus parámetros.
+
+    `filtros` es {columna: valor o lista de valores} sobre la tabla del
+    documento, como en get_paginated_docs (empresa, anio).
+    """
+    alias = {'informes': 'i', 'reportes': 'r'}.get(tipo, 'd')
+    condiciones, params = [], []
+    for col, valor in (filtros or {}).items():
+        condiciones.append(f"{alias}.{filtro_sql(col, valor)}")
+        params.append(valor)
+    where_sql = "WHERE " + " AND ".join(condiciones) if condiciones else ""
+
+    # ===============================
+    # INFORMES (incluye CASOS FORTUITOS + gestiones + productos_asociados)
+    # ===============================
+    if tipo == 'informes':
+        return f"""
+            SELECT
+                'INF.DTCD.' || i.anio || '.' || LPAD(i.numero::text, GREATEST(3, length(i.numero::text)), '0') AS codigo,
+                i.empresa,
+                i.tipo_informe,
+
+                -- Gestiones / Productos asociados
+                i.gestiones,
+                i.productos_asociados,
+
+                -- Casos fortuitos
+                i.caso_tipo,
+                i.nombre_alimentador,
+                i.alimentador_subestacion,
+                i.linea_subtransmision_nombre,
+                i.fecha_interrupcion,
+
+                -- Datos generales
+                i.asunto,
+                i.observaciones,
+                i.fecha,
+                TO_CHAR(i.hora, 'HH24:MI') AS hora,
+
+                u.nombre AS funcionario
+            FROM informes i
+            JOIN usuarios u ON u.id = i.id_usuario
+            {where_sql}
+            ORDER BY i.anio DESC, i.numero DESC
+        """, params
+
+    # ===============================
+    # REPORTES (incluye tipo_reporte + gestiones + productos_asociados)
+    # ===============================
+    if tipo == 'reportes':
+        return f"""
+            SELECT
+                'REP.DTCD.' || r.anio || '.' || LPAD(r.numero::text, GREATEST(3, length(r.numero::text)), '0') AS codigo,
+                r.empresa,
+
+                -- NUEVO
+                r.gestiones,
+                r.productos_asociados,
+
+                r.tipo_reporte,
+                r.asunto,
+                r.observaciones,
+                r.fecha,
+                TO_CHAR(r.hora, 'HH24:MI') AS hora,
+                u.nombre AS funcionario
+            FROM reportes r
+            JOIN usuarios u ON u.id = r.id_usuario
+            {where_sql}
+            ORDER BY r.anio DESC, r.numero DESC
+        """, params
+
+    # ===============================
+    # ACTAS / COMISIONES
+    # ===============================
+    prefijo = 'ACTAS.DTCD.' if tipo == 'actas' else 'CMS.DTCD.'
+    return f"""
+        SELECT
+            '{prefijo}' || d.anio || '.' || LPAD(d.numero::text, GREATEST(3, length(d.numero::text)), '0') AS codigo,
+            d.empresa,
+            d.gestiones,
+            d.productos_asociados,
+            d.asunto,
+            d.observaciones,
+            d.fecha,
+            TO_CHAR(d.hora, 'HH24:MI') AS hora,
+            u.nombre AS funcionario
+        FROM {tipo} d
+        JOIN usuarios u ON u.id = d.id_usuario
+        {where_sql}
+        ORDER BY d.anio DESC, d.numero DESC
+    """, params
+
+@contextmanager
+def open_export(tipo, filtros=None):
+    """Cursor del lado del servidor sobre la consulta de exportación de `tipo`.
+
+    Devuelve (cursor, columnas, oids, primer_lote); el resto de las filas se
+    pide con export_batches.
+    """
+    with get_conn() as conn, conn.cursor(name=f"export_{tipo}") as cur:
+        cur.itersize = EXPORT_FETCH_SIZE
+        cur.execute(*export_query(tipo, filtros))
+        # En un cursor con nombre la descripción llega con el primer fetch
+        primero = cur.fetchmany(EXPORT_FETCH_SIZE)
+        columnas = [d.name for d in cur.description]
+        oids = [d.type_code for d in cur.description]
+        yield cur, columnas, oids, primero
+
+def export_batches(cur, primero, progreso=None):
+    """Lotes de filas del cursor, empezando por el que ya se leyó.
+
+    Si se da `progreso`, se le pasa la cantidad de filas de cada lote.
+    """
+    lote = primero
+    while lote:
+        if progreso:
+            progreso(len(lote))
+        yield lote
+        lote = cur.fetchmany(EXPORT_FETCH_SIZE)
+
+def xlsx_formats(workbook):
+    """Formatos de la hoja, declarados una sola vez por libro.
+
+    Las celdas de datos no llevan formato propio: heredan el de su columna
+    (set_column). Las fechas usan el formato de fecha por defecto del libro,
+    al que se le agregan los mismos bordes.
+    """
+    borde = {'border': 1, 'border_color': '#D0D0D0', 'valign': 'top', 'text_wrap': True}
+    fecha = workbook.default_date_format
+    fecha.set_border(1)
+    fecha.set_border_color('#D0D0D0')
+    fecha.set_align('top')
+    fecha.set_text_wrap()
+    return {
+        'header': workbook.add_format({
+            'bold': True, 'font_color': '#FFFFFF', 'font_size': 11, 'bg_color': '#4472C4',
+            'align': 'center', 'valign': 'vcenter', 'text_wrap': True, 'border': 1,
+        }),
+        'celda': workbook.add_format(borde),
+        'fecha': fecha,
+        'franja': workbook.add_format({'bg_color': '#D9E1F2'}),
+    }
+
+def column_widths(anchos, lote):
+    """Actualiza `anchos` con el largo máximo de cada columna del lote."""
+    for col, valores in enumerate(zip(*lote)):
+        largo = max(map(len, map(str, filter(None, valores))), default=0)
+        if largo > anchos[col]:
+            anchos[col] = largo
+
+def excel_width(largo):
+    # Ancho con un mínimo de 12 y un máximo de 50
+    return min(max(largo + 2, 12), 50)
+
+def begin_export_sheet(workbook, formats, nombre, columnas, oids):
+    """Crea la hoja con su encabezado; devuelve el estado que usan append/finish_export_sheet.
+
+    El formato se asigna por columna una sola vez y los anchos se calculan por
+    lote, columna a columna, en vez de recorrer celda por celda. En modo
+    constant_memory cada hoja baja a su propio temporal, así que se pueden
+    intercalar lotes de hojas distintas.
+    """
+    worksheet = workbook.add_worksheet(nombre)
+    fmt_columnas = [formats['fecha'] if oid in PG_DATE_OIDS else formats['celda'] for oid in oids]
+    encabezados = [EXPORT_COLUMN_NAMES.get(c, c) for c in columnas]
+    anchos = [len(e) for e in encabezados]
+    for col, fmt in enumerate(fmt_columnas):
+        worksheet.set_column(col, col, excel_width(anchos[col]), fmt)
+
+    worksheet.write_row(0, 0, encabezados, formats['header'])
+    worksheet.freeze_panes(1, 0)
+    return {'worksheet': worksheet, 'formats': formats, 'fmt_columnas': fmt_columnas,
+            'anchos': anchos, 'filas': 0}
+
+def append_export_rows(hoja, lote):
+    worksheet = hoja['worksheet']
+    fila = hoja['filas']
+    for valores in lote:
+        fila += 1
+        worksheet.write_row(fila, 0, valores)
+    hoja['filas'] = fila
+    column_widths(hoja['anchos'], lote)
+
+def finish_export_sheet(hoja):
+    """Anchos finales, filtro y franjas; devuelve el número de filas."""
+    worksheet, fila = hoja['worksheet'], hoja['filas']
+    for col, fmt in enumerate(hoja['fmt_columnas']):
+        worksheet.set_column(col, col, excel_width(hoja['anchos'][col]), fmt)
+
+    ultima_col = len(hoja['fmt_columnas']) - 1
+    worksheet.autofilter(0, 0, max(fila, 1), ultima_col)
+    if fila:
+        worksheet.conditional_format(1, 0, fila, ultima_col, {
+            'type': 'formula', 'criteria': '=MOD(ROW(),2)=0', 'format': hoja['formats']['franja'],
+        })
+    return fila
+
+def write_export_sheet(workbook, formats, nombre, columnas, oids, lotes):
+    """Escribe una hoja completa con encabezado, filtro y franjas; devuelve el número de filas."""
+    hoja = begin_export_sheet(workbook, formats, nombre, columnas, oids)
+    for lote in lotes:
+        append_export_rows(hoja, lote)
+    return finish_export_sheet(hoja)
+
+def stream_file(path, borrar=True):
+    """Generador que envía `path` por partes y, si `borrar`, lo borra al terminar."""
+    def generar():
+        try:
+            with open(path, 'rb') as f:
+                while True:
+                    bloque = f.read(EXPORT_CHUNK_SIZE)
+                    if not bloque:
+                        break
+                    yield bloque
+        finally:
+            if borrar:
+                os.unlink(path)
+    return generar()
+
+def export_filename(tipo, extension):
+    return f"{tipo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+
+def attachment_response(body, filename, mimetype):
+    return app.response_class(
+        body,
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
+
+def export_workbook(path):
+    import xlsxwriter
+
+    return xlsxwriter.Workbook(path, {
+        'constant_memory': True,
+        'remove_timezone': True,
+        'default_date_format': 'dd/mm/yyyy',
+        'tmpdir': tempfile.gettempdir(),
+    })
+
+def build_xlsx_export(tipo, directorio=None, filtros=None, progreso=None):
+    """Genera el .xlsx de `tipo` en un archivo temporal y devuelve su ruta."""
+    fd, path = tempfile.mkstemp(prefix=f"export_{tipo}_", suffix=".xlsx", dir=directorio)
+    os.close(fd)
+    try:
+        workbook = export_workbook(path)
+        formats = xlsx_formats(workbook)
+        with open_export(tipo, filtros) as (cur, columnas, oids, primero):
+            write_export_sheet(workbook, formats, tipo.capitalize(), columnas, oids,
+                               export_batches(cur, primero, progreso))
+        workbook.close()
+    except Exception:
+        os.unlink(path)
+        raise
+    return path
+
+def export_description(cur, tipo):
+    """(columnas, oids) de la exportación de `tipo`, sin leer filas."""
+    sql, params = export_query(tipo)
+    cur.execute(f"SELECT * FROM ({sql}) q LIMIT 0", params)
+    return [d.name for d in cur.description], [d.type_code for d in cur.description]
+
+def export_copy_sql(cur, tipo, filtros=None):
+    """COPY ... TO STDOUT en CSV, con los encabezados en español, de la exportación de `tipo`."""
+    columnas, _ = export_description(cur, tipo)
+    seleccion = ", ".join(f'q."{c}" AS "{EXPORT_COLUMN_NAMES.get(c, c)}"' for c in columnas)
+    sql, params = export_query(tipo, filtros)
+    consulta = cur.mogrify(f"SELECT {seleccion} FROM ({sql}) q", params).decode('utf-8')
+    return f"COPY ({consulta}) TO STDOUT WITH (FORMAT csv, HEADER)"
+
+_STREAM_END = object()
+
+def queue_put(cola, item, cancelado):
+    """cola.put que se rinde si `cancelado` se activa (el consumidor ya no lee)."""
+    while not cancelado.is_set():
+        try:
+            cola.put(item, timeout=1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def threaded_stream(productor, max_bloques=16):
+    """Generador que entrega lo que `productor(escribir, set_conn)` va escribiendo desde otro hilo.
+
+    El productor escribe bytes con `escribir`; se juntan en bloques de
+    EXPORT_CHUNK_SIZE y pasan por una cola acotada, así que si el cliente lee
+    lento el productor espera en vez de acumular en memoria. Si el cliente
+    corta la descarga se cancela la consulta en curso (la que se registró con
+    `set_conn`).
+    """
+    cola = queue.Queue(maxsize=max_bloques)
+    cancelado = threading.Event()
+    estado = {'conn': None}
+    buffer = bytearray()
+
+    def poner(item):
+        queue_put(cola, item, cancelado)
+
+    def escribir(data):
+        if cancelado.is_set():
+            return
+        buffer.extend(data.encode('utf-8') if isinstance(data, str) else data)
+        if len(buffer) >= EXPORT_CHUNK_SIZE:
+            poner(bytes(buffer))
+            buffer.clear()
+
+    def set_conn(conn):
+        estado['conn'] = conn
+
+    def correr(metricas):
+        # Las consultas del productor cuentan para el request que pidió la descarga
+        bind_request_metrics(metricas)
+        try:
+            productor(escribir, set_conn)
+            if buffer:
+                poner(bytes(buffer))
+            poner(_STREAM_END)
+        except Exception as e:
+            if not cancelado.is_set():
+                app.logger.exception("Falló la exportación en segundo plano")
+                poner(e)
+
+    def generar():
+        hilo = threading.Thread(target=correr, args=(current_request_metrics(),),
+                                name="export-stream", daemon=True)
+        hilo.start()
+        try:
+            while True:
+                item = cola.get()
+                if item is _STREAM_END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            if hilo.is_alive():
+                cancelado.set()
+                if estado['conn'] is not None:
+                    estado['conn'].cancel()
+
+    return generar()
+
+class CopyOutput:
+    """Archivo mínimo para copy_expert: cada fila que entrega PostgreSQL pasa a `escribir`."""
+    def __init__(self, escribir):
+        self.write = escribir
+
+def copy_csv_to_file(tipo, f, filtros=None, progreso=None):
+    """Escribe en `f` el CSV de `tipo` (COPY ... TO STDOUT); devuelve las filas copiadas."""
+    def escribir(data):
+        f.write(data)
+        if progreso:
+            progreso(1)
+
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.copy_expert(export_copy_sql(cur, tipo, filtros),
+                        CopyOutput(escribir if progreso else f.write), size=EXPORT_CHUNK_SIZE)
+        return cur.rowcount
+
+def csv_export(tipo, filtros=None):
+    """CSV de `tipo` generado por PostgreSQL con COPY ... TO STDOUT."""
+    def productor(escribir, set_conn):
+        with get_conn() as conn, conn.cursor() as cur:
+            set_conn(conn)
+            cur.copy_expert(export_copy_sql(cur, tipo, filtros), CopyOutput(escribir), size=EXPORT_CHUNK_SIZE)
+
+    return threaded_stream(productor)
+
+def ndjson_export(tipo, filtros=None, progreso=None):
+    """Un objeto JSON por línea, escrito por lotes de EXPORT_FETCH_SIZE filas."""
+    with open_export(tipo, filtros) as (cur, columnas, oids, primero):
+        claves = [EXPORT_COLUMN_NAMES.get(c, c) for c in columnas]
+        for lote in export_batches(cur, primero, progreso):
+            yield "".join(
+                json.dumps(dict(zip(claves, fila)), ensure_ascii=False, default=str) + "\n"
+                for fila in lote
+            ).encode('utf-8')
+
+def arrow_type(oid):
+    import pyarrow as pa
+
+    if oid == 1082:
+        return pa.date32()
+    if oid == 1114:
+        return pa.timestamp('us')
+    if oid == 1184:
+        return pa.timestamp('us', tz='UTC')
+    if oid in (20, 21, 23):
+        return pa.int64()
+    return pa.string()
+
+def build_parquet_export(tipo, directorio=None, filtros=None, progreso=None):
+    """Genera el .parquet de `tipo` (un row group por lote) y devuelve su ruta."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    fd, path = tempfile.mkstemp(prefix=f"export_{tipo}_", suffix=".parquet", dir=directorio)
+    os.close(fd)
+    try:
+        with open_export(tipo, filtros) as (cur, columnas, oids, primero):
+            schema = pa.schema([(EXPORT_COLUMN_NAMES.get(c, c), arrow_type(oid))
+                                for c, oid in zip(columnas, oids)])
+            with pq.ParquetWriter(path, schema, compression='snappy') as writer:
+                for lote in export_batches(cur, primero, progreso):
+                    arrays = [pa.array(valores, type=campo.type)
+                              for valores, campo in zip(zip(*lote), schema)]
+                    writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                if not primero:
+                    writer.write_table(schema.empty_table())
+    except Exception:
+        os.unlink(path)
+        raise
+    return path
+
+def build_text_export(tipo, formato, directorio=None, filtros=None, progreso=None):
+    """Genera el .csv o .ndjson de `tipo` en un archivo temporal y devuelve su ruta."""
+    fd, path = tempfile.mkstemp(prefix=f"export_{tipo}_", suffix=f".{formato}", dir=directorio)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            if formato == 'csv':
+                copy_csv_to_file(tipo, f, filtros, progreso)
+            else:
+                for bloque in ndjson_export(tipo, filtros, progreso):
+                    f.write(bloque)
+    except Exception:
+        os.unlink(path)
+        raise
+    return path
+
+def build_export_file(tipo, formato, directorio=None, filtros=None, progreso=None):
+    """Genera la exportación de `tipo` en `formato` en un archivo y devuelve su ruta."""
+    if formato == 'xlsx':
+        return build_xlsx_export(tipo, directorio, filtros, progreso)
+    if formato == 'parquet':
+        return build_parquet_export(tipo, directorio, filtros, progreso)
+    return build_text_export(tipo, formato, directorio, filtros, progreso)
+
+# formato -> (mimetype, extensión)
+EXPORT_FORMATS = {
+    'xlsx': (XLSX_MIMETYPE, 'xlsx'),
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson; charset=utf-8', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+# ===============================
+# Caché de exportaciones
+# ===============================
+# Cada archivo generado queda en EXPORT_CACHE_DIR con nombre
+# "<tipo>.<formato>.<etag>". El etag sale de una marca de agua barata de la
+# tabla (MAX(id), conteo de doc_conteos y la hora de última escritura de
+# doc_modificaciones), así que mientras la tabla no cambie se reutiliza el
+# archivo y los clientes que mandan If-None-Match reciben 304. crear,
+# editar_documento y eliminar_documento avisan por NOTIFY para borrar al
+# momento los archivos viejos; el total en disco se mantiene bajo
+# EXPORT_CACHE_MAX_MB borrando primero los menos usados.
+EXPORT_CACHE_DIR = os.getenv("EXPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "actas_exportaciones"))
+EXPORT_CACHE_MAX_MB = int(os.getenv("EXPORT_CACHE_MAX_MB", 512))
+_export_cache_lock = threading.Lock()
+_export_cache_stats = {"hits": 0, "misses": 0, "not_modified": 0, "evictions": 0}
+_doc_modificaciones_available = None
+
+def export_watermark(tipo):
+    """(max_id, total, modificado_en) de `tipo`, o None si falta doc_modificaciones.
+
+    modificado_en también avanza cuando se edita un usuario: la exportación
+    lleva el nombre del funcionario, así que renombrarlo cambia el archivo.
+    """
+    global _doc_modificaciones_available
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            if _doc_modificaciones_available is None:
+                cur.execute("SELECT to_regclass('doc_modificaciones') IS NOT NULL")
+                _doc_modificaciones_available = cur.fetchone()[0]
+            if not _doc_modificaciones_available:
+                return None
+            cur.execute(f"""
+                SELECT (SELECT MAX(id) FROM {tipo}),
+                       GREATEST((SELECT modificado_en FROM doc_modificaciones WHERE tabla = %s),
+                                (SELECT MAX(updated_at) FROM usuarios))
+            """, (tipo,))
+            max_id, modificado = cur.fetchone()
+        return max_id, count_docs(conn, tipo), modificado
+
+def export_etag(tipo, formato, watermark):
+    max_id, total, modificado = watermark
+    clave = f"{tipo}:{formato}:{max_id}:{total}:{modificado.isoformat() if modificado else ''}"
+    return hashlib.sha1(clave.encode('utf-8')).hexdigest()[:24]
+
+def export_cache_path(tipo, formato, etag):
+    return os.path.join(EXPORT_CACHE_DIR, f"{tipo}.{formato}.{etag}")
+
+def export_cache_dir():
+    """Directorio del caché; los temporales se crean ahí para poder moverlos con os.replace."""
+    os.makedirs(EXPORT_CACHE_DIR, exist_ok=True)
+    return EXPORT_CACHE_DIR
+
+def _is_cache_entry(nombre):
+    # Los temporales en construcción ("export_...", ".tmp-...") no cuentan
+    return nombre.split(".", 1)[0] in EXPORT_TIPOS
+
+def export_cache_get(tipo, formato, etag):
+    path = export_cache_path(tipo, formato, etag)
+    try:
+        os.utime(path)  # marca de uso para el desalojo
+    except FileNotFoundError:
+        with _export_cache_lock:
+            _export_cache_stats["misses"] += 1
+        return None
+    with _export_cache_lock:
+        _export_cache_stats["hits"] += 1
+    return path
+
+def export_cache_put(tmp_path, tipo, formato, etag):
+    """Mueve `tmp_path` al caché, borra las versiones anteriores y desaloja por tamaño."""
+    destino = export_cache_path(tipo, formato, etag)
+    os.replace(tmp_path, destino)
+    prefijo = f"{tipo}.{formato}."
+    with _export_cache_lock:
+        archivos = []
+        for entrada in os.scandir(EXPORT_CACHE_DIR):
+            if not _is_cache_entry(entrada.name):
+                continue
+            if entrada.name.startswith(prefijo) and entrada.path != destino:
+                _unlink_quietly(entrada.path)
+                continue
+            stat = entrada.stat()
+            archivos.append((stat.st_mtime, stat.st_size, entrada.path))
+
+        total = sum(tam for _, tam, _ in archivos)
+        limite = EXPORT_CACHE_MAX_MB * 1024 * 1024
+        for _, tam, path in sorted(archivos):
+            if total <= limite:
+                break
+            if path == destino:  # el recién generado se sirve ahora mismo
+                continue
+            _unlink_quietly(path)
+            total -= tam
+            _export_cache_stats["evictions"] += 1
+    return destino
+
+def _unlink_quietly(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+def tee_to_cache(body, tipo, formato, etag):
+    """Envía `body` al cliente y a la vez lo guarda; sólo queda en caché si terminó completo."""
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=export_cache_dir())
+    completo = False
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for bloque in body:
+                f.write(bloque)
+                yield bloque
+        completo = True
+        export_cache_put(tmp, tipo, formato, etag)
+    finally:
+        if not completo:
+            _unlink_quietly(tmp)
+            body.close()
+
+@on_invalidation("exportaciones")
+def invalidate_export_cache(tipo=None):
+    """Borra los archivos cacheados de `tipo` (o todos si es None)."""
+    if not os.path.isdir(EXPORT_CACHE_DIR):
+        return
+    with _export_cache_lock:
+        for entrada in os.scandir(EXPORT_CACHE_DIR):
+            if not _is_cache_entry(entrada.name):
+                continue
+            if tipo is None or entrada.name.startswith(f"{tipo}."):
+                _unlink_quietly(entrada.path)
+
+def export_cache_stats():
+    archivos = []
+    if os.path.isdir(EXPORT_CACHE_DIR):
+        archivos = [e.stat().st_size for e in os.scandir(EXPORT_CACHE_DIR)
+                    if _is_cache_entry(e.name)]
+    return {
+        "pid": os.getpid(),
+        "archivos": len(archivos),
+        "bytes": sum(archivos),
+        "max_bytes": EXPORT_CACHE_MAX_MB * 1024 * 1024,
+        **_export_cache_stats,
+    }
+
+def build_export_body(tipo, formato, etag):
+    """Cuerpo de la respuesta de exportación; si hay `etag`, el resultado se guarda en caché."""
+    if formato in ('csv', 'ndjson'):
+        body = csv_export(tipo) if formato == 'csv' else ndjson_export(tipo)
+        return tee_to_cache(body, tipo, formato, etag) if etag else body
+
+    build = build_parquet_export if formato == 'parquet' else build_xlsx_export
+    if not etag:
+        return stream_file(build(tipo))
+    path = export_cache_put(build(tipo, directorio=export_cache_dir()), tipo, formato, etag)
+    return stream_file(path, borrar=False)
+
 @app.route('/exportar_documentos/<tipo>', methods=['GET'])
 def exportar_documentos(tipo):
     if not require_login():
         return redirect('/')
 
-    tablas_permitidas = ['actas', 'informes', 'reportes', 'comisiones']
-
-    if tipo not in tablas_permitidas:
+    if tipo not in EXPORT_TIPOS:
         flash("Tipo de documento no válido", "danger")
         return redirect('/dashboard')
 
-    with get_conn() as conn:
+    formato = request.args.get('format', 'xlsx').strip().lower()
+    if formato not in EXPORT_FORMATS:
+        flash("Formato de exportación no válido", "danger")
+        return redirect('/dashboard')
 
-        # ===============================
-        # INFORMES (incluye CASOS FORTUITOS + gestiones + productos_asociados)
-        # ===============================
-        if tipo == 'informes':
-            df = pd.read_sql_query("""
-                SELECT
-                    'INF.DTCD.' || i.anio || '.' || LPAD(i.numero::text, 3, '0') AS codigo,
-                    i.empresa,
-                    i.tipo_informe,
-
-                    -- Gestiones / Productos asociados
-                    i.gestiones,
-                    i.productos_asociados,
-
-                    -- Casos fortuitos
-                    i.caso_tipo,
-                    i.nombre_alimentador,
-                    i.alimentador_subestacion,
-                    i.linea_subtransmision_nombre,
-                    i.fecha_interrupcion,
-
-                    -- Datos generales
-                    i.asunto,
-                    i.observaciones,
-                    i.fecha,
-                    TO_CHAR(i.hora, 'HH24:MI') AS hora,
-
-                    u.nombre AS funcionario
-                FROM informes i
-                JOIN usuarios u ON u.id = i.id_usuario
-                ORDER BY i.anio DESC, i.numero DESC
-            """, engine)
+    watermark = export_watermark(tipo)
+    etag = export_etag(tipo, formato, watermark) if watermark else None
 
-        # ===============================
-        # REPORTES (incluye tipo_reporte + gestiones + productos_asociados)
-        # ===============================
-        elif tipo == 'reportes':
-            df = pd.read_sql_query("""
-                SELECT
-                    'REP.DTCD.' || r.anio || '.' || LPAD(r.numero::text, 3, '0') AS codigo,
-                    r.empresa,
-
-                    -- NUEVO
-                    r.gestiones,
-                    r.productos_asociados,
-
-                    r.tipo_reporte,
-                    r.asunto,
-                    r.observaciones,
-                    r.fecha,
-                    TO_CHAR(r.hora, 'HH24:MI') AS hora,
-                    u.nombre AS funcionario
-                FROM reportes r
-                JOIN usuarios u ON u.id = r.id_usuario
-                ORDER BY r.anio DESC, r.numero DESC
-            """, engine)
+    if etag and etag in request.if_none_match:
+        with _export_cache_lock:
+            _export_cache_stats["not_modified"] += 1
+        response = app.response_class(status=304)
+    else:
+        path = export_cache_get(tipo, formato, etag) if etag else None
+        body = stream_file(path, borrar=False) if path else build_export_body(tipo, formato, etag)
+        mimetype, extension = EXPORT_FORMATS[formato]
+        response = attachment_response(body, export_filename(tipo, extension), mimetype)
+
+    if etag:
+        response.set_etag(etag)
+        # El navegador puede guardar la descarga, pero debe revalidarla cada vez
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@app.route('/admin/estado/exportaciones')
+def admin_estado_exportaciones():
+    if not require_admin():
+        return {"error": "Unauthorized"}, 403
+    return {"data": export_cache_stats()}
 
-        # ===============================
-        # ACTAS / COMISIONES
-        # ===============================
-        else:
-            df = pd.read_sql_query(f"""
-                SELECT
-                    CASE 
-                        WHEN '{tipo}' = 'actas' THEN 'ACTAS.DTCD.' 
-                        WHEN '{tipo}' = 'comisiones' THEN 'CMS.DTCD.' 
-                        ELSE UPPER('{tipo}') || '.DTCD.' 
-                    END || d.anio || '.' || LPAD(d.numero::text, 3, '0') AS codigo,
-                    d.empresa,
-                    d.gestiones,
-                    d.productos_asociados,
-                    d.asunto,
-                    d.observaciones,
-                    d.fecha,
-                    TO_CHAR(d.hora, 'HH24:MI') AS hora,
-                    u.nombre AS funcionario
-                FROM {tipo} d
-                JOIN usuarios u ON u.id = d.id_usuario
-                ORDER BY d.anio DESC, d.numero DESC
-            """, engine)
+# ===============================
+# Exportación consolidada (todos los tipos)
+# ===============================
+# Un solo archivo con los cuatro tipos: un .xlsx con una hoja por tipo o un
+# .zip con un CSV por tipo. Las cuatro consultas corren a la vez, cada una en
+# su hilo y con su propia conexión del pool, así que el tiempo total se acerca
+# al de la tabla más lenta y no a la suma.
+CONSOLIDADO_FORMATS = {
+    'xlsx': (XLSX_MIMETYPE, 'xlsx'),
+    'zip': ('application/zip', 'zip'),
+}
+
+def export_filters_from_args(args=None):
+    """Filtros de empresa/año (de la URL o de `args`), con el mismo criterio que los listados."""
+    args = request.args if args is None else args
+    filtros = {}
+    empresa = (args.get('empresa') or '').strip()
+    if empresa:
+        filtros['empresa'] = empresa_variantes(empresa)
+    anio = str(args.get('anio') or '').strip()
+    if anio.isdigit():
+        filtros['anio'] = int(anio)
+    return filtros
+
+def build_consolidated_xlsx(filtros, directorio=None, progreso=None):
+    """Libro con una hoja por tipo. Los hilos leen y el hilo actual escribe lotes a medida que llegan."""
+    fd, path = tempfile.mkstemp(prefix="export_documentos_", suffix=".xlsx", dir=directorio)
+    os.close(fd)
+    cola = queue.Queue(maxsize=len(EXPORT_TIPOS) * 4)
+    cancelado = threading.Event()
+
+    def producir(tipo):
+        try:
+            with open_export(tipo, filtros) as (cur, _, _, primero):
+                for lote in export_batches(cur, primero):
+                    if not queue_put(cola, (tipo, lote), cancelado):
+                        return
+            queue_put(cola, (tipo, _STREAM_END), cancelado)
+        except Exception as e:
+            queue_put(cola, (tipo, e), cancelado)
 
-    # ===============================
-    # Generar Excel con formato
-    # ===============================
-    
-    # Renombrar columnas a español
-    column_names_map = {
-        'codigo': 'Código',
-        'empresa': 'Empresa',
-        'tipo_informe': 'Tipo de Informe',
-        'tipo_reporte': 'Tipo de Reporte',
-        'gestiones': 'Gestiones',
-        'productos_asociados': 'Productos Asociados',
-        'caso_tipo': 'Elemento Afectado',
-        'nombre_alimentador': 'Nombre de Alimentador',
-        'alimentador_subestacion': 'Subestación',
-        'linea_subtransmision_nombre': 'Línea Subtransmisión',
-        'fecha_interrupcion': 'Fecha Interrupción',
-        'asunto': 'Asunto',
-        'observaciones': 'Observaciones',
-        'fecha': 'Fecha Registro',
-        'hora': 'Hora Registro',
-        'funcionario': 'Funcionario'
-    }
-    
-    df.rename(columns=column_names_map, inplace=True)
-    
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name=tipo.capitalize(), startrow=0, startcol=0)
-        
-        # Obtener el workbook y worksheet
-        workbook = writer.book
-        worksheet = writer.sheets[tipo.capitalize()]
-        
-        # Convertir a tabla de Excel
-        from openpyxl.worksheet.table import Table, TableStyleInfo
-        from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-        
-        # Definir el rango de la tabla (desde A1 hasta la última columna y fila con datos)
-        max_row = len(df) + 1  # +1 por el header
-        max_col = len(df.columns)
-        
-        # Crear nombre de tabla único
-        table_name = f"Tabla{tipo.capitalize()}"
-        table_ref = f"A1:{chr(64 + max_col)}{max_row}"
-        
-        # Crear y configurar tabla
-        tab = Table(displayName=table_name, ref=table_ref)
-        style = TableStyleInfo(
-            name="TableStyleMedium2",
-            showFirstColumn=False,
-            showLastColumn=False,
-            showRowStripes=True,
-            showColumnStripes=False
-        )
-        tab.tableStyleInfo = style
-        worksheet.add_table(tab)
-        
-        # Estilo para encabezados
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF", size=11)
-        header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        
-        # Aplicar estilo a encabezados
-        for col_num in range(1, max_col + 1):
-            cell = worksheet.cell(row=1, column=col_num)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = header_alignment
-        
-        # Ajustar ancho de columnas automáticamente
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            
-            for cell in column:
+    try:
+        workbook = export_workbook(path)
+        formats = xlsx_formats(workbook)
+        # Las hojas se crean antes de leer datos para que queden en orden fijo
+        with get_conn() as conn, conn.cursor() as cur:
+            hojas = {
+                tipo: begin_export_sheet(workbook, formats, tipo.capitalize(), *export_description(cur, tipo))
+                for tipo in EXPORT_TIPOS
+            }
+
+        with ThreadPoolExecutor(max_workers=len(EXPORT_TIPOS), thread_name_prefix="export") as pool:
+            try:
+                for tipo in EXPORT_TIPOS:
+                    pool.submit(producir, tipo)
+                pendientes = len(EXPORT_TIPOS)
+                while pendientes:
+                    tipo, lote = cola.get()
+                    if lote is _STREAM_END:
+                        pendientes -= 1
+                    elif isinstance(lote, Exception):
+                        raise lote
+                    else:
+                        append_export_rows(hojas[tipo], lote)
+                        if progreso:
+                            progreso(len(lote))
+            finally:
+                cancelado.set()
+
+        for hoja in hojas.values():
+            finish_export_sheet(hoja)
+        workbook.close()
+    except Exception:
+        os.unlink(path)
+        raise
+    return path
+
+def build_consolidated_zip(filtros, directorio=None, progreso=None):
+    """Zip con un CSV por tipo; cada CSV sale de COPY en su propio hilo y conexión."""
+    partes = {}
+
+    def copiar(tipo):
+        fd, parte = tempfile.mkstemp(prefix=f"export_{tipo}_", suffix=".csv", dir=directorio)
+        partes[tipo] = parte
+        with os.fdopen(fd, 'wb') as f:
+            copy_csv_to_file(tipo, f, filtros, progreso)
+
+    fd, path = tempfile.mkstemp(prefix="export_documentos_", suffix=".zip", dir=directorio)
+    os.close(fd)
+    try:
+        with ThreadPoolExecutor(max_workers=len(EXPORT_TIPOS), thread_name_prefix="export") as pool:
+            for futuro in [pool.submit(copiar, tipo) for tipo in EXPORT_TIPOS]:
+                futuro.result()
+        with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+            for tipo in EXPORT_TIPOS:
+                zf.write(partes[tipo], f"{tipo}.csv")
+    except Exception:
+        os.unlink(path)
+        raise
+    finally:
+        for parte in partes.values():
+            _unlink_quietly(parte)
+    return path
+
+@app.route('/exportar_consolidado', methods=['GET'])
+def exportar_consolidado():
+    if not require_login():
+        return redirect('/')
+
+    formato = request.args.get('format', 'xlsx').strip().lower()
+    if formato not in CONSOLIDADO_FORMATS:
+        flash("Formato de exportación no válido", "danger")
+        return redirect('/dashboard')
+
+    filtros = export_filters_from_args()
+    build = build_consolidated_zip if formato == 'zip' else build_consolidated_xlsx
+    path = build(filtros)
+
+    mimetype, extension = CONSOLIDADO_FORMATS[formato]
+    return attachment_response(stream_file(path), export_filename('documentos', extension), mimetype)
+
+# ===============================
+# Trabajos en segundo plano (exportaciones y respaldos)
+# ===============================
+# Las exportaciones grandes y los respaldos no ocupan al worker de gunicorn:
+# la web encola una fila en `trabajos` (initdb/11_trabajos.sql) y responde con
+# su id. Un proceso aparte (`flask --app app trabajos`, servicio `worker` del
+# docker-compose) toma los pendientes con FOR UPDATE SKIP LOCKED, genera el
+# archivo en JOBS_DIR y va guardando el progreso. El archivo se descarga con
+# soporte de Range y se borra pasadas JOBS_RETENTION_HOURS.
+JOBS_CHANNEL = "actas_trabajos"
+JOBS_DIR = os.getenv("JOBS_DIR", os.path.join(tempfile.gettempdir(), "actas_trabajos"))
+JOBS_POLL_SECONDS = int(os.getenv("JOBS_POLL_SECONDS", 30))
+JOBS_RETENTION_HOURS = int(os.getenv("JOBS_RETENTION_HOURS", 24))
+JOBS_MAX_INTENTOS = int(os.getenv("JOBS_MAX_INTENTOS", 3))
+JOBS_STALE_MINUTES = int(os.getenv("JOBS_STALE_MINUTES", 10))
+JOBS_PROGRESS_SECONDS = 2
+# Sin servicio worker aparte, el propio proceso web puede correr la cola en un hilo
+JOBS_WORKER_THREAD = os.getenv("JOBS_WORKER_THREAD", "false").lower() == "true"
+_job_handlers = {}
+
+def job_handler(tipo):
+    """Registra `fn(parametros, directorio, progreso) -> (ruta, nombre_descarga, mimetype)`.
+
+    Un trabajo sin archivo que descargar (p. ej. una restauración) devuelve en
+    cambio un dict con el resumen, que queda en trabajos.resultado.
+    """
+    def decorator(fn):
+        _job_handlers[tipo] = fn
+        return fn
+    return decorator
+
+def enqueue_job(cur, tipo, parametros, id_usuario):
+    """Encola un trabajo en la transacción de `cur`; el aviso al worker sale con el COMMIT.
+
+    `cur` puede ser un cursor de tuplas o de diccionarios (RealDictCursor).
+    """
+    cur.execute("""
+        INSERT INTO trabajos (tipo, parametros, id_usuario)
+        VALUES (%s, %s, %s)
+        RETURNING id
+    """, (tipo, json.dumps(parametros), id_usuario))
+    row = cur.fetchone()
+    job_id = row['id'] if isinstance(row, dict) else row[0]
+    cur.execute("SELECT pg_notify(%s, %s)", (JOBS_CHANNEL, str(job_id)))
+    return job_id
+
+def job_progress(job_id):
+    """Callback `progreso(filas, total=None)` que acumula y guarda el avance cada pocos segundos."""
+    lock = threading.Lock()
+    estado = {'filas': 0, 'total': None, 'guardado': 0.0}
+
+    def progreso(filas=0, total=None):
+        with lock:
+            estado['filas'] += filas
+            if total is not None:
+                estado['total'] = total
+            ahora = time.monotonic()
+            if total is None and ahora - estado['guardado'] < JOBS_PROGRESS_SECONDS:
+                return
+            estado['guardado'] = ahora
+            filas_actual, total_actual = estado['filas'], estado['total']
+        with get_conn() as conn, conn.cursor() as cur:
+            cur.execute("""
+                UPDATE trabajos
+                SET progreso = %s, total = COALESCE(%s, total), actualizado_en = NOW()
+                WHERE id = %s
+            """, (filas_actual, total_actual, job_id))
+
+    return progreso
+
+def claim_job():
+    """Toma el siguiente trabajo pendiente (o None)."""
+    with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        # Trabajos de un worker que murió a mitad: se reintentan o se dan por fallidos
+        cur.execute("""
+            UPDATE trabajos
+            SET estado = CASE WHEN intentos < %s THEN 'pendiente' ELSE 'fallido' END,
+                error = CASE WHEN intentos < %s THEN error ELSE 'El worker dejó de responder' END,
+                terminado_en = CASE WHEN intentos < %s THEN NULL ELSE NOW() END,
+                expira_en = CASE WHEN intentos < %s THEN NULL ELSE NOW() + %s * INTERVAL '1 hour' END
+            WHERE estado = 'ejecutando'
+              AND actualizado_en < NOW() - %s * INTERVAL '1 minute'
+        """, (JOBS_MAX_INTENTOS,) * 4 + (JOBS_RETENTION_HOURS, JOBS_STALE_MINUTES))
+        cur.execute("""
+            UPDATE trabajos
+            SET estado = 'ejecutando', intentos = intentos + 1, progreso = 0, error = NULL,
+                iniciado_en = NOW(), actualizado_en = NOW()
+            WHERE id = (
+                SELECT id FROM trabajos
+                WHERE estado = 'pendiente'
+                ORDER BY id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, tipo, parametros
+        """)
+        return cur.fetchone()
+
+def run_job(trabajo):
+    """Ejecuta un trabajo ya tomado y deja su resultado (o el error) en la tabla."""
+    job_id = trabajo['id']
+    progreso = job_progress(job_id)
+    progreso.job_id = job_id
+
+    # Latido: aunque una etapa larga no reporte filas, el trabajo no parece abandonado
+    terminado = threading.Event()
+    def latido():
+        while not terminado.wait(60):
+            progreso(0)
+    threading.Thread(target=latido, name=f"trabajo-{job_id}-latido", daemon=True).start()
+
+    try:
+        handler = _job_handlers.get(trabajo['tipo'])
+        if handler is None:
+            raise ValueError(f"Tipo de trabajo desconocido: {trabajo['tipo']}")
+        os.makedirs(JOBS_DIR, exist_ok=True)
+        resultado = handler(trabajo['parametros'], JOBS_DIR, progreso)
+    except Exception as e:
+        terminado.set()
+        print(f"[WARN] Falló el trabajo {job_id}: {e}")
+        with get_conn() as conn, conn.cursor() as cur:
+            cur.execute("""
+                UPDATE trabajos
+                SET estado = 'fallido', error = %s, terminado_en = NOW(), actualizado_en = NOW(),
+                    expira_en = NOW() + %s * INTERVAL '1 hour'
+                WHERE id = %s
+            """, (str(e)[:2000], JOBS_RETENTION_HOURS, job_id))
+        return
+
+    terminado.set()
+    if isinstance(resultado, dict):
+        with get_conn() as conn, conn.cursor() as cur:
+            cur.execute("""
+                UPDATE trabajos
+                SET estado = 'listo', resultado = %s,
+                    progreso = GREATEST(progreso, COALESCE(total, 0)),
+                    terminado_en = NOW(), actualizado_en = NOW(),
+                    expira_en = NOW() + %s * INTERVAL '1 hour'
+                WHERE id = %s
+            """, (json.dumps(resultado), JOBS_RETENTION_HOURS, job_id))
+        return
+
+    path, nombre, mimetype = resultado
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("""
+            UPDATE trabajos
+            SET estado = 'listo', archivo = %s, nombre_descarga = %s, mimetype = %s, tamano = %s,
+                progreso = GREATEST(progreso, COALESCE(total, 0)),
+                terminado_en = NOW(), actualizado_en = NOW(),
+                expira_en = NOW() + %s * INTERVAL '1 hour'
+            WHERE id = %s
+        """, (path, nombre, mimetype, os.path.getsize(path), JOBS_RETENTION_HOURS, job_id))
+
+def purge_expired_jobs():
+    """Borra los archivos vencidos y marca sus trabajos como expirados."""
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("""
+            UPDATE trabajos t
+            SET estado = 'expirado', archivo = NULL
+            FROM (
+                SELECT id, archivo FROM trabajos
+                WHERE estado IN ('listo', 'fallido') AND expira_en < NOW()
+                FOR UPDATE SKIP LOCKED
+            ) v
+            WHERE t.id = v.id
+            RETURNING v.archivo
+        """)
+        vencidos = [row[0] for row in cur.fetchall()]
+    # La fila ya no apunta al archivo; si algo falla aquí sólo queda basura en disco
+    for path in vencidos:
+        if path:
+            _unlink_quietly(path)
+
+def run_jobs_worker():
+    """Bucle del worker: atiende la cola hasta que se mata el proceso."""
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    listener = None
+    while True:
+        try:
+            if listener is None:
+                listener = psycopg2.connect(DATABASE_URL)
+                listener.autocommit = True
+                with listener.cursor() as cur:
+                    cur.execute(f"LISTEN {JOBS_CHANNEL}")
+
+            while True:
+                trabajo = claim_job()
+                if trabajo is None:
+                    break
+                run_job(trabajo)
+            purge_expired_jobs()
+
+            if select.select([listener], [], [], JOBS_POLL_SECONDS) != ([], [], []):
+                listener.poll()
+                listener.notifies.clear()
+        except Exception as e:
+            print(f"[WARN] Error en el worker de trabajos: {e}")
+            if listener is not None:
                 try:
-                    cell_value = str(cell.value) if cell.value else ""
-                    if len(cell_value) > max_length:
-                        max_length = len(cell_value)
-                except:
+                    listener.close()
+                except Exception:
                     pass
-            
-            # Establecer ancho con un mínimo de 12 y un máximo de 50
-            adjusted_width = min(max(max_length + 2, 12), 50)
-            worksheet.column_dimensions[column_letter].width = adjusted_width
-        
-        # Aplicar bordes y alineación a todas las celdas
-        thin_border = Border(
-            left=Side(style='thin', color='D0D0D0'),
-            right=Side(style='thin', color='D0D0D0'),
-            top=Side(style='thin', color='D0D0D0'),
-            bottom=Side(style='thin', color='D0D0D0')
-        )
-        
-        for row in worksheet.iter_rows(min_row=2, max_row=max_row, min_col=1, max_col=max_col):
-            for cell in row:
-                cell.border = thin_border
-                cell.alignment = Alignment(vertical="top", wrap_text=True)
+                listener = None
+            time.sleep(5)
+
+@app.cli.command("trabajos")
+def trabajos_command():
+    """Worker de trabajos en segundo plano (exportaciones y respaldos)."""
+    print(f"[INFO] Worker de trabajos escuchando {JOBS_CHANNEL}; archivos en {JOBS_DIR}")
+    run_jobs_worker()
+
+@job_handler("exportacion")
+def run_export_job(parametros, directorio, progreso):
+    tipo = parametros['tipo']
+    formato = parametros['formato']
+    filtros = parametros.get('filtros') or {}
+    tipos = EXPORT_TIPOS if tipo == 'consolidado' else (tipo,)
+    with get_conn() as conn:
+        progreso(0, total=sum(count_docs(conn, t, filtros) for t in tipos))
+
+    if tipo == 'consolidado':
+        build = build_consolidated_zip if formato == 'zip' else build_consolidated_xlsx
+        path = build(filtros, directorio, progreso)
+        mimetype, extension = CONSOLIDADO_FORMATS[formato]
+        return path, export_filename('documentos', extension), mimetype
+
+    path = build_export_file(tipo, formato, directorio, filtros, progreso)
+    mimetype, extension = EXPORT_FORMATS[formato]
+    return path, export_filename(tipo, extension), mimetype
+
+def job_status(row):
+    """Representación JSON de un trabajo para el endpoint de estado."""
+    total = row['total']
+    porcentaje = None
+    if total:
+        porcentaje = min(100, round(row['progreso'] * 100 / total, 1))
+    elif row['estado'] == 'listo':
+        porcentaje = 100
+    return {
+        "id": row['id'],
+        "tipo": row['tipo'],
+        "estado": row['estado'],
+        "progreso": row['progreso'],
+        "total": total,
+        "porcentaje": porcentaje,
+        "error": row['error'],
+        "tamano": row['tamano'],
+        "resultado": row.get('resultado'),
+        "creado_en": row['creado_en'].isoformat() if row['creado_en'] else None,
+        "terminado_en": row['terminado_en'].isoformat() if row['terminado_en'] else None,
+        "expira_en": row['expira_en'].isoformat() if row['expira_en'] else None,
+        "estado_url": url_for('estado_trabajo', job_id=row['id']),
+        "descarga_url": url_for('descargar_trabajo', job_id=row['id']) if row['estado'] == 'listo' and row['archivo'] else None,
+    }
+
+def get_job_for_user(job_id):
+    """El trabajo si existe y lo puede ver el usuario en sesión (dueño o admin); si no, None."""
+    with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("SELECT * FROM trabajos WHERE id = %s", (job_id,))
+        row = cur.fetchone()
+    if row is None:
+        return None
+    if session.get('rol') != 'admin' and row['id_usuario'] != session.get('user_id'):
+        return None
+    return row
+
+def create_job_response(tipo, parametros):
+    with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        job_id = enqueue_job(cur, tipo, parametros, session['user_id'])
+        cur.execute("SELECT * FROM trabajos WHERE id = %s", (job_id,))
+        row = cur.fetchone()
+        conn.commit()
+    estado = job_status(row)
+    return {"data": estado}, 202, {"Location": estado["estado_url"]}
+
+@app.route('/trabajos/exportar', methods=['POST'])
+def crear_trabajo_exportacion():
+    if not require_login():
+        return {"error": "No autorizado"}, 401
+
+    datos = request.get_json(silent=True) or request.form
+    tipo = (datos.get('tipo') or '').strip().lower()
+    formato = (datos.get('format') or 'xlsx').strip().lower()
+    if tipo == 'consolidado':
+        valido = formato in CONSOLIDADO_FORMATS
+    else:
+        valido = tipo in EXPORT_TIPOS and formato in EXPORT_FORMATS
+    if not valido:
+        return {"error": "Tipo o formato de exportación no válido"}, 400
+
+    parametros = {'tipo': tipo, 'formato': formato, 'filtros': export_filters_from_args(datos)}
+    return create_job_response('exportacion', parametros)
 
-    output.seek(0)
-    filename = f"{tipo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+@app.route('/trabajos/<int:job_id>')
+def estado_trabajo(job_id):
+    if not require_login():
+        return {"error": "No autorizado"}, 401
+    row = get_job_for_user(job_id)
+    if row is None:
+        return {"error": "Trabajo no encontrado"}, 404
+    return {"data": job_status(row)}
 
+@app.route('/trabajos/<int:job_id>/descargar')
+def descargar_trabajo(job_id):
+    if not require_login():
+        return redirect('/')
+    row = get_job_for_user(job_id)
+    if row is None:
+        return {"error": "Trabajo no encontrado"}, 404
+    if row['estado'] == 'expirado' or (row['estado'] == 'listo' and not os.path.exists(row['archivo'] or '')):
+        return {"error": "El archivo ya no está disponible"}, 410
+    if row['estado'] != 'listo':
+        return {"error": "El trabajo todavía no termina", "data": job_status(row)}, 409
+
+    # conditional=True agrega ETag/Last-Modified y atiende Range (descargas reanudables)
     return send_file(
-        output,
-        download_name=filename,
+        row['archivo'],
+        mimetype=row['mimetype'],
         as_attachment=True,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        download_name=row['nombre_descarga'],
+        conditional=True,
     )
 
 # ===============================
@@ -494,14 +2107,6 @@ def enviar_recuperacion():
     token = secrets.token_urlsafe(32)
     expires_at = datetime.utcnow() + timedelta(hours=1)
 
-    with get_conn() as conn, conn.cursor() as cur:
-        cur.execute("""
-            INSERT INTO password_resets (token, email, expires_at)
-            VALUES (%s, %s, %s)
-            ON CONFLICT (token) DO UPDATE SET email=EXCLUDED.email, expires_at=EXCLUDED.expires_at
-        """, (token, email, expires_at))
-        conn.commit()
-
     # construir URL con base conocida (APP_BASE_URL) para que funcione detrás de proxy
     reset_path = url_for('restablecer_contrasena', token=token)
     reset_url = APP_BASE_URL.rstrip('/') + reset_path
@@ -513,10 +2118,18 @@ def enviar_recuperacion():
     <p>Este enlace expira en 1 hora.</p>
     """
     try:
-        send_email(email, "Recuperación de contraseña", html)
+        with get_conn() as conn, conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO password_resets (token, email, expires_at)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (token) DO UPDATE SET email=EXCLUDED.email, expires_at=EXCLUDED.expires_at
+            """, (token, email, expires_at))
+            enqueue_email(cur, email, "Recuperación de contraseña", html)
+            conn.commit()
+        wake_outbox_worker()
         flash("Se ha enviado un enlace de recuperación al correo.", "success")
     except Exception as e:
-        print("Error al enviar correo:", e)
+        print("Error al encolar correo:", e)
         flash("Error al enviar el correo.", "danger")
 
     return redirect('/')
@@ -567,140 +2180,1116 @@ def admin_configuracion():
         return redirect('/')
     return render_template('admin_configuracion.html')
 
+@app.route('/admin/estado/pool')
+def admin_estado_pool():
+    if not require_admin():
+        return {"error": "Unauthorized"}, 403
+    return {"data": pool_stats()}
+
+@app.route('/admin/estado/catalogos')
+def admin_estado_catalogos():
+    if not require_admin():
+        return {"error": "Unauthorized"}, 403
+    return {"data": catalog_cache_stats()}
+
 # ===============================
 # RESPALDO BASE DE DATOS
 # ===============================
 
+# Formatos de pg_dump: formato -> (opciones, extensión, mimetype)
+# "sql.gz" lo comprime el propio pg_dump (-Z), fuera del proceso web.
+BACKUP_FORMATS = {
+    'sql': (["--format=plain"], 'sql', 'application/sql'),
+    'sql.gz': (["--format=plain", "--compress=6"], 'sql.gz', 'application/gzip'),
+    'custom': (["--format=custom"], 'dump', 'application/octet-stream'),
+}
+BACKUP_CHUNK_SIZE = 256 * 1024
+
 @app.route('/admin/respaldo')
 def admin_respaldo():
     if not require_admin():
         return redirect('/')
-    return render_template('admin_respaldo.html')
+    return render_template('admin_respaldo.html', respaldos=recent_backups(), cadena=recent_chain_backups())
+
+def pg_settings():
+    """Credenciales de PostgreSQL desde variables de entorno."""
+    return {
+        "host": os.getenv("POSTGRES_HOST", "db"),
+        "port": os.getenv("POSTGRES_PORT", "5432"),
+        "dbname": os.getenv("POSTGRES_DB", "actas_db"),
+        "user": os.getenv("POSTGRES_USER", "postgres"),
+        "password": os.getenv("POSTGRES_PASSWORD", "postgres"),
+    }
+
+def pg_cli_args(database=None):
+    """(argumentos de conexión, entorno, nombre de la base) para pg_dump/psql/pg_restore.
+
+    `database` cambia la base a la que se conecta la herramienta (p. ej. la de
+    staging de una restauración); el tercer valor sigue siendo la base de la app.
+    """
+    cfg = pg_settings()
+    env = os.environ.copy()
+    env["PGPASSWORD"] = cfg["password"]
+    args = ["-h", cfg["host"], "-p", cfg["port"], "-U", cfg["user"], "-d", database or cfg["dbname"]]
+    return args, env, cfg["dbname"]
+
+def pg_connect(database):
+    """Conexión directa (fuera del pool) a otra base del mismo servidor."""
+    cfg = pg_settings()
+    cfg["dbname"] = database
+    return psycopg2.connect(**cfg)
+
+def pg_dump_command(formato, verbose=False):
+    """Comando pg_dump para `formato` (clave de BACKUP_FORMATS), su entorno y el nombre de descarga."""
+    args, env, pg_db = pg_cli_args()
+    opciones, extension, _ = BACKUP_FORMATS[formato]
+    # --clean/--if-exists: el restore borra antes de crear (en custom los aplica pg_restore)
+    # --no-owner/--no-privileges: sin ALTER OWNER ni GRANT/REVOKE
+    cmd = ["pg_dump", *args, *opciones, "--clean", "--if-exists", "--no-owner", "--no-privileges"]
+    if verbose:
+        cmd.append("--verbose")
+    filename = f"respaldo_{pg_db}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    return cmd, env, filename
+
+def record_backup(formato, origen, estado, bytes_, duracion, error=None, id_usuario=None, **cadena):
+    """Guarda el resultado de un respaldo en el historial (y en el log) y devuelve su id.
+
+    `cadena` son las columnas de los respaldos que forman parte de una cadena
+    incremental (tipo, archivo, base_id, anterior_id, desde, marca).
+    """
+    app.logger.info("Respaldo %s (%s): %s, %d bytes en %.1f s", formato, origen, estado, bytes_, duracion)
+    columnas = list(cadena)
+    try:
+        with get_conn() as conn, conn.cursor() as cur:
+            cur.execute(f"""
+                INSERT INTO respaldos (formato, origen, estado, bytes, duracion_ms, error, id_usuario,
+                                       iniciado_en, terminado_en{''.join(', ' + c for c in columnas)})
+                VALUES (%s, %s, %s, %s, %s, %s, %s, NOW() - %s * INTERVAL '1 second', NOW(){', %s' * len(columnas)})
+                RETURNING id
+            """, (formato, origen, estado, bytes_, int(duracion * 1000), error, id_usuario, duracion,
+                  *cadena.values()))
+            return cur.fetchone()[0]
+    except Exception as e:
+        print(f"[WARN] No se pudo registrar el respaldo: {e}")
+
+def recent_backups(limit=10):
+    try:
+        with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("""
+                SELECT r.*, u.nombre AS usuario
+                FROM respaldos r
+                LEFT JOIN usuarios u ON u.id = r.id_usuario
+                ORDER BY r.iniciado_en DESC
+                LIMIT %s
+            """, (limit,))
+            return cur.fetchall()
+    except psycopg2.errors.UndefinedTable:
+        return []
+
+@app.template_filter('tamano')
+def human_size(n):
+    """1536 -> '1.5 KiB'."""
+    if n is None:
+        return '—'
+    for unidad in ('B', 'KiB', 'MiB', 'GiB'):
+        if n < 1024 or unidad == 'GiB':
+            return f"{n:.0f} {unidad}" if unidad == 'B' else f"{n:.1f} {unidad}"
+        n /= 1024
+
+def stream_pg_dump(process, primero, formato, inicio, id_usuario, stderr_file):
+    """Envía la salida de pg_dump por partes; al terminar registra tamaño y duración."""
+    enviados = 0
+    estado = 'cancelado'
+    error = None
+    try:
+        bloque = primero
+        while bloque:
+            enviados += len(bloque)
+            yield bloque
+            bloque = process.stdout.read(BACKUP_CHUNK_SIZE)
+        process.wait()
+        if process.returncode == 0:
+            estado = 'ok'
+        else:
+            estado = 'fallido'
+            stderr_file.seek(0)
+            error = stderr_file.read().decode('utf-8', 'replace')[-2000:]
+            app.logger.error("pg_dump terminó con código %s: %s", process.returncode, error)
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        stderr_file.close()
+        record_backup(formato, 'descarga', estado, enviados, time.perf_counter() - inicio, error, id_usuario)
+
+def dump_to_file(cmd, env, path, progreso):
+    """Corre pg_dump --verbose hacia `path`; el progreso es la cantidad de tablas ya volcadas."""
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM pg_tables WHERE schemaname NOT IN ('pg_catalog', 'information_schema')")
+        progreso(0, total=cur.fetchone()[0])
+
+    errores = []
+    with open(path, 'wb') as salida:
+        process = subprocess.Popen(cmd, env=env, stdout=salida, stderr=subprocess.PIPE)
+        for linea in process.stderr:
+            texto = linea.decode('utf-8', 'replace')
+            if "dumping contents of table" in texto:
+                progreso(1)
+            elif "error" in texto.lower():
+                errores.append(texto)
+        process.wait()
+    if process.returncode != 0:
+        raise RuntimeError("pg_dump terminó con error: " + "".join(errores[-20:]))
+
+@job_handler("respaldo")
+def run_backup_job(parametros, directorio, progreso):
+    """pg_dump a disco; el progreso es la cantidad de tablas ya volcadas."""
+    formato = parametros.get('formato', 'sql')
+    cmd, env, filename = pg_dump_command(formato, verbose=True)
+    inicio = time.perf_counter()
+    fd, path = tempfile.mkstemp(prefix="respaldo_", suffix=f".{BACKUP_FORMATS[formato][1]}", dir=directorio)
+    os.close(fd)
+    try:
+        dump_to_file(cmd, env, path, progreso)
+    except Exception as e:
+        record_backup(formato, 'trabajo', 'fallido', 0, time.perf_counter() - inicio, str(e)[:2000],
+                      parametros.get('id_usuario'))
+        _unlink_quietly(path)
+        raise
+    record_backup(formato, 'trabajo', 'ok', os.path.getsize(path), time.perf_counter() - inicio,
+                  id_usuario=parametros.get('id_usuario'))
+    return path, filename, BACKUP_FORMATS[formato][2]
+
+@app.route('/admin/respaldo/trabajo', methods=['POST'])
+def crear_trabajo_respaldo():
+    if not require_admin():
+        return {"error": "Unauthorized"}, 403
+    datos = request.get_json(silent=True) or request.form
+    formato = (datos.get('formato') or 'sql').strip().lower()
+    if formato not in BACKUP_FORMATS:
+        return {"error": "Formato de respaldo no válido"}, 400
+    return create_job_response('respaldo', {'formato': formato, 'id_usuario': session['user_id']})
 
 @app.route('/admin/respaldo/exportar')
 def exportar_db():
+    """Descarga de pg_dump en streaming: la salida pasa por un pipe en bloques, sin acumularse en memoria."""
     if not require_admin():
         return redirect('/')
-    
-    # Credenciales desde variables de entorno
-    pg_host = os.getenv("POSTGRES_HOST", "db")
-    pg_port = os.getenv("POSTGRES_PORT", "5432")
-    pg_db = os.getenv("POSTGRES_DB", "actas_db")
-    pg_user = os.getenv("POSTGRES_USER", "postgres")
-    pg_pass = os.getenv("POSTGRES_PASSWORD", "postgres")
 
-    # Usar PGPASSWORD env var para pg_dump
-    env = os.environ.copy()
-    env["PGPASSWORD"] = pg_pass
+    formato = request.args.get('formato', 'sql').strip().lower()
+    if formato not in BACKUP_FORMATS:
+        flash("Formato de respaldo no válido", "danger")
+        return redirect(url_for('admin_respaldo'))
 
-    filename = f"respaldo_{pg_db}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.sql"
-    
+    cmd, env, filename = pg_dump_command(formato)
+    inicio = time.perf_counter()
+    stderr_file = tempfile.TemporaryFile()
     try:
-        # Comando pg_dump con opciones de limpieza para que el restore sea más fácil
-        # --clean: DROP database objects before creating them
-        # --if-exists: Use IF EXISTS when dropping objects
-        # --no-owner: Do not output commands to set ownership of objects
-        # --no-privileges: Do not output commands to set access privileges (grant/revoke)
-        process = subprocess.run(
-            [
-                "pg_dump", 
-                "-h", pg_host, 
-                "-p", pg_port, 
-                "-U", pg_user, 
-                "-d", pg_db, 
-                "--clean",
-                "--if-exists",
-                "--no-owner", 
-                "--no-privileges"
-            ],
-            env=env,
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        backup_sql = process.stdout
-        
-        return send_file(
-            BytesIO(backup_sql.encode('utf-8')),
-            download_name=filename,
-            as_attachment=True,
-            mimetype='application/sql'
-        )
-    except subprocess.CalledProcessError as e:
-        flash(f"Error al ejecutar backup: {e.stderr}", "danger")
-        return redirect(url_for('admin_respaldo'))
+        process = subprocess.Popen(cmd, env=env, stdout=subprocess.PIPE, stderr=stderr_file)
     except Exception as e:
+        stderr_file.close()
         flash(f"Error inesperado: {str(e)}", "danger")
         return redirect(url_for('admin_respaldo'))
 
+    # Si pg_dump falla al conectarse no escribe nada: se avisa en lugar de descargar un archivo vacío
+    primero = process.stdout.read(BACKUP_CHUNK_SIZE)
+    if not primero and process.wait() != 0:
+        stderr_file.seek(0)
+        error = stderr_file.read().decode('utf-8', 'replace')
+        process.stdout.close()
+        stderr_file.close()
+        record_backup(formato, 'descarga', 'fallido', 0, time.perf_counter() - inicio, error[-2000:], session['user_id'])
+        flash(f"Error al ejecutar backup: {error}", "danger")
+        return redirect(url_for('admin_respaldo'))
+
+    body = stream_pg_dump(process, primero, formato, inicio, session['user_id'], stderr_file)
+    return attachment_response(body, filename, BACKUP_FORMATS[formato][2])
+
+# ===============================
+# Restauración de respaldos
+# ===============================
+# La restauración nunca toca la base en uso hasta el final: el respaldo se
+# carga en una base de staging (<base>_restauracion), con pg_restore --jobs
+# para el formato custom o por el stdin de psql para .sql/.sql.gz. Luego se
+# comparan las filas de cada tabla contra las que trae el propio respaldo y,
+# si todo coincide, las dos bases se intercambian con ALTER DATABASE RENAME en
+# una sola transacción. La base reemplazada queda como <base>_anterior hasta
+# la siguiente restauración. Corre como trabajo en segundo plano.
+RESTORE_JOBS = int(os.getenv("RESTORE_JOBS", 4))
+RESTORE_CHUNK_SIZE = 1024 * 1024
+# Errores que no afectan los datos: parámetros de un pg_dump más nuevo,
+# objetos que la base vacía ya trae (schema public) y dueños de otro servidor
+RESTORE_IGNORED_ERRORS = re.compile(
+    r'unrecognized configuration parameter|already exists|role ".*" does not exist'
+)
+_COPY_START = re.compile(rb'^COPY (\S+) .*FROM stdin;\n', re.MULTILINE)
+
+class DumpRowCounter:
+    """Cuenta las filas de cada bloque COPY ... FROM stdin de un volcado SQL leído por partes."""
+
+    def __init__(self, al_empezar=None):
+        self.filas = {}
+        self.tabla = None
+        self._resto = b""
+        self._al_empezar = al_empezar
+
+    def feed(self, bloque):
+        data = self._resto + bloque
+        pos = 0
+        while True:
+            if self.tabla is None:
+                m = _COPY_START.search(data, pos)
+                if m is None:
+                    # Se guarda sólo la última línea incompleta
+                    pos = max(pos, data.rfind(b"\n", pos) + 1)
+                    break
+                self.tabla = m.group(1).decode('utf-8', 'replace')
+                self.filas[self.tabla] = 0
+                if self._al_empezar:
+                    self._al_empezar(self.tabla)
+                pos = m.end()
+            else:
+                fin = self._fin_copy(data, pos)
+                if fin is None:
+                    corte = data.rfind(b"\n", pos) + 1
+                    if corte > pos:
+                        self.filas[self.tabla] += data.count(b"\n", pos, corte)
+                        pos = corte
+                    break
+                self.filas[self.tabla] += data.count(b"\n", pos, fin)
+                pos = fin + 3
+                self.tabla = None
+        self._resto = data[pos:]
+
+    @staticmethod
+    def _fin_copy(data, pos):
+        """Posición del terminador `\\.` (al inicio de una línea) o None."""
+        idx = data.find(b"\\.\n", pos)
+        while idx != -1 and idx != pos and data[idx - 1] != 0x0A:
+            idx = data.find(b"\\.\n", idx + 1)
+        return None if idx == -1 else idx
+
+def detect_backup_format(stream):
+    """'custom', 'sql.gz' o 'sql' según los primeros bytes del archivo."""
+    cabecera = stream.read(5)
+    stream.seek(0)
+    if cabecera.startswith(b"PGDMP"):
+        return 'custom'
+    if cabecera.startswith(b"\x1f\x8b"):
+        return 'sql.gz'
+    return 'sql'
+
+def split_restore_errors(lineas):
+    """(advertencias ignorables, errores reales) de la salida de psql/pg_restore."""
+    avisos, errores = [], []
+    for linea in lineas:
+        (avisos if RESTORE_IGNORED_ERRORS.search(linea) else errores).append(linea.strip())
+    return avisos, errores
+
+def count_dump_rows(cmd, env):
+    """Filas por tabla del volcado SQL que `cmd` escribe en stdout."""
+    contador = DumpRowCounter()
+    with subprocess.Popen(cmd, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as process:
+        for bloque in iter(lambda: process.stdout.read(RESTORE_CHUNK_SIZE), b""):
+            contador.feed(bloque)
+    if process.returncode != 0:
+        raise RuntimeError("No se pudo leer el contenido del respaldo")
+    return contador.filas
+
+def restore_custom_dump(archivo, staging, progreso):
+    """pg_restore --jobs en staging; el progreso es la cantidad de tablas ya cargadas."""
+    args, env, _ = pg_cli_args(staging)
+    lista = subprocess.run(["pg_restore", "--list", archivo], env=env, capture_output=True, text=True)
+    if lista.returncode != 0:
+        raise RuntimeError(f"El archivo no es un respaldo válido: {lista.stderr.strip()[:500]}")
+    progreso(0, total=sum(1 for linea in lista.stdout.splitlines() if " TABLE DATA " in linea))
+
+    cmd = ["pg_restore", *args, f"--jobs={RESTORE_JOBS}", "--no-owner", "--no-privileges", "--verbose", archivo]
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        # Filas esperadas: el mismo archivo leído como SQL, en paralelo a la carga
+        conteo = pool.submit(count_dump_rows, ["pg_restore", "--data-only", "-f", "-", archivo], env)
+        mensajes = []
+        process = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        for linea in process.stderr:
+            texto = linea.decode('utf-8', 'replace')
+            if "finished item" in texto and " TABLE DATA " in texto:
+                progreso(1)
+            elif "error:" in texto:
+                mensajes.append(texto)
+        process.wait()
+        esperado = conteo.result()
+
+    avisos, errores = split_restore_errors(mensajes)
+    if errores or (process.returncode != 0 and not avisos):
+        raise RuntimeError("pg_restore terminó con errores: " + " | ".join(errores[:5]))
+    return esperado, avisos
+
+def restore_sql_dump(archivo, formato, staging, progreso):
+    """Envía el .sql (o .sql.gz, descomprimido al vuelo) al stdin de psql contando filas por tabla."""
+    args, env, _ = pg_cli_args(staging)
+    contador = DumpRowCounter(al_empezar=lambda tabla: progreso(1))
+    abrir = gzip.open if formato == 'sql.gz' else open
+    final = b""
+    with tempfile.TemporaryFile() as stderr_file:
+        process = subprocess.Popen(["psql", *args, "--no-psqlrc", "--quiet"], env=env,
+                                   stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=stderr_file)
+        try:
+            with abrir(archivo, 'rb') as entrada:
+                for bloque in iter(lambda: entrada.read(RESTORE_CHUNK_SIZE), b""):
+                    contador.feed(bloque)
+                    process.stdin.write(bloque)
+                    final = (final + bloque)[-256:]
+            process.stdin.close()
+        except BrokenPipeError:
+            pass  # psql terminó antes de tiempo; el motivo queda en stderr
+        except BaseException:
+            process.kill()
+            raise
+        finally:
+            process.wait()
+        stderr_file.seek(0)
+        salida = stderr_file.read().decode('utf-8', 'replace')
+
+    avisos, errores = split_restore_errors(l for l in salida.splitlines() if "ERROR:" in l or "FATAL:" in l)
+    if errores or process.returncode != 0:
+        raise RuntimeError("psql terminó con errores: " + " | ".join(errores[:5] or [salida[-500:]]))
+    # pg_dump cierra siempre con este comentario; sin él el archivo llegó cortado
+    if contador.tabla is not None or b"PostgreSQL database dump complete" not in final:
+        raise RuntimeError("El respaldo está incompleto (el archivo termina antes de tiempo)")
+    return contador.filas, avisos
+
+def validate_staging(staging, esperado):
+    """Verifica que cada tabla de staging tenga las filas que trae el respaldo."""
+    if not esperado:
+        raise RuntimeError("El respaldo no contiene datos de ninguna tabla")
+    conn = pg_connect(staging)
+    try:
+        with conn.cursor() as cur:
+            diferencias = []
+            for tabla, filas in esperado.items():
+                cur.execute("SELECT to_regclass(%s)::text", (tabla,))
+                nombre = cur.fetchone()[0]
+                if nombre is None:
+                    diferencias.append(f"{tabla}: no existe")
+                    continue
+                cur.execute(pgsql.SQL("SELECT COUNT(*) FROM {}").format(pgsql.SQL(nombre)))
+                cargadas = cur.fetchone()[0]
+                if cargadas != filas:
+                    diferencias.append(f"{tabla}: {cargadas} de {filas} filas")
+            if diferencias:
+                raise RuntimeError("La base restaurada no coincide con el respaldo: " + "; ".join(diferencias[:10]))
+            ensure_staging_admin(cur)
+    finally:
+        conn.close()
+
+def ensure_staging_admin(cur):
+    """Sin administradores nadie podría volver a entrar a /admin."""
+    cur.execute("SELECT to_regclass('public.usuarios')")
+    if cur.fetchone()[0] is None:
+        raise RuntimeError("El respaldo no contiene la tabla usuarios")
+    cur.execute("SELECT COUNT(*) FROM usuarios WHERE rol = 'admin'")
+    if cur.fetchone()[0] == 0:
+        raise RuntimeError("El respaldo no tiene ningún usuario administrador")
+
+def carry_over_state(staging, job_id=None):
+    """Copia a staging lo que debe sobrevivir al cambio de base.
+
+    El historial de respaldos (la cadena incremental sigue en disco) y la
+    fila del trabajo en curso, para que su resultado quede registrado.
+    """
+    with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("SELECT * FROM respaldos ORDER BY id")
+        respaldos = cur.fetchall()
+        columnas = [d.name for d in cur.description]
+        trabajo = None
+        if job_id is not None:
+            cur.execute("SELECT * FROM trabajos WHERE id = %s", (job_id,))
+            trabajo = cur.fetchone()
+
+    destino = pg_connect(staging)
+    try:
+        with destino, destino.cursor() as cur:
+            cur.execute("""
+                SELECT column_name FROM information_schema.columns
+                WHERE table_schema = 'public' AND table_name = 'respaldos'
+            """)
+            existentes = {row[0] for row in cur.fetchall()}
+            comunes = [c for c in columnas if c in existentes]
+            if comunes:
+                # Sin triggers ni FK: el usuario de una fila puede no existir en el respaldo
+                cur.execute("SET LOCAL session_replication_role = replica")
+                cur.execute("DELETE FROM respaldos")
+                if respaldos:
+                    execute_values(cur, pgsql.SQL("INSERT INTO respaldos ({}) VALUES %s").format(
+                        pgsql.SQL(", ").join(map(pgsql.Identifier, comunes))).as_string(cur),
+                        [[row[c] for c in comunes] for row in respaldos])
+                cur.execute("UPDATE respaldos SET id_usuario = NULL WHERE id_usuario NOT IN (SELECT id FROM usuarios)")
+                cur.execute("SELECT setval(pg_get_serial_sequence('respaldos', 'id'), COALESCE(MAX(id), 1)) FROM respaldos")
+                cur.execute("SET LOCAL session_replication_role = DEFAULT")
+
+            cur.execute("SELECT to_regclass('public.trabajos')")
+            if trabajo is None or cur.fetchone()[0] is None:
+                return
+            cur.execute("ALTER TABLE trabajos ADD COLUMN IF NOT EXISTS resultado JSONB")
+            # Lo que estaba en cola al momento del respaldo ya no tiene sentido reintentarlo
+            cur.execute("""
+                UPDATE trabajos
+                SET estado = 'fallido', error = 'Interrumpido por la restauración de un respaldo',
+                    terminado_en = NOW(), expira_en = NOW()
+                WHERE estado IN ('pendiente', 'ejecutando')
+            """)
+            cur.execute("DELETE FROM trabajos WHERE id = %s", (job_id,))
+            cur.execute("""
+                INSERT INTO trabajos (id, tipo, parametros, id_usuario, estado, intentos, progreso, total,
+                                      creado_en, iniciado_en, actualizado_en)
+                VALUES (%s, %s, %s, (SELECT id FROM usuarios WHERE id = %s), 'ejecutando', %s, %s, %s,
+                        %s, %s, NOW())
+            """, (trabajo['id'], trabajo['tipo'], json.dumps(trabajo['parametros']), trabajo['id_usuario'],
+                  trabajo['intentos'], trabajo['progreso'], trabajo['total'], trabajo['creado_en'],
+                  trabajo['iniciado_en']))
+            cur.execute("SELECT setval(pg_get_serial_sequence('trabajos', 'id'), (SELECT MAX(id) FROM trabajos))")
+    finally:
+        destino.close()
+
+def swap_databases(admin, pg_db, staging, anterior):
+    """Intercambia la base en uso por staging en una sola transacción."""
+    with admin.cursor() as cur:
+        cur.execute(pgsql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(pgsql.Identifier(anterior)))
+        cur.execute(pgsql.SQL("ALTER DATABASE {} WITH ALLOW_CONNECTIONS false").format(pgsql.Identifier(pg_db)))
+        try:
+            # Nadie más puede entrar; se cierran las sesiones abiertas (los pools reconectan solos)
+            for _ in range(50):
+                cur.execute("""
+                    SELECT COUNT(pg_terminate_backend(pid)) FROM pg_stat_activity
+                    WHERE datname = ANY(%s) AND pid <> pg_backend_pid()
+                """, ([pg_db, staging],))
+                if cur.fetchone()[0] == 0:
+                    break
+                time.sleep(0.1)
+            admin.autocommit = False
+            cur.execute(pgsql.SQL("ALTER DATABASE {} RENAME TO {}").format(pgsql.Identifier(pg_db), pgsql.Identifier(anterior)))
+            cur.execute(pgsql.SQL("ALTER DATABASE {} RENAME TO {}").format(pgsql.Identifier(staging), pgsql.Identifier(pg_db)))
+            admin.commit()
+        except Exception:
+            admin.rollback()
+            raise
+        finally:
+            admin.autocommit = True
+            cur.execute("SELECT datname FROM pg_database WHERE datname = ANY(%s) AND NOT datallowconn",
+                        ([pg_db, anterior],))
+            for (nombre,) in cur.fetchall():
+                cur.execute(pgsql.SQL("ALTER DATABASE {} WITH ALLOW_CONNECTIONS true").format(pgsql.Identifier(nombre)))
+
+def restore_to_live(archivo, formato, progreso, cadena=(), job_id=None):
+    """Restaura `archivo` en staging, aplica los incrementales de `cadena`, valida e intercambia.
+
+    Devuelve el resumen para trabajos.resultado.
+    """
+    _, _, pg_db = pg_cli_args()
+    staging = f"{pg_db}_restauracion"
+    anterior = f"{pg_db}_anterior"
+
+    admin = pg_connect("postgres")
+    admin.autocommit = True
+    try:
+        with admin.cursor() as cur:
+            cur.execute(pgsql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(pgsql.Identifier(staging)))
+            cur.execute(pgsql.SQL("CREATE DATABASE {} TEMPLATE template0").format(pgsql.Identifier(staging)))
+        try:
+            if formato == 'custom':
+                esperado, avisos = restore_custom_dump(archivo, staging, progreso)
+            else:
+                esperado, avisos = restore_sql_dump(archivo, formato, staging, progreso)
+            validate_staging(staging, esperado)
+            # Un respaldo de una versión anterior queda con el esquema actual antes de entrar en uso
+            migraciones = run_migrations(informar=app.logger.info, dsn=psycopg2.extensions.make_dsn(
+                **{**pg_settings(), "dbname": staging}))
+            if cadena:
+                replay_incrementals(staging, cadena)
+            carry_over_state(staging, job_id)
+            swap_databases(admin, pg_db, staging, anterior)
+        except Exception:
+            with admin.cursor() as cur:
+                cur.execute(pgsql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(pgsql.Identifier(staging)))
+            raise
+    finally:
+        admin.close()
+
+    filas = sum(esperado.values())
+    app.logger.info("Respaldo restaurado: %d tablas, %d filas, %d incrementales; la base anterior quedó como %s",
+                    len(esperado), filas, len(cadena), anterior)
+    incrementales = f" más {len(cadena)} incrementales" if cadena else ""
+    actualizado = f" Se aplicaron {len(migraciones)} migraciones pendientes." if migraciones else ""
+    return {
+        "mensaje": f"Restauración completada: {len(esperado)} tablas, {filas} filas{incrementales}. "
+                   f"La base reemplazada quedó como {anterior}.{actualizado}",
+        "tablas": esperado,
+        "incrementales": len(cadena),
+        "migraciones": migraciones,
+        "advertencias": avisos[:20],
+        "base_anterior": anterior,
+    }
+
+@job_handler("restauracion")
+def run_restore_job(parametros, directorio, progreso):
+    """Restaura un archivo subido o, con `respaldo_id`, una cadena completo + incrementales."""
+    if parametros.get('respaldo_id'):
+        base, *incrementales = backup_chain(parametros['respaldo_id'])
+        return restore_to_live(base['archivo'], 'custom', progreso, incrementales, progreso.job_id)
+    try:
+        return restore_to_live(parametros['archivo'], parametros['formato'], progreso, job_id=progreso.job_id)
+    finally:
+        _unlink_quietly(parametros['archivo'])
+
 @app.route('/admin/respaldo/importar', methods=['POST'])
 def importar_db():
+    """Recibe el respaldo y encola su restauración.
+
+    El archivo se guarda primero en JOBS_DIR porque la restauración corre en
+    el worker de trabajos, fuera de este request; desde ahí restore_sql_dump
+    lo envía por partes al stdin de psql (o pg_restore lo lee, si es custom).
+    """
     if not require_admin():
-        return redirect('/')
-    
+        return {"error": "Unauthorized"}, 403
+
     file = request.files.get('backup_file')
     if not file or file.filename == '':
-        flash("No se seleccionó ningún archivo", "warning")
-        return redirect(url_for('admin_respaldo'))
+        return {"error": "No se seleccionó ningún archivo"}, 400
 
-    # Credenciales desde variables de entorno
-    pg_host = os.getenv("POSTGRES_HOST", "db")
-    pg_port = os.getenv("POSTGRES_PORT", "5432")
-    pg_db = os.getenv("POSTGRES_DB", "actas_db")
-    pg_user = os.getenv("POSTGRES_USER", "postgres")
-    pg_pass = os.getenv("POSTGRES_PASSWORD", "postgres")
+    formato = detect_backup_format(file.stream)
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="restauracion_", suffix=f".{BACKUP_FORMATS[formato][1]}", dir=JOBS_DIR)
+    os.close(fd)
+    file.save(path, buffer_size=RESTORE_CHUNK_SIZE)
+    return create_job_response('restauracion', {'archivo': path, 'formato': formato, 'nombre': file.filename})
+
+# ===============================
+# Respaldos incrementales (cadena)
+# ===============================
+# Una cadena empieza con un respaldo completo (pg_dump custom) y sigue con
+# incrementales: un .zip con un CSV por tabla de las filas cuyo updated_at
+# es posterior a la marca del eslabón anterior, los id borrados desde entonces
+# (respaldo_eliminados) y un manifest.json. Los archivos quedan en BACKUP_DIR;
+# la restauración aplica el completo en staging y repite encima cada
+# incremental en orden (ver restore_to_live).
+BACKUP_DIR = os.getenv("BACKUP_DIR", os.path.join(tempfile.gettempdir(), "actas_respaldos"))
+BACKUP_CHAINS_KEEP = int(os.getenv("BACKUP_CHAINS_KEEP", 3))
+# En orden de dependencias (las FK apuntan hacia arriba)
+INCREMENTAL_TABLES = ('usuarios', 'catalogos', 'actas', 'informes', 'reportes', 'comisiones')
+
+# Marca de agua: el inicio de la transacción más antigua todavía abierta (o
+# ahora). Se toma antes de la foto del respaldo, así que cualquier escritura
+# que la foto no alcance a ver lleva un updated_at >= marca y entra en el
+# siguiente incremental; a lo sumo alguna fila se repite, y aplicarla dos
+# veces da lo mismo.
+BACKUP_WATERMARK_SQL = """
+    SELECT LEAST(clock_timestamp(), MIN(xact_start))
+    FROM pg_stat_activity
+    WHERE datname = current_database() AND xact_start IS NOT NULL AND pid <> pg_backend_pid()
+"""
+
+def last_chain_backup():
+    """Último eslabón de la cadena (completo o incremental) o None."""
+    with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("""
+            SELECT * FROM respaldos
+            WHERE archivo IS NOT NULL AND estado = 'ok'
+            ORDER BY id DESC
+            LIMIT 1
+        """)
+        return cur.fetchone()
+
+def backup_chain(respaldo_id):
+    """Eslabones desde el respaldo completo hasta `respaldo_id`, en orden."""
+    with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("""
+            WITH RECURSIVE cadena AS (
+                SELECT * FROM respaldos WHERE id = %s AND archivo IS NOT NULL
+                UNION ALL
+                SELECT r.* FROM respaldos r JOIN cadena c ON r.id = c.anterior_id
+            )
+            SELECT * FROM cadena ORDER BY id
+        """, (respaldo_id,))
+        cadena = cur.fetchall()
+    if not cadena or cadena[0]['tipo'] != 'completo' or any(r['archivo'] is None for r in cadena):
+        raise RuntimeError("La cadena de respaldos está incompleta")
+    faltantes = [r['id'] for r in cadena if not os.path.exists(r['archivo'])]
+    if faltantes:
+        raise RuntimeError(f"Faltan en disco los archivos de los respaldos {faltantes}")
+    return cadena
+
+def write_incremental_archive(path, anterior, marca, progreso):
+    """Escribe el .zip con los cambios desde `anterior['marca']` y devuelve su manifest."""
+    desde = anterior['marca']
+    _, _, pg_db = pg_cli_args()
+    manifest = {
+        "version": 1,
+        "base_id": anterior['base_id'] or anterior['id'],
+        "anterior_id": anterior['id'],
+        "desde": desde.isoformat(),
+        "marca": marca.isoformat(),
+        "tablas": {},
+        "eliminados": 0,
+    }
+    progreso(0, total=len(INCREMENTAL_TABLES) + 1)
+
+    # Una sola foto para todas las tablas
+    conn = pg_connect(pg_db)
+    conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
+    try:
+        with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as zf, conn.cursor() as cur:
+            for tabla in INCREMENTAL_TABLES:
+                cur.execute(f"SELECT * FROM {tabla} LIMIT 0")
+                columnas = [d.name for d in cur.description]
+                cur.execute(f"SELECT COUNT(*) FROM {tabla} WHERE updated_at >= %s", (desde,))
+                filas = cur.fetchone()[0]
+                copy_sql = cur.mogrify(
+                    f"COPY (SELECT * FROM {tabla} WHERE updated_at >= %s ORDER BY id) TO STDOUT WITH (FORMAT csv, HEADER)",
+                    (desde,),
+                ).decode()
+                with zf.open(f"{tabla}.csv", 'w', force_zip64=True) as salida:
+                    cur.copy_expert(copy_sql, salida)
+                manifest["tablas"][tabla] = {"columnas": columnas, "filas": filas}
+                progreso(1)
+
+            cur.execute("SELECT COUNT(*) FROM respaldo_eliminados WHERE eliminado_en >= %s", (desde,))
+            manifest["eliminados"] = cur.fetchone()[0]
+            copy_sql = cur.mogrify("""
+                COPY (SELECT tabla, id FROM respaldo_eliminados WHERE eliminado_en >= %s ORDER BY eliminado_en)
+                TO STDOUT WITH (FORMAT csv, HEADER)
+            """, (desde,)).decode()
+            with zf.open("eliminados.csv", 'w', force_zip64=True) as salida:
+                cur.copy_expert(copy_sql, salida)
+            progreso(1)
+
+            zf.writestr("manifest.json", json.dumps(manifest, indent=2))
+    finally:
+        conn.close()
+    return manifest
+
+def prune_backup_chains():
+    """Conserva sólo las últimas BACKUP_CHAINS_KEEP cadenas (archivos y bajas registradas)."""
+    with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("""
+            SELECT id, marca FROM respaldos
+            WHERE tipo = 'completo' AND archivo IS NOT NULL AND estado = 'ok'
+            ORDER BY id DESC
+            OFFSET %s LIMIT 1
+        """, (max(BACKUP_CHAINS_KEEP, 1) - 1,))
+        corte = cur.fetchone()
+        if corte is None:
+            return
+        cur.execute("""
+            UPDATE respaldos r
+            SET archivo = NULL
+            FROM (
+                SELECT id, archivo FROM respaldos
+                WHERE archivo IS NOT NULL AND COALESCE(base_id, id) < %s
+            ) v
+            WHERE r.id = v.id
+            RETURNING v.archivo
+        """, (corte['id'],))
+        vencidos = [row['archivo'] for row in cur.fetchall()]
+        # Las bajas anteriores a la cadena más vieja ya no las necesita ningún incremental
+        cur.execute("DELETE FROM respaldo_eliminados WHERE eliminado_en < %s", (corte['marca'],))
+    for path in vencidos:
+        _unlink_quietly(path)
+
+def create_chain_backup(modo, id_usuario=None, progreso=None, origen='trabajo'):
+    """Agrega un eslabón a la cadena: 'completo' (pg_dump custom) o 'incremental'."""
+    progreso = progreso or (lambda filas=0, total=None: None)
+    anterior = None
+    if modo == 'incremental':
+        anterior = last_chain_backup()
+        if anterior is None or not os.path.exists(anterior['archivo']):
+            raise RuntimeError("No hay un respaldo completo en disco; genere uno antes del incremental")
+
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(BACKUP_WATERMARK_SQL)
+        marca = cur.fetchone()[0]
+
+    os.makedirs(BACKUP_DIR, exist_ok=True)
+    _, _, pg_db = pg_cli_args()
+    sello = datetime.now().strftime('%Y%m%d_%H%M%S')
+    formato = 'custom' if modo == 'completo' else 'zip'
+    extension = 'dump' if modo == 'completo' else 'zip'
+    fd, path = tempfile.mkstemp(prefix=f"{modo}_{pg_db}_{sello}_", suffix=f".{extension}", dir=BACKUP_DIR)
+    os.close(fd)
+    inicio = time.perf_counter()
+    try:
+        if modo == 'completo':
+            cmd, env, _ = pg_dump_command('custom', verbose=True)
+            dump_to_file(cmd, env, path, progreso)
+            manifest = None
+        else:
+            manifest = write_incremental_archive(path, anterior, marca, progreso)
+    except Exception as e:
+        _unlink_quietly(path)
+        record_backup(formato, origen, 'fallido', 0, time.perf_counter() - inicio, str(e)[:2000], id_usuario,
+                      tipo=modo)
+        raise
+
+    tamano = os.path.getsize(path)
+    respaldo_id = record_backup(
+        formato, origen, 'ok', tamano, time.perf_counter() - inicio, id_usuario=id_usuario,
+        tipo=modo, archivo=path,
+        base_id=(anterior['base_id'] or anterior['id']) if anterior else None,
+        anterior_id=anterior['id'] if anterior else None,
+        desde=anterior['marca'] if anterior else None,
+        marca=marca,
+    )
+    if modo == 'completo':
+        prune_backup_chains()
+
+    if manifest:
+        cambios = sum(t["filas"] for t in manifest["tablas"].values())
+        mensaje = f"Respaldo incremental listo: {cambios} filas nuevas o modificadas y {manifest['eliminados']} eliminadas."
+    else:
+        mensaje = "Respaldo completo listo; los siguientes incrementales parten de aquí."
+    return {"mensaje": mensaje, "respaldo_id": respaldo_id, "bytes": tamano}
+
+def apply_incremental_archive(cur, path):
+    """Aplica un incremental sobre la base de `cur` (primero las bajas y luego upsert por id).
+
+    Las bajas van primero: si en el mismo intervalo se borró una fila y se
+    creó otra con la misma clave única (email, código o número del año), la
+    nueva trae otro id y chocaría con la vieja. Los id de las secuencias no
+    se reutilizan, así que ninguna baja alcanza a una fila del upsert.
+    """
+    with zipfile.ZipFile(path) as zf:
+        manifest = json.loads(zf.read("manifest.json"))
+
+        cur.execute("CREATE TEMP TABLE incremental_eliminados (tabla VARCHAR(20), id INTEGER)")
+        with zf.open("eliminados.csv") as entrada:
+            cur.copy_expert("COPY incremental_eliminados FROM STDIN WITH (FORMAT csv, HEADER)", entrada)
+        for tabla in reversed(INCREMENTAL_TABLES):
+            cur.execute(pgsql.SQL("""
+                DELETE FROM {} t USING incremental_eliminados e
+                WHERE e.tabla = %s AND t.id = e.id
+            """).format(pgsql.Identifier(tabla)), (tabla,))
+        cur.execute("DROP TABLE incremental_eliminados")
+
+        for tabla, info in manifest["tablas"].items():
+            columnas = pgsql.SQL(", ").join(map(pgsql.Identifier, info["columnas"]))
+            temporal = pgsql.Identifier(f"incremental_{tabla}")
+            cur.execute(pgsql.SQL("CREATE TEMP TABLE {} (LIKE {} INCLUDING DEFAULTS)").format(
+                temporal, pgsql.Identifier(tabla)))
+            with zf.open(f"{tabla}.csv") as entrada:
+                cur.copy_expert(pgsql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv, HEADER)").format(
+                    temporal, columnas).as_string(cur), entrada)
+            if cur.rowcount != info["filas"]:
+                raise RuntimeError(f"{os.path.basename(path)}: {tabla} trae {cur.rowcount} de {info['filas']} filas")
+            cur.execute(pgsql.SQL("""
+                INSERT INTO {tabla} ({columnas}) SELECT {columnas} FROM {temporal}
+                ON CONFLICT (id) DO UPDATE SET {asignaciones}
+            """).format(
+                tabla=pgsql.Identifier(tabla), columnas=columnas, temporal=temporal,
+                asignaciones=pgsql.SQL(", ").join(
+                    pgsql.SQL("{0} = EXCLUDED.{0}").format(pgsql.Identifier(c))
+                    for c in info["columnas"] if c != 'id'
+                ),
+            ))
+            cur.execute(pgsql.SQL("DROP TABLE {}").format(temporal))
+    return manifest
+
+def replay_incrementals(staging, cadena):
+    """Aplica los incrementales en staging y recalcula lo que mantienen los triggers."""
+    conn = pg_connect(staging)
+    try:
+        with conn, conn.cursor() as cur:
+            # Sin triggers: la numeración, el código y updated_at vienen tal cual del respaldo
+            cur.execute("SET LOCAL session_replication_role = replica")
+            for eslabon in cadena:
+                apply_incremental_archive(cur, eslabon['archivo'])
+            cur.execute("SET LOCAL session_replication_role = DEFAULT")
+
+            for tabla in INCREMENTAL_TABLES:
+                cur.execute(pgsql.SQL("SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 1)) FROM {}")
+                            .format(pgsql.Identifier(tabla)), (tabla,))
+            for tabla in EXPORT_TIPOS:
+                cur.execute("DELETE FROM doc_conteos WHERE tabla = %s", (tabla,))
+                cur.execute(pgsql.SQL("""
+                    INSERT INTO doc_conteos (tabla, empresa, id_usuario, anio, total)
+                    SELECT %s, COALESCE(empresa, ''), id_usuario, anio, COUNT(*)
+                    FROM {}
+                    GROUP BY 2, 3, 4
+                """).format(pgsql.Identifier(tabla)), (tabla,))
+            cur.execute("DELETE FROM empresas_directorio")
+            cur.execute("""
+                INSERT INTO empresas_directorio (empresa, documentos)
+                SELECT empresa, COUNT(*)
+                FROM (
+                    SELECT empresa FROM actas
+                    UNION ALL SELECT empresa FROM informes
+                    UNION ALL SELECT empresa FROM reportes
+                    UNION ALL SELECT empresa FROM comisiones
+                ) d
+                WHERE empresa IS NOT NULL AND btrim(empresa) <> ''
+                GROUP BY empresa
+            """)
+            # Contadores de numeración (la base puede venir de antes de 15_numeradores.sql)
+            cur.execute("SELECT to_regproc('numeradores_recalcular') IS NOT NULL")
+            if cur.fetchone()[0]:
+                cur.execute("SELECT numeradores_recalcular()")
+            cur.execute("UPDATE doc_modificaciones SET modificado_en = clock_timestamp()")
+            cur.execute("UPDATE catalogos_version SET version = version + 1")
+            ensure_staging_admin(cur)
+    finally:
+        conn.close()
+
+@job_handler("respaldo_cadena")
+def run_chain_backup_job(parametros, directorio, progreso):
+    return create_chain_backup(parametros['modo'], parametros.get('id_usuario'), progreso)
+
+def recent_chain_backups(limit=20):
+    """Eslabones de la cadena que siguen en disco, del más nuevo al más viejo."""
+    try:
+        with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("""
+                SELECT id, tipo, bytes, base_id, anterior_id, desde, marca, terminado_en
+                FROM respaldos
+                WHERE archivo IS NOT NULL AND estado = 'ok'
+                ORDER BY id DESC
+                LIMIT %s
+            """, (limit,))
+            return cur.fetchall()
+    except (psycopg2.errors.UndefinedTable, psycopg2.errors.UndefinedColumn):
+        return []
+
+@app.route('/admin/respaldo/cadena', methods=['POST'])
+def crear_respaldo_cadena():
+    if not require_admin():
+        return {"error": "Unauthorized"}, 403
+    datos = request.get_json(silent=True) or request.form
+    modo = (datos.get('modo') or '').strip().lower()
+    if modo not in ('completo', 'incremental'):
+        return {"error": "Modo de respaldo no válido"}, 400
+    if modo == 'incremental' and last_chain_backup() is None:
+        return {"error": "Primero genere un respaldo completo"}, 409
+    return create_job_response('respaldo_cadena', {'modo': modo, 'id_usuario': session['user_id']})
+
+@app.route('/admin/respaldo/archivo/<int:respaldo_id>')
+def descargar_respaldo(respaldo_id):
+    if not require_admin():
+        return redirect('/')
+    with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("SELECT archivo FROM respaldos WHERE id = %s", (respaldo_id,))
+        row = cur.fetchone()
+    if row is None or not row['archivo'] or not os.path.exists(row['archivo']):
+        return {"error": "El archivo ya no está disponible"}, 410
+    return send_file(row['archivo'], as_attachment=True, download_name=os.path.basename(row['archivo']),
+                     conditional=True)
+
+@app.route('/admin/respaldo/cadena/<int:respaldo_id>/restaurar', methods=['POST'])
+def restaurar_respaldo_cadena(respaldo_id):
+    if not require_admin():
+        return {"error": "Unauthorized"}, 403
+    try:
+        backup_chain(respaldo_id)
+    except RuntimeError as e:
+        return {"error": str(e)}, 409
+    return create_job_response('restauracion', {'respaldo_id': respaldo_id})
+
+@app.cli.command("respaldo")
+@click.argument("modo", type=click.Choice(['completo', 'incremental']))
+def respaldo_command(modo):
+    """Agrega un respaldo completo o incremental a la cadena (para cron)."""
+    resultado = create_chain_backup(modo, origen='cli')
+    print(f"[INFO] {resultado['mensaje']} (respaldo {resultado['respaldo_id']}, {resultado['bytes']} bytes)")
+
+@app.cli.command("restaurar")
+@click.argument("respaldo_id", type=int)
+def restaurar_command(respaldo_id):
+    """Restaura el respaldo completo de la cadena y sus incrementales hasta RESPALDO_ID."""
+    base, *incrementales = backup_chain(respaldo_id)
+    print(f"[INFO] Restaurando {os.path.basename(base['archivo'])} + {len(incrementales)} incrementales")
+    resultado = restore_to_live(base['archivo'], 'custom', lambda filas=0, total=None: None, incrementales)
+    print(f"[INFO] {resultado['mensaje']}")
+
+# ===============================
+# Migraciones de esquema
+# ===============================
+# Los archivos NN_*.sql de initdb/ son migraciones versionadas: cada una corre
+# una sola vez, en su propia transacción junto con su fila en
+# schema_migrations. Las semillas de initdb/semillas/ se cargan con COPY
+# después de las migraciones y se vuelven a cargar sólo si su archivo cambia.
+# `flask migrar` corre al arrancar web y worker: sin nada pendiente es una
+# lectura del registro y no toma el lock.
+MIGRACIONES_DIR = os.getenv("MIGRACIONES_DIR") or os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "initdb"))
+# Una base creada antes del registro ya tiene estas: se anotan sin correrlas.
+# Las demás migraciones son idempotentes y se vuelven a aplicar.
+MIGRACIONES_BASE = ("02_schema.sql", "03_catalogos.sql", "semillas/catalogos.csv")
+
+
+def migration_files():
+    """(version, ruta, checksum) de las migraciones y luego de las semillas, en orden de aplicación."""
+    archivos = []
+    for carpeta, patron in (("", r"^(\d+)_\w+\.sql$"), ("semillas", r"^()\w+\.csv$")):
+        directorio = os.path.join(MIGRACIONES_DIR, carpeta)
+        if not os.path.isdir(directorio):
+            continue
+        nombres = [(m.group(1), n) for n in os.listdir(directorio) if (m := re.match(patron, n))]
+        for _, nombre in sorted(nombres, key=lambda x: (int(x[0] or 0), x[1])):
+            ruta = os.path.join(directorio, nombre)
+            with open(ruta, 'rb') as f:
+                checksum = hashlib.sha256(f.read()).hexdigest()
+            archivos.append((f"{carpeta}/{nombre}" if carpeta else nombre, ruta, checksum))
+    return archivos
+
+
+def pending_migrations(cur, archivos):
+    """Archivos sin aplicar (o semillas modificadas). Falla si cambió una migración ya aplicada."""
+    cur.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+    if not cur.fetchone()[0]:
+        return list(archivos)
+    cur.execute("SELECT version, checksum FROM schema_migrations")
+    aplicadas = dict(cur.fetchall())
+    pendientes = []
+    for version, ruta, checksum in archivos:
+        anterior = aplicadas.get(version)
+        if anterior is None or (anterior != checksum and version in SEMILLAS):
+            pendientes.append((version, ruta, checksum))
+        elif anterior != checksum:
+            raise RuntimeError(f"La migración {version} ya aplicada fue modificada; los cambios van en un archivo nuevo")
+    return pendientes
+
+
+def load_catalog_seed(cur, ruta):
+    """Inserta las filas de la semilla que falten en catalogos (misma categoría, nombre y padre).
+
+    El padre se indica por nombre dentro de la misma categoría; cada vuelta
+    inserta un nivel del árbol, hasta que no queda nada por insertar.
+    """
+    cur.execute("""
+        CREATE TEMP TABLE semilla_catalogos (
+            linea SERIAL,
+            categoria VARCHAR(50) NOT NULL,
+            nombre VARCHAR(500) NOT NULL,
+            valor VARCHAR(500),
+            padre VARCHAR(500),
+            orden INTEGER,
+            meta_data JSONB
+        ) ON COMMIT DROP
+    """)
+    with open(ruta, encoding='utf-8') as f:
+        cur.copy_expert("""
+            COPY semilla_catalogos (categoria, nombre, valor, padre, orden, meta_data)
+            FROM STDIN WITH (FORMAT csv, HEADER true)
+        """, f)
+    insertadas = 0
+    while True:
+        cur.execute("""
+            INSERT INTO catalogos (categoria, nombre, valor, padre_id, orden, meta_data)
+            SELECT s.categoria, s.nombre, s.valor, p.id, s.orden, s.meta_data
+            FROM semilla_catalogos s
+            LEFT JOIN catalogos p ON p.categoria = s.categoria AND p.nombre = s.padre
+            WHERE (s.padre IS NULL) = (p.id IS NULL)
+              AND NOT EXISTS (
+                  SELECT 1 FROM catalogos c
+                  WHERE c.categoria = s.categoria AND c.nombre = s.nombre
+                    AND c.padre_id IS NOT DISTINCT FROM p.id
+              )
+            ORDER BY s.linea
+        """)
+        if not cur.rowcount:
+            return insertadas
+        insertadas += cur.rowcount
+
+
+SEMILLAS = {
+    "semillas/catalogos.csv": load_catalog_seed,
+}
+
+
+def apply_migration(conn, version, ruta, checksum):
+    """Corre un archivo y lo anota en schema_migrations, todo en una transacción."""
+    inicio = time.perf_counter()
+    try:
+        with conn.cursor() as cur:
+            if version in SEMILLAS:
+                SEMILLAS[version](cur, ruta)
+            elif version.startswith("semillas/"):
+                raise RuntimeError(f"No hay cargador para la semilla {version}")
+            else:
+                with open(ruta, encoding='utf-8') as f:
+                    cur.execute(f.read())
+            duracion_ms = int((time.perf_counter() - inicio) * 1000)
+            cur.execute("""
+                INSERT INTO schema_migrations (version, checksum, duracion_ms)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (version) DO UPDATE
+                SET checksum = EXCLUDED.checksum, aplicada_en = NOW(), duracion_ms = EXCLUDED.duracion_ms
+            """, (version, checksum, duracion_ms))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return duracion_ms
 
-    env = os.environ.copy()
-    env["PGPASSWORD"] = pg_pass
 
+def run_migrations(informar=print, dsn=None):
+    """Aplica las migraciones y semillas pendientes; devuelve las versiones aplicadas.
+
+    `dsn` apunta a otra base (p. ej. la de staging de una restauración); por
+    defecto, la de la app.
+    """
+    archivos = migration_files()
+    conn = psycopg2.connect(dsn or DATABASE_URL)
     try:
-        # Guardar en archivo temporal
-        with tempfile.NamedTemporaryFile(suffix=".sql", delete=False) as tf:
-            file.save(tf)
-            tf_path = tf.name
-
-        # Para asegurar una restauración limpia, primero vaciamos el esquema public.
-        # Esto soluciona los errores de "relation already exists".
-        # ADVERTENCIA: Esto borra TODO en el esquema public antes de restaurar.
-        try:
-            with get_conn() as conn, conn.cursor() as cur:
-                cur.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public;")
-                conn.commit()
-                print("[INFO] Esquema public limpiado para restauración.")
-        except Exception as e:
-            print(f"[ERROR] No se pudo limpiar el esquema public: {e}")
-            # Continuamos de todos modos, psql intentará lo mejor posible (especialmente con dumps --clean)
-
-        # Ejecutar psql
-        process = subprocess.run(
-            ["psql", "-h", pg_host, "-p", pg_port, "-U", pg_user, "-d", pg_db, "-f", tf_path],
-            env=env,
-            capture_output=True,
-            text=True
-        )
-        
-        # El psql puede fallar en algunos comandos (como SET transaction_timeout)
-        # pero aun así restaurar la mayoría de los datos.
-        
-        os.remove(tf_path)
-        
-        if process.returncode == 0:
-            flash("Copia seguridad importada correctamente.", "success")
-        else:
-            # Si hay errores, los mostramos pero a menudo la base se restaura parcialmente
-            error_msg = process.stderr
-            print(f"[DEBUG] psql output: {process.stdout}")
-            print(f"[DEBUG] psql errors: {error_msg}")
-            
-            if "already exists" in error_msg or "violates unique constraint" in error_msg:
-                flash("La restauración terminó con algunas advertencias (objetos duplicados). Verifica los datos.", "warning")
-            else:
-                flash(f"Error al importar archivo SQL: {error_msg[:200]}...", "danger")
-            
-    except Exception as e:
-        flash(f"Error en el proceso de importación: {str(e)}", "danger")
+        with conn.cursor() as cur:
+            pendientes = pending_migrations(cur, archivos)
+        conn.rollback()
+        if not pendientes:
+            return []
+
+        # Web y worker arrancan a la vez: el segundo espera aquí y, al entrar,
+        # vuelve a leer el registro (normalmente ya no le queda nada)
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock(hashtext('schema_migrations'))")
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version TEXT PRIMARY KEY,
+                    checksum TEXT NOT NULL,
+                    aplicada_en TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    duracion_ms INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            cur.execute("""
+                SELECT NOT EXISTS (SELECT 1 FROM schema_migrations)
+                       AND to_regclass('usuarios') IS NOT NULL
+            """)
+            if cur.fetchone()[0]:
+                base = [(v, c) for v, _, c in archivos if v in MIGRACIONES_BASE]
+                execute_values(cur, "INSERT INTO schema_migrations (version, checksum) VALUES %s", base)
+                informar(f"[INFO] Base existente sin registro: se anotan {', '.join(v for v, _ in base)}")
+            conn.commit()
+            pendientes = pending_migrations(cur, archivos)
+        conn.commit()
 
-    return redirect(url_for('admin_respaldo'))
+        aplicadas = []
+        for version, ruta, checksum in pendientes:
+            try:
+                duracion_ms = apply_migration(conn, version, ruta, checksum)
+            except Exception as e:
+                raise RuntimeError(f"Falló la migración {version}: {e}") from e
+            informar(f"[INFO] Migración {version} aplicada en {duracion_ms} ms")
+            aplicadas.append(version)
+        return aplicadas
+    finally:
+        conn.close()
+
+@app.cli.command("migrar")
+def migrar_command():
+    """Aplica las migraciones de initdb/ y las semillas pendientes (no hace nada si está al día)."""
+    inicio = time.perf_counter()
+    try:
+        aplicadas = run_migrations()
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    estado = f"{len(aplicadas)} aplicadas" if aplicadas else "al día"
+    print(f"[INFO] Esquema {estado} ({(time.perf_counter() - inicio) * 1000:.0f} ms)")
 
 @app.route('/api/catalogos/<categoria>', methods=['GET'])
 def api_get_catalogos(categoria):
@@ -709,17 +3298,9 @@ def api_get_catalogos(categoria):
     
     # Si piden jerarquía completa
     if categoria == 'TIPO_INFORME_TREE':
-        return {"data": get_jerarquia_informes()}
+        return app.response_class(get_jerarquia_informes_api_json(), mimetype='application/json')
 
-    with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
-        cur.execute("""
-            SELECT id, categoria, nombre, valor, padre_id, activo, orden, meta_data 
-            FROM catalogos 
-            WHERE categoria = %s 
-            ORDER BY orden ASC
-        """, (categoria,))
-        data = cur.fetchall()
-    return {"data": data}
+    return {"data": get_catalogo(categoria, incluir_inactivos=True)}
 
 @app.route('/api/catalogos', methods=['POST'])
 def api_create_catalogo():
@@ -729,32 +3310,12 @@ def api_create_catalogo():
     data = request.json
     try:
         with get_conn() as conn, conn.cursor() as cur:
-            # Clean data
-            padre_id = data.get('padre_id')
-            if padre_id == "":
-                padre_id = None
-            
-            orden = data.get('orden', 0)
-            try:
-                orden = int(orden)
-            except:
-                orden = 0
-
-            cur.execute("""
-                INSERT INTO catalogos (categoria, nombre, valor, padre_id, orden, meta_data)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                RETURNING id
-            """, (
-                data.get('categoria'),
-                data.get('nombre'),
-                data.get('valor'),
-                padre_id, 
-                orden,
-                json.dumps(data.get('meta_data')) if data.get('meta_data') else None
-            ))
-            new_id = cur.fetchone()[0]
+            ids = apply_catalog_operations(cur, [{**data, 'op': 'crear', 'ref': 'nuevo'}])
             conn.commit()
-        return {"success": True, "id": new_id}
+        invalidate_catalog_cache()
+        return {"success": True, "id": ids['nuevo']}
+    except ValueError as e:
+        return {"error": str(e)}, 400
     except Exception as e:
         print(f"Error al crear catálogo: {e}")
         return {"error": str(e)}, 500
@@ -764,35 +3325,16 @@ def api_update_catalogo(id):
     if not require_admin():
         return {"error": "Unauthorized"}, 403
     
-    data = request.json
+    # PUT reemplaza el item completo: lo que no venga vuelve a su valor por defecto
+    data = {'valor': None, 'padre_id': None, 'orden': 0, 'activo': True, 'meta_data': None, **request.json}
     try:
         with get_conn() as conn, conn.cursor() as cur:
-            # Clean data
-            padre_id = data.get('padre_id')
-            if padre_id == "":
-                padre_id = None
-            
-            orden = data.get('orden', 0)
-            try:
-                orden = int(orden)
-            except:
-                orden = 0
-
-            cur.execute("""
-                UPDATE catalogos 
-                SET nombre=%s, valor=%s, padre_id=%s, orden=%s, activo=%s, meta_data=%s
-                WHERE id=%s
-            """, (
-                data.get('nombre'),
-                data.get('valor'),
-                padre_id,
-                orden,
-                data.get('activo', True),
-                json.dumps(data.get('meta_data')) if data.get('meta_data') else None,
-                id
-            ))
+            apply_catalog_operations(cur, [{**data, 'op': 'actualizar', 'id': id}], ignorar_faltantes=True)
             conn.commit()
+        invalidate_catalog_cache()
         return {"success": True}
+    except ValueError as e:
+        return {"error": str(e)}, 400
     except Exception as e:
         print(f"Error al actualizar catálogo: {e}")
         return {"error": str(e)}, 500
@@ -804,16 +3346,400 @@ def api_delete_catalogo(id):
     
     try:
         with get_conn() as conn, conn.cursor() as cur:
-            cur.execute("DELETE FROM catalogos WHERE id=%s", (id,))
+            apply_catalog_operations(cur, [{'op': 'eliminar', 'id': id}], ignorar_faltantes=True)
             conn.commit()
+        invalidate_catalog_cache()
         return {"success": True}
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    except Exception as e:
+        return {"error": str(e)}, 500
+
+# ===============================
+# Catálogos: operaciones por lote
+# ===============================
+# POST /api/catalogos/lote recibe una lista de operaciones y las aplica en una
+# sola transacción con unas pocas sentencias por conjunto (un INSERT, un
+# UPDATE y un DELETE), en lugar de una petición y un COMMIT por item. Los
+# endpoints individuales de arriba son un lote de una operación.
+#
+#   {"op": "crear", "ref": "g1", "categoria": ..., "nombre": ..., "padre_id": ...}
+#   {"op": "actualizar", "id": 12, "nombre": ..., "activo": false}   (sólo los campos enviados)
+#   {"op": "eliminar", "ids": [3, 4]}                                (los hijos caen en cascada)
+#   {"op": "ordenar", "ids": [7, 5, 6]}                              (orden = 10, 20, 30...)
+#   {"op": "mover", "id": 9, "padre_id": 2}                          (el subárbol va con él)
+#
+# Un id puede ser el `ref` de un item creado en el mismo lote, así que una
+# categoría nueva con su jerarquía entra en una sola petición. Las operaciones
+# se agrupan por tipo (altas, cambios, bajas); si un mismo item se cambia dos
+# veces, gana lo último.
+CATALOGO_OPERACIONES = ('crear', 'actualizar', 'eliminar', 'ordenar', 'mover')
+CATALOGO_ORDEN_PASO = 10
+
+def catalog_item_fields(data):
+    """Campos presentes en `data`, limpiados como siempre lo hicieron los endpoints."""
+    campos = {}
+    for clave in ('nombre', 'valor', 'padre_id', 'activo'):
+        if clave in data:
+            campos[clave] = data[clave]
+    if campos.get('padre_id') == "":
+        campos['padre_id'] = None
+    if 'orden' in data:
+        try:
+            campos['orden'] = int(data['orden'])
+        except (TypeError, ValueError):
+            campos['orden'] = 0
+    if 'meta_data' in data:
+        campos['meta_data'] = data['meta_data'] or None
+    return campos
+
+def apply_catalog_operations(cur, operaciones, ignorar_faltantes=False):
+    """Aplica el lote en la transacción de `cur`. Devuelve {ref: id} de los creados.
+
+    Una operación inválida, un id inexistente, un ciclo en padre_id o un padre de
+    otra categoría levantan ValueError; quien llama revierte la transacción.
+    Con `ignorar_faltantes`, actualizar o eliminar un id inexistente no hace
+    nada (como siempre respondieron PUT y DELETE /api/catalogos/<id>).
+    """
+    if not isinstance(operaciones, list) or not operaciones:
+        raise ValueError("Se espera una lista de operaciones")
+    for i, op in enumerate(operaciones):
+        if not isinstance(op, dict) or op.get('op') not in CATALOGO_OPERACIONES:
+            raise ValueError(f"Operación {i}: 'op' debe ser uno de {', '.join(CATALOGO_OPERACIONES)}")
+
+    # Los creados reciben su id antes de insertar para que el resto del lote los pueda nombrar
+    creaciones = [op for op in operaciones if op['op'] == 'crear']
+    refs = {}
+    if creaciones:
+        cur.execute("SELECT nextval(pg_get_serial_sequence('catalogos', 'id')) FROM generate_series(1, %s)",
+                    (len(creaciones),))
+        ids_creados = [r[0] for r in cur.fetchall()]
+        for op, nuevo_id in zip(creaciones, ids_creados):
+            if op.get('ref') is not None:
+                refs[str(op['ref'])] = nuevo_id
+        ids_creados = iter(ids_creados)
+
+    def resolver(valor, i):
+        if valor is None or valor == "":
+            return None
+        if isinstance(valor, str) and valor in refs:
+            return refs[valor]
+        try:
+            return int(valor)
+        except (TypeError, ValueError):
+            raise ValueError(f"Operación {i}: id inválido {valor!r}")
+
+    nuevos, cambios, eliminar = [], {}, set()
+    for i, op in enumerate(operaciones):
+        tipo = op['op']
+        if tipo == 'crear':
+            campos = catalog_item_fields(op)
+            if not op.get('categoria') or not campos.get('nombre'):
+                raise ValueError(f"Operación {i}: 'categoria' y 'nombre' son obligatorios")
+            nuevos.append((
+                next(ids_creados), op['categoria'], campos['nombre'], campos.get('valor'),
+                resolver(campos.get('padre_id'), i), campos.get('activo', True), campos.get('orden', 0),
+                json.dumps(campos['meta_data']) if campos.get('meta_data') else None,
+            ))
+        elif tipo == 'actualizar':
+            campos = catalog_item_fields(op)
+            if 'padre_id' in campos:
+                campos['padre_id'] = resolver(campos['padre_id'], i)
+            if 'nombre' in campos and not campos['nombre']:
+                raise ValueError(f"Operación {i}: 'nombre' no puede quedar vacío")
+            cambios.setdefault(resolver(op.get('id'), i), {}).update(campos)
+        elif tipo == 'mover':
+            cambios.setdefault(resolver(op.get('id'), i), {})['padre_id'] = resolver(op.get('padre_id'), i)
+        elif tipo == 'ordenar':
+            for pos, item in enumerate(op.get('ids') or []):
+                cambios.setdefault(resolver(item, i), {})['orden'] = (pos + 1) * CATALOGO_ORDEN_PASO
+        else:
+            ids = op.get('ids') if 'ids' in op else [op.get('id')]
+            eliminar.update(resolver(item, i) for item in ids)
+    cambios.pop(None, None)
+    eliminar.discard(None)
+
+    if nuevos:
+        # Una sola sentencia: la FK de padre_id se verifica al final, así que un
+        # hijo puede venir antes que el padre creado en el mismo lote
+        execute_values(cur, """
+            INSERT INTO catalogos (id, categoria, nombre, valor, padre_id, activo, orden, meta_data)
+            VALUES %s
+        """, nuevos, template="(%s, %s, %s, %s, %s, %s, %s, %s::jsonb)", page_size=len(nuevos))
+
+    if cambios:
+        # Un solo UPDATE; cada fila trae sólo las claves que se cambian
+        cur.execute("""
+            UPDATE catalogos c SET
+                nombre = CASE WHEN u.d ? 'nombre' THEN u.d->>'nombre' ELSE c.nombre END,
+                valor = CASE WHEN u.d ? 'valor' THEN u.d->>'valor' ELSE c.valor END,
+                padre_id = CASE WHEN u.d ? 'padre_id' THEN (u.d->>'padre_id')::int ELSE c.padre_id END,
+                orden = CASE WHEN u.d ? 'orden' THEN (u.d->>'orden')::int ELSE c.orden END,
+                activo = CASE WHEN u.d ? 'activo' THEN (u.d->>'activo')::boolean ELSE c.activo END,
+                meta_data = CASE WHEN u.d ? 'meta_data' THEN NULLIF(u.d->'meta_data', 'null'::jsonb)
+                                 ELSE c.meta_data END
+            FROM jsonb_array_elements(%s::jsonb) AS u(d)
+            WHERE c.id = (u.d->>'id')::int
+            RETURNING c.id
+        """, (json.dumps([{'id': id_, **campos} for id_, campos in cambios.items()]),))
+        faltantes = set(cambios) - {r[0] for r in cur.fetchall()}
+        if faltantes and not ignorar_faltantes:
+            raise ValueError(f"No existen los items {sorted(faltantes)}")
+
+    if eliminar:
+        cur.execute("SELECT id FROM catalogos WHERE id = ANY(%s)", (list(eliminar),))
+        faltantes = eliminar - {r[0] for r in cur.fetchall()}
+        if faltantes and not ignorar_faltantes:
+            raise ValueError(f"No existen los items {sorted(faltantes)}")
+        cur.execute("DELETE FROM catalogos WHERE id = ANY(%s)", (list(eliminar),))
+
+    # La jerarquía sigue siendo un árbol dentro de cada categoría
+    reubicados = [n[0] for n in nuevos if n[4] is not None]
+    reubicados += [id_ for id_, campos in cambios.items() if campos.get('padre_id') is not None]
+    if reubicados:
+        cur.execute("""
+            SELECT c.id FROM catalogos c JOIN catalogos p ON p.id = c.padre_id
+            WHERE c.id = ANY(%s) AND p.categoria <> c.categoria
+            LIMIT 1
+        """, (reubicados,))
+        row = cur.fetchone()
+        if row:
+            raise ValueError(f"El padre del item {row[0]} es de otra categoría")
+        cur.execute("""
+            WITH RECURSIVE ancestros (origen, id, nivel) AS (
+                SELECT c.id, c.padre_id, 1 FROM catalogos c
+                WHERE c.id = ANY(%s) AND c.padre_id IS NOT NULL
+                UNION ALL
+                SELECT a.origen, c.padre_id, a.nivel + 1
+                FROM ancestros a JOIN catalogos c ON c.id = a.id
+                WHERE c.padre_id IS NOT NULL AND a.id <> a.origen AND a.nivel < 100
+            )
+            SELECT origen FROM ancestros WHERE id = origen LIMIT 1
+        """, (reubicados,))
+        row = cur.fetchone()
+        if row:
+            raise ValueError(f"El item {row[0]} quedaría dentro de su propio subárbol")
+
+    return refs
+
+@app.route('/api/catalogos/lote', methods=['POST'])
+def api_lote_catalogos():
+    if not require_admin():
+        return {"error": "Unauthorized"}, 403
+
+    data = request.get_json(silent=True)
+    operaciones = data.get('operaciones') if isinstance(data, dict) else data
+    try:
+        with get_conn() as conn, conn.cursor() as cur:
+            ids = apply_catalog_operations(cur, operaciones)
+            cur.execute("SELECT version FROM catalogos_version WHERE id = 1")
+            version = cur.fetchone()[0]
+            conn.commit()
+    except ValueError as e:
+        return {"error": str(e)}, 400
     except Exception as e:
+        print(f"Error en lote de catálogos: {e}")
         return {"error": str(e)}, 500
+    invalidate_catalog_cache(version)
+    return {"success": True, "version": version, "ids": ids, "operaciones": len(operaciones)}
 
 # ===============================
 # Creación de documentos
 # ===============================
 
+def html_correo_documento(tipo, codigo, empresa, asunto, observaciones, fecha, hora_local, funcionario,
+                          tipo_informe="", tipo_reporte="",
+                          gestiones_db=None, productos_asociados_db=None,
+                          gestiones_reporte_db=None, productos_asociados_reporte_db=None,
+                          caso_tipo_db=None, fecha_interrupcion_db=None, nombre_alimentador_db=None,
+                          alimentador_subestacion_db=None, linea_subtransmision_nombre_db=None):
+    """HTML del correo de notificación de un documento recién creado."""
+    # Construir HTML mejorado con tabla
+    html = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <style>
+            body {{ font-family: Arial, sans-serif; color: #333; }}
+            .container {{ max-width: 800px; margin: 0 auto; padding: 20px; }}
+            .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 20px; border-radius: 8px 8px 0 0; }}
+            .header h2 {{ margin: 0; font-size: 24px; }}
+            .content {{ background: #f9f9f9; padding: 20px; border-radius: 0 0 8px 8px; }}
+            .info-table {{ width: 100%; border-collapse: collapse; margin-top: 15px; background: white; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}
+            .info-table th {{ background: #4a5568; color: white; padding: 12px; text-align: left; font-weight: 600; }}
+            .info-table td {{ padding: 12px; border-bottom: 1px solid #e2e8f0; }}
+            .info-table tr:last-child td {{ border-bottom: none; }}
+            .info-table tr:nth-child(even) {{ background: #f7fafc; }}
+            .label {{ font-weight: 600; color: #4a5568; width: 200px; }}
+            .section-title {{ background: #edf2f7; padding: 10px; margin-top: 20px; font-weight: 700; color: #2d3748; border-left: 4px solid #667eea; }}
+            .footer {{ margin-top: 20px; padding: 15px; background: #edf2f7; border-radius: 8px; font-size: 12px; color: #718096; text-align: center; }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h2>✓ Nuevo {tipo.capitalize()} Registrado</h2>
+            </div>
+            <div class="content">
+                <table class="info-table">
+                    <tr>
+                        <td class="label">Código</td>
+                        <td><strong style="color: #667eea; font-size: 16px;">{codigo}</strong></td>
+                    </tr>
+                    <tr>
+                        <td class="label">Empresa</td>
+                        <td>{empresa}</td>
+                    </tr>
+    """
+
+    # Campos específicos según tipo de documento
+    if tipo == "informes":
+        html += f"""
+                    <tr>
+                        <td class="label">Tipo de Informe</td>
+                        <td>{tipo_informe}</td>
+                    </tr>
+                    <tr>
+                        <td class="label">Gestiones</td>
+                        <td>{gestiones_db or 'N/A'}</td>
+                    </tr>
+                    <tr>
+                        <td class="label">Productos Asociados</td>
+                        <td>{productos_asociados_db or 'N/A'}</td>
+                    </tr>
+        """
+
+    elif tipo == "reportes":
+        html += f"""
+                    <tr>
+                        <td class="label">Tipo de Reporte</td>
+                        <td>{tipo_reporte}</td>
+                    </tr>
+                    <tr>
+                        <td class="label">Gestiones</td>
+                        <td>{gestiones_reporte_db or 'N/A'}</td>
+                    </tr>
+                    <tr>
+                        <td class="label">Productos Asociados</td>
+                        <td>{productos_asociados_reporte_db or 'N/A'}</td>
+                    </tr>
+        """
+
+    elif tipo in ["actas", "comisiones"]:
+        html += f"""
+                    <tr>
+                        <td class="label">Gestiones</td>
+                        <td>{gestiones_db or 'N/A'}</td>
+                    </tr>
+                    <tr>
+                        <td class="label">Productos Asociados</td>
+                        <td>{productos_asociados_db or 'N/A'}</td>
+                    </tr>
+        """
+
+    # Campos comunes
+    html += f"""
+                    <tr>
+                        <td class="label">Asunto</td>
+                        <td>{asunto}</td>
+                    </tr>
+                    <tr>
+                        <td class="label">Observaciones</td>
+                        <td>{observaciones if observaciones else 'N/A'}</td>
+                    </tr>
+                    <tr>
+                        <td class="label">Fecha de Registro</td>
+                        <td>{fecha}</td>
+                    </tr>
+                    <tr>
+                        <td class="label">Hora de Registro</td>
+                        <td>{hora_local}</td>
+                    </tr>
+                    <tr>
+                        <td class="label">Funcionario</td>
+                        <td>{funcionario}</td>
+                    </tr>
+                </table>
+    """
+
+    # Caso Fortuito (solo para informes)
+    if tipo == "informes" and "caso fortuito" in tipo_informe.lower():
+        html += f"""
+                <div class="section-title">📋 Detalles de Caso Fortuito</div>
+                <table class="info-table">
+                    <tr>
+                        <td class="label">Tipo</td>
+                        <td>{caso_tipo_db or 'N/A'}</td>
+                    </tr>
+                    <tr>
+                        <td class="label">Fecha de Interrupción</td>
+                        <td>{fecha_interrupcion_db or 'N/A'}</td>
+                    </tr>
+        """
+
+        if caso_tipo_db == "ALIMENTADOR":
+            html += f"""
+                    <tr>
+                        <td class="label">Alimentador</td>
+                        <td>{nombre_alimentador_db or 'N/A'}</td>
+                    </tr>
+                    <tr>
+                        <td class="label">Subestación</td>
+                        <td>{alimentador_subestacion_db or 'N/A'}</td>
+                    </tr>
+            """
+        elif caso_tipo_db == "LINEAS DE SUBTRANSMISION":
+            html += f"""
+                    <tr>
+                        <td class="label">Línea de Subtransmisión</td>
+                        <td>{linea_subtransmision_nombre_db or 'N/A'}</td>
+                    </tr>
+            """
+
+        html += """
+                </table>
+        """
+
+    html += """
+                <div class="footer">
+                    Este es un correo automático generado por el Sistema de Gestión de Documentos DTCD.<br>
+                    Por favor no responder a este correo.
+                </div>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+    return html
+
+
+# ===============================
+# Numeración de documentos
+# ===============================
+# El número anual lo asigna el trigger generar_numero_anual desde el contador
+# doc_numeradores (initdb/15_numeradores.sql) dentro de la misma transacción
+# del INSERT; si el formulario trae numero_manual se respeta tal cual.
+
+def reserve_doc_numbers(cur, tabla, anio, cantidad):
+    """Reserva `cantidad` números consecutivos de (tabla, anio) para una carga
+    por lote y devuelve el range. Los INSERT deben llevar esos números
+    explícitos; si la transacción se revierte, el bloque se libera."""
+    cur.execute("SELECT reservar_numeros(%s, %s, %s)", (tabla, anio, cantidad))
+    primero = cur.fetchone()[0]
+    return range(primero, primero + cantidad)
+
+
+@app.errorhandler(psycopg2.errors.UniqueViolation)
+def numero_duplicado(e):
+    # Sólo un número manual ya usado llega aquí; el resto sigue como error
+    restriccion = e.diag.constraint_name or ""
+    if not restriccion.endswith(("_numero_anio_key", "_codigo_key")):
+        raise e
+    flash("Ese número ya está registrado para el año. Usa otro o deja el campo vacío para asignarlo automáticamente.", "warning")
+    return redirect(request.url)
+
+
 @app.route('/crear/<tipo>', methods=['GET', 'POST'])
 def crear(tipo):
     if not require_login():
@@ -851,7 +3777,7 @@ def crear(tipo):
     if tipo == 'informes':
         gestiones = get_catalogo('GESTION_INFORME')
         productos = get_catalogo('PRODUCTO_INFORME')
-        report_types_json = get_jerarquia_informes()
+        report_types_json = get_jerarquia_informes_html()
 
 
         
@@ -1109,11 +4035,7 @@ def crear(tipo):
                         fecha_interrupcion
                     )
                     VALUES (
-                        COALESCE(%s, (
-                            SELECT COALESCE(MAX(numero), 0) + 1
-                            FROM informes
-                            WHERE anio = %s
-                        )),
+                        %s,
                         %s, %s, %s,
                         %s, %s,
                         %s, %s, %s, %s, %s,
@@ -1123,7 +4045,6 @@ def crear(tipo):
                 """, (
                     numero_manual,
                     anio,
-                    anio,
                     empresa,
                     tipo_informe,
 
@@ -1161,11 +4082,7 @@ def crear(tipo):
                         hora
                     )
                     VALUES (
-                        COALESCE(%s, (
-                            SELECT COALESCE(MAX(numero), 0) + 1
-                            FROM reportes
-                            WHERE anio = %s
-                        )),
+                        %s,
                         %s, %s,
                         %s, %s,
                         %s, %s, %s, %s, %s, %s
@@ -1174,7 +4091,6 @@ def crear(tipo):
                 """, (
                     numero_manual,
                     anio,
-                    anio,
                     empresa,
 
                     gestiones_reporte_db,
@@ -1204,18 +4120,13 @@ def crear(tipo):
                         productos_asociados
                     )
                     VALUES (
-                        COALESCE(%s, (
-                            SELECT COALESCE(MAX(numero), 0) + 1
-                            FROM {tabla}
-                            WHERE anio = %s
-                        )),
+                        %s,
                         %s, %s, %s, %s, %s, %s, %s, %s, %s
                     )
                     RETURNING id, numero, anio
                 """, (
                     numero_manual,
                     anio,
-                    anio,
                     empresa,
                     asunto,
                     observaciones,
@@ -1234,191 +4145,31 @@ def crear(tipo):
             )
             email_usuario = cur.fetchone()[0]
 
-            conn.commit()
-
-        hora_local = hora.strftime("%H:%M:%S")
-
-        # ===============================
-        # Prefijos / Código
-        # ===============================
-        prefijos = {
-            "informes": "INF.DTCD",
-            "actas": "ACTAS.DTCD",
-            "reportes": "REP.DTCD",
-            "comisiones": "CMS.DTCD"
-        }
-        prefijo = prefijos.get(tipo, tipo.upper())
-        codigo = f"{prefijo}.{anio}.{str(numero).zfill(3)}"
-
-        # ===============================
-        # Correo
-        # ===============================
-        try:
-            # Construir HTML mejorado con tabla
-            html = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <style>
-                    body {{ font-family: Arial, sans-serif; color: #333; }}
-                    .container {{ max-width: 800px; margin: 0 auto; padding: 20px; }}
-                    .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 20px; border-radius: 8px 8px 0 0; }}
-                    .header h2 {{ margin: 0; font-size: 24px; }}
-                    .content {{ background: #f9f9f9; padding: 20px; border-radius: 0 0 8px 8px; }}
-                    .info-table {{ width: 100%; border-collapse: collapse; margin-top: 15px; background: white; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}
-                    .info-table th {{ background: #4a5568; color: white; padding: 12px; text-align: left; font-weight: 600; }}
-                    .info-table td {{ padding: 12px; border-bottom: 1px solid #e2e8f0; }}
-                    .info-table tr:last-child td {{ border-bottom: none; }}
-                    .info-table tr:nth-child(even) {{ background: #f7fafc; }}
-                    .label {{ font-weight: 600; color: #4a5568; width: 200px; }}
-                    .section-title {{ background: #edf2f7; padding: 10px; margin-top: 20px; font-weight: 700; color: #2d3748; border-left: 4px solid #667eea; }}
-                    .footer {{ margin-top: 20px; padding: 15px; background: #edf2f7; border-radius: 8px; font-size: 12px; color: #718096; text-align: center; }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="header">
-                        <h2>✓ Nuevo {tipo.capitalize()} Registrado</h2>
-                    </div>
-                    <div class="content">
-                        <table class="info-table">
-                            <tr>
-                                <td class="label">Código</td>
-                                <td><strong style="color: #667eea; font-size: 16px;">{codigo}</strong></td>
-                            </tr>
-                            <tr>
-                                <td class="label">Empresa</td>
-                                <td>{empresa}</td>
-                            </tr>
-            """
-            
-            # Campos específicos según tipo de documento
-            if tipo == "informes":
-                html += f"""
-                            <tr>
-                                <td class="label">Tipo de Informe</td>
-                                <td>{tipo_informe}</td>
-                            </tr>
-                            <tr>
-                                <td class="label">Gestiones</td>
-                                <td>{gestiones_db or 'N/A'}</td>
-                            </tr>
-                            <tr>
-                                <td class="label">Productos Asociados</td>
-                                <td>{productos_asociados_db or 'N/A'}</td>
-                            </tr>
-                """
-            
-            elif tipo == "reportes":
-                html += f"""
-                            <tr>
-                                <td class="label">Tipo de Reporte</td>
-                                <td>{tipo_reporte}</td>
-                            </tr>
-                            <tr>
-                                <td class="label">Gestiones</td>
-                                <td>{gestiones_reporte_db or 'N/A'}</td>
-                            </tr>
-                            <tr>
-                                <td class="label">Productos Asociados</td>
-                                <td>{productos_asociados_reporte_db or 'N/A'}</td>
-                            </tr>
-                """
-            
-            elif tipo in ["actas", "comisiones"]:
-                html += f"""
-                            <tr>
-                                <td class="label">Gestiones</td>
-                                <td>{gestiones_db or 'N/A'}</td>
-                            </tr>
-                            <tr>
-                                <td class="label">Productos Asociados</td>
-                                <td>{productos_asociados_db or 'N/A'}</td>
-                            </tr>
-                """
-            
-            # Campos comunes
-            html += f"""
-                            <tr>
-                                <td class="label">Asunto</td>
-                                <td>{asunto}</td>
-                            </tr>
-                            <tr>
-                                <td class="label">Observaciones</td>
-                                <td>{observaciones if observaciones else 'N/A'}</td>
-                            </tr>
-                            <tr>
-                                <td class="label">Fecha de Registro</td>
-                                <td>{fecha}</td>
-                            </tr>
-                            <tr>
-                                <td class="label">Hora de Registro</td>
-                                <td>{hora_local}</td>
-                            </tr>
-                            <tr>
-                                <td class="label">Funcionario</td>
-                                <td>{session['nombre']}</td>
-                            </tr>
-                        </table>
-            """
-            
-            # Caso Fortuito (solo para informes)
-            if tipo == "informes" and "caso fortuito" in tipo_informe.lower():
-                html += f"""
-                        <div class="section-title">📋 Detalles de Caso Fortuito</div>
-                        <table class="info-table">
-                            <tr>
-                                <td class="label">Tipo</td>
-                                <td>{caso_tipo_db or 'N/A'}</td>
-                            </tr>
-                            <tr>
-                                <td class="label">Fecha de Interrupción</td>
-                                <td>{fecha_interrupcion_db or 'N/A'}</td>
-                            </tr>
-                """
-                
-                if caso_tipo_db == "ALIMENTADOR":
-                    html += f"""
-                            <tr>
-                                <td class="label">Alimentador</td>
-                                <td>{nombre_alimentador_db or 'N/A'}</td>
-                            </tr>
-                            <tr>
-                                <td class="label">Subestación</td>
-                                <td>{alimentador_subestacion_db or 'N/A'}</td>
-                            </tr>
-                    """
-                elif caso_tipo_db == "LINEAS DE SUBTRANSMISION":
-                    html += f"""
-                            <tr>
-                                <td class="label">Línea de Subtransmisión</td>
-                                <td>{linea_subtransmision_nombre_db or 'N/A'}</td>
-                            </tr>
-                    """
-                
-                html += """
-                        </table>
-                """
-            
-            html += """
-                        <div class="footer">
-                            Este es un correo automático generado por el Sistema de Gestión de Documentos DTCD.<br>
-                            Por favor no responder a este correo.
-                        </div>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
+            hora_local = hora.strftime("%H:%M:%S")
+            codigo = format_doc_code(tipo, numero, anio)
 
-            send_email(
-                email_usuario,
-                f"{codigo} creado",
-                html
+            # ===============================
+            # Correo (se encola en la misma transacción; lo envía el worker del outbox)
+            # ===============================
+            html = html_correo_documento(
+                tipo, codigo, empresa, asunto, observaciones, fecha, hora_local, session['nombre'],
+                tipo_informe=tipo_informe,
+                tipo_reporte=tipo_reporte,
+                gestiones_db=gestiones_db,
+                productos_asociados_db=productos_asociados_db,
+                gestiones_reporte_db=gestiones_reporte_db,
+                productos_asociados_reporte_db=productos_asociados_reporte_db,
+                caso_tipo_db=caso_tipo_db,
+                fecha_interrupcion_db=fecha_interrupcion_db,
+                nombre_alimentador_db=nombre_alimentador_db,
+                alimentador_subestacion_db=alimentador_subestacion_db,
+                linea_subtransmision_nombre_db=linea_subtransmision_nombre_db
             )
-        except Exception as e:
-            print("Error al enviar correo:", e)
+            enqueue_email(cur, email_usuario, f"{codigo} creado", html)
+            publish_invalidation(cur, "exportaciones", tipo)
+
+            conn.commit()
+        wake_outbox_worker()
 
         # ===============================
         # Toast
@@ -1482,18 +4233,69 @@ def admin():
     return render_template('admin.html', usuarios=usuarios)
 
 
+DOC_PREFIJOS = {
+    "informes": "INF.DTCD",
+    "actas": "ACTAS.DTCD",
+    "reportes": "REP.DTCD",
+    "comisiones": "CMS.DTCD"
+}
+
 def format_doc_code(tipo, numero, anio):
-    prefijos = {
-        "informes": "INF.DTCD",
-        "actas": "ACTAS.DTCD",
-        "reportes": "REP.DTCD",
-        "comisiones": "CMS.DTCD"
-    }
-    prefijo = prefijos.get(tipo, tipo.upper())
+    prefijo = DOC_PREFIJOS.get(tipo, tipo.upper())
     return f"{prefijo}.{anio}.{str(numero).zfill(3)}"
 
-def get_paginated_docs(tabla, empresa=None, user_id=None, page=1, per_page=10):
-    """Auxiliar para obtener documentos paginados y filtrados."""
+# ===============================
+# Conteo de documentos
+# ===============================
+# doc_conteos guarda cuántos documentos hay por (tabla, empresa, id_usuario,
+# anio) y lo mantienen triggers (initdb/08_doc_conteos.sql). Los filtros sobre
+# esas columnas se responden sumando unas pocas filas; cualquier otro filtro
+# cae al COUNT(*) exacto.
+DOC_COUNT_FILTERS = {'empresa', 'id_usuario', 'anio'}
+_doc_counts_available = None
+
+def filtro_sql(col, valor):
+    """`col = %s`, o `col = ANY(%s)` si el valor es una lista."""
+    return f"{col} = ANY(%s)" if isinstance(valor, list) else f"{col} = %s"
+
+def count_docs(conn, tabla, filtros=None):
+    """Total de documentos de `tabla` que cumplen `filtros` ({columna: valor o lista de valores})."""
+    global _doc_counts_available
+    filtros = filtros or {}
+    with conn.cursor() as cur:
+        if _doc_counts_available is None:
+            cur.execute("SELECT to_regclass('doc_conteos') IS NOT NULL")
+            _doc_counts_available = cur.fetchone()[0]
+
+        if _doc_counts_available and set(filtros) <= DOC_COUNT_FILTERS:
+            where_sql = " AND ".join(["tabla = %s"] + [filtro_sql(col, v) for col, v in filtros.items()])
+            cur.execute(f"SELECT COALESCE(SUM(total), 0) FROM doc_conteos WHERE {where_sql}",
+                        [tabla] + list(filtros.values()))
+        else:
+            where_sql = " AND ".join(filtro_sql(col, v) for col, v in filtros.items())
+            cur.execute(f"SELECT COUNT(*) FROM {tabla} {'WHERE ' + where_sql if where_sql else ''}",
+                        list(filtros.values()))
+        return int(cur.fetchone()[0])
+
+def parse_doc_cursor(token):
+    """'2025.123' -> (2025, 123); None si el token no es válido."""
+    try:
+        anio, numero = (token or "").split(".", 1)
+        return int(anio), int(numero)
+    except ValueError:
+        return None
+
+def doc_cursor(row):
+    return f"{row['anio']}.{row['numero']}"
+
+def get_paginated_docs(tabla, empresa=None, user_id=None, page=1, per_page=10, after=None, before=None):
+    """Auxiliar para obtener documentos paginados y filtrados.
+
+    Con `after`/`before` (cursor 'anio.numero') pagina por keyset sobre
+    (anio, numero): el costo no depende de la profundidad de la página. Sin
+    cursor usa LIMIT/OFFSET con `page`. Devuelve (rows, total, pages, nav),
+    donde nav = {'next': cursor|None, 'prev': cursor|None}.
+    """
     
     # Handle 'all' per_page
     if per_page == 'all':
@@ -1510,14 +4312,19 @@ def get_paginated_docs(tabla, empresa=None, user_id=None, page=1, per_page=10):
 
     where_parts = []
     params = []
+    filtros = {}
 
     if empresa:
-        where_parts.append("empresa = %s")
-        params.append(empresa)
+        # Una empresa puede estar escrita de varias formas; se filtra por todas
+        variantes = list(empresa) if isinstance(empresa, (list, tuple)) else [empresa]
+        where_parts.append("empresa = ANY(%s)")
+        params.append(variantes)
+        filtros['empresa'] = variantes
     
     if user_id:
         where_parts.append("id_usuario = %s")
         params.append(user_id)
+        filtros['id_usuario'] = user_id
 
     where_sql = ""
     if where_parts:
@@ -1541,68 +4348,148 @@ def get_paginated_docs(tabla, empresa=None, user_id=None, page=1, per_page=10):
             t.asunto, t.observaciones, t.fecha, TO_CHAR(t.hora, 'HH24:MI:SS') as hora
         """
 
+    # Keyset: se pide una fila extra para saber si hay más páginas en esa dirección
+    seek = None
+    if per_page != 'all':
+        if after and parse_doc_cursor(after):
+            seek = ('after', parse_doc_cursor(after))
+        elif before and parse_doc_cursor(before):
+            seek = ('before', parse_doc_cursor(before))
+
     with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
         # 1. Total count
-        cur.execute(f"SELECT COUNT(*) FROM {tabla} {where_sql}", params)
-        total = cur.fetchone()['count']
+        total = count_docs(conn, tabla, filtros)
 
         # 2. Data
-        cur.execute(f"""
-            SELECT {cols}, u.nombre as funcionario
-            FROM {tabla} t
-            JOIN usuarios u ON u.id = t.id_usuario
-            {where_sql}
-            ORDER BY t.anio DESC, t.numero DESC
-            LIMIT %s OFFSET %s
-        """, params + [limit, offset])
+        if seek:
+            direction, key = seek
+            seek_sql = "(t.anio, t.numero) < (%s, %s)" if direction == 'after' else "(t.anio, t.numero) > (%s, %s)"
+            order_sql = "t.anio DESC, t.numero DESC" if direction == 'after' else "t.anio ASC, t.numero ASC"
+            cur.execute(f"""
+                SELECT {cols}, u.nombre as funcionario
+                FROM {tabla} t
+                JOIN usuarios u ON u.id = t.id_usuario
+                {where_sql + " AND" if where_sql else "WHERE"} {seek_sql}
+                ORDER BY {order_sql}
+                LIMIT %s
+            """, params + list(key) + [limit + 1])
+        else:
+            cur.execute(f"""
+                SELECT {cols}, u.nombre as funcionario
+                FROM {tabla} t
+                JOIN usuarios u ON u.id = t.id_usuario
+                {where_sql}
+                ORDER BY t.anio DESC, t.numero DESC
+                LIMIT %s OFFSET %s
+            """, params + [limit, offset])
         rows = cur.fetchall()
 
     if per_page == 'all':
         pages = 1
     else:
         pages = (total + per_page - 1) // per_page
-    return rows, total, pages
 
-@app.route('/admin/documentos')
-def admin_documentos():
-    if not require_admin():
-        return redirect('/')
+    nav = {'next': None, 'prev': None}
+    if seek:
+        direction, _ = seek
+        hay_mas = len(rows) > limit
+        rows = rows[:limit]
+        if direction == 'before':
+            rows.reverse()
+        if rows:
+            # Si llegamos por 'after' hay filas antes; si por 'before', hay filas después
+            if direction == 'after':
+                nav['prev'] = doc_cursor(rows[0])
+                nav['next'] = doc_cursor(rows[-1]) if hay_mas else None
+            else:
+                nav['prev'] = doc_cursor(rows[0]) if hay_mas else None
+                nav['next'] = doc_cursor(rows[-1])
+    elif rows and per_page != 'all':
+        nav['prev'] = doc_cursor(rows[0]) if page > 1 else None
+        nav['next'] = doc_cursor(rows[-1]) if page < pages else None
+
+    return rows, total, pages, nav
+
+def cursor_args(tabla, active_tab):
+    """Cursor keyset del request; sólo aplica a la pestaña activa."""
+    if tabla != active_tab:
+        return {}
+    return {
+        'after': request.args.get('after', '').strip() or None,
+        'before': request.args.get('before', '').strip() or None,
+    }
+
+DOC_TABS = ['actas', 'informes', 'reportes', 'comisiones']
+
+def fmt_docs(docs, tipo):
+    res = []
+    for d in docs:
+        codigo = format_doc_code(tipo, d['numero'], d['anio'])
+        if tipo == 'informes':
+            res.append((d['id'], codigo, d['empresa'], d['gestiones'], d['productos_asociados'], d['tipo_informe'], d['caso_tipo'], d['nombre_alimentador'], d['alimentador_subestacion'], d['linea_subtransmision_nombre'], d['fecha_interrupcion'], d['asunto'], d['observaciones'], d['fecha'], d['hora'], d['funcionario']))
+        elif tipo == 'reportes':
+            res.append((d['id'], codigo, d['empresa'], d['gestiones'], d['productos_asociados'], d['tipo_reporte'], d['asunto'], d['observaciones'], d['fecha'], d['hora'], d['funcionario']))
+        else:
+            res.append((d['id'], codigo, d['empresa'], d['gestiones'], d['productos_asociados'], d['asunto'], d['observaciones'], d['fecha'], d['hora'], d['funcionario']))
+    return res
 
+def listing_args(active_tab=None):
+    """Lee page/per_page/empresa/tab del query string de los listados."""
     per_page = request.args.get('per_page', '10')
     page = request.args.get('page', 1, type=int)
     if page < 1: page = 1
     empresa_filtro = request.args.get('empresa', '').strip()
-    active_tab = request.args.get('tab', 'actas')
+    if active_tab is None:
+        active_tab = request.args.get('tab', 'actas')
+    if active_tab not in DOC_TABS:
+        active_tab = 'actas'
+    return page, per_page, empresa_filtro, active_tab
+
+def load_docs_tab(tipo, empresa_filtro, user_id, page, per_page):
+    """Datos de una pestaña de listado (lo que consumen los templates *_documentos_tab.html)."""
+    empresa = empresa_variantes(empresa_filtro) if empresa_filtro else None
+    rows, total, pages, nav = get_paginated_docs(tipo, empresa, user_id=user_id, page=page, per_page=per_page, **cursor_args(tipo, tipo))
+    return {
+        'tipo': tipo,
+        'docs': fmt_docs(rows, tipo),
+        'total': total,
+        'pages': pages,
+        'nav': nav,
+    }
 
-    actas_raw, total_a, pages_a = get_paginated_docs('actas', empresa_filtro, page=page, per_page=per_page)
-    informes_raw, total_i, pages_i = get_paginated_docs('informes', empresa_filtro, page=page, per_page=per_page)
-    reportes_raw, total_r, pages_r = get_paginated_docs('reportes', empresa_filtro, page=page, per_page=per_page)
-    comisiones_raw, total_c, pages_c = get_paginated_docs('comisiones', empresa_filtro, page=page, per_page=per_page)
+@app.route('/admin/documentos')
+def admin_documentos():
+    if not require_admin():
+        return redirect('/')
 
-    def fmt_docs(docs, tipo):
-        res = []
-        for d in docs:
-            codigo = format_doc_code(tipo, d['numero'], d['anio'])
-            if tipo == 'informes':
-                res.append((d['id'], codigo, d['empresa'], d['gestiones'], d['productos_asociados'], d['tipo_informe'], d['caso_tipo'], d['nombre_alimentador'], d['alimentador_subestacion'], d['linea_subtransmision_nombre'], d['fecha_interrupcion'], d['asunto'], d['observaciones'], d['fecha'], d['hora'], d['funcionario']))
-            elif tipo == 'reportes':
-                res.append((d['id'], codigo, d['empresa'], d['gestiones'], d['productos_asociados'], d['tipo_reporte'], d['asunto'], d['observaciones'], d['fecha'], d['hora'], d['funcionario']))
-            else:
-                res.append((d['id'], codigo, d['empresa'], d['gestiones'], d['productos_asociados'], d['asunto'], d['observaciones'], d['fecha'], d['hora'], d['funcionario']))
-        return res
+    page, per_page, empresa_filtro, active_tab = listing_args()
 
+    # Sólo la pestaña activa se consulta aquí; las demás las pide el navegador
+    # a admin_documentos_tab cuando el usuario las abre.
     return render_template(
         'admin_documentos.html',
-        actas=fmt_docs(actas_raw, 'actas'),
-        informes=fmt_docs(informes_raw, 'informes'),
-        reportes=fmt_docs(reportes_raw, 'reportes'),
-        comisiones=fmt_docs(comisiones_raw, 'comisiones'),
         page=page,
         per_page=per_page,
-        pages_a=pages_a, pages_i=pages_i, pages_r=pages_r, pages_c=pages_c,
         empresas=get_all_companies(),
         empresa_sel=empresa_filtro,
-        active_tab=active_tab
+        active_tab=active_tab,
+        **load_docs_tab(active_tab, empresa_filtro, None, page, per_page)
+    )
+
+@app.route('/admin/documentos/tab/<tipo>')
+def admin_documentos_tab(tipo):
+    if not require_admin():
+        return "No autorizado", 403
+    if tipo not in DOC_TABS:
+        return "Tipo de documento inválido", 404
+
+    page, per_page, empresa_filtro, _ = listing_args(tipo)
+    return render_template(
+        'admin_documentos_tab.html',
+        page=page,
+        per_page=per_page,
+        empresa_sel=empresa_filtro,
+        **load_docs_tab(tipo, empresa_filtro, None, page, per_page)
     )
 
 @app.route('/admin/editar/<tipo>/<int:id>', methods=['GET', 'POST'])
@@ -1643,7 +4530,7 @@ def editar_documento(tipo, id):
     if tipo == 'informes':
         gestiones = get_catalogo('GESTION_INFORME')
         productos = get_catalogo('PRODUCTO_INFORME')
-        report_types_json = get_jerarquia_informes()
+        report_types_json = get_jerarquia_informes_html()
     elif tipo == 'reportes':
         gestiones = get_catalogo('GESTION_REPORTE')
         productos = get_catalogo('PRODUCTO_REPORTE')
@@ -1892,6 +4779,7 @@ def editar_documento(tipo, id):
                         fecha_interrupcion=%s
                     WHERE id=%s
                 """, (
+                    numero_manual,
                     empresa,
                     tipo_informe,
 
@@ -1953,6 +4841,7 @@ def editar_documento(tipo, id):
                     id
                 ))
 
+            publish_invalidation(cur, "exportaciones", tabla)
             conn.commit()
 
         flash(f"{tipo.capitalize()} actualizado correctamente.", "success")
@@ -2123,11 +5012,451 @@ def eliminar_documento(tipo, id):
 
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute(f"DELETE FROM {tipo} WHERE id = %s", (id,))
+        publish_invalidation(cur, "exportaciones", tipo)
         conn.commit()
 
     flash("Documento eliminado correctamente.", "danger")
     return redirect('/admin/documentos')
 
+# ===============================
+# Importación masiva de documentos
+# ===============================
+# Carga documentos históricos desde un .xlsx o .csv con las mismas columnas
+# que produce exportar_documentos. Corre como trabajo en segundo plano: todas
+# las filas se leen y validan en memoria (catálogos de la instantánea y
+# funcionarios en un diccionario) y sólo si ninguna tiene errores se abre la
+# transacción. Los números se reservan por bloque y por año, las filas entran
+# con COPY en lotes de IMPORT_BATCH_SIZE y los totales los ajustan los
+# triggers por sentencia (initdb/18_importacion_masiva.sql). Es todo o nada:
+# con una fila mala no se importa ninguna y el resultado lista los errores.
+# No se envían correos.
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 5000))
+IMPORT_MAX_ERRORES = 200
+IMPORT_FORMATOS = ('.xlsx', '.csv')
+
+# Columnas de datos de cada tipo (además de código, fecha, hora y funcionario)
+IMPORT_COLUMNAS = {
+    'actas': ('empresa', 'gestiones', 'productos_asociados', 'asunto', 'observaciones'),
+    'comisiones': ('empresa', 'gestiones', 'productos_asociados', 'asunto', 'observaciones'),
+    'informes': ('empresa', 'tipo_informe', 'gestiones', 'productos_asociados',
+                 'caso_tipo', 'nombre_alimentador', 'alimentador_subestacion',
+                 'linea_subtransmision_nombre', 'fecha_interrupcion', 'asunto', 'observaciones'),
+    'reportes': ('empresa', 'gestiones', 'productos_asociados', 'tipo_reporte', 'asunto', 'observaciones'),
+}
+
+# Catálogo contra el que se valida cada columna; las mismas reglas que /crear
+IMPORT_CATALOGOS = {
+    'actas': {'empresa': 'EMPRESA', 'gestiones': 'GESTION_ACTA', 'productos_asociados': 'PRODUCTO_ACTA'},
+    'comisiones': {'empresa': 'EMPRESA', 'gestiones': 'GESTION_COMISION', 'productos_asociados': 'PRODUCTO_COMISION'},
+    'informes': {'empresa': 'EMPRESA', 'tipo_informe': 'TIPO_INFORME', 'gestiones': 'GESTION_INFORME',
+                 'productos_asociados': 'PRODUCTO_INFORME'},
+    'reportes': {'empresa': 'EMPRESA', 'tipo_reporte': 'TIPO_REPORTE', 'gestiones': 'GESTION_REPORTE',
+                 'productos_asociados': 'PRODUCTO_REPORTE'},
+}
+
+IMPORT_OBLIGATORIAS = {
+    'actas': ('asunto', 'empresa', 'gestiones', 'productos_asociados'),
+    'comisiones': ('asunto', 'empresa', 'gestiones', 'productos_asociados'),
+    'informes': ('asunto', 'empresa', 'tipo_informe', 'gestiones', 'productos_asociados'),
+    'reportes': ('asunto', 'empresa', 'tipo_reporte', 'gestiones', 'productos_asociados'),
+}
+
+CASOS_FORTUITOS = ('ALIMENTADOR', 'LINEAS DE SUBTRANSMISION')
+
+def import_header_map():
+    """{clave del encabezado: columna}; acepta el nombre en español o el de la base."""
+    mapa = {empresa_clave(nombre): col for col, nombre in EXPORT_COLUMN_NAMES.items()}
+    mapa.update({empresa_clave(col): col for col in EXPORT_COLUMN_NAMES})
+    return mapa
+
+def import_cell(valor):
+    """Texto de una celda: None -> '', los enteros que Excel guarda como float sin '.0'."""
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    if isinstance(valor, str):
+        return valor.strip()
+    return valor
+
+def read_import_rows(path, tipo):
+    """(encabezados, filas) del archivo; cada fila es (número de fila en el archivo, valores)."""
+    if path.endswith('.xlsx'):
+        import openpyxl
+        libro = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            # Un consolidado trae una hoja por tipo; si no, la primera
+            hoja = next((h for h in libro.worksheets if empresa_clave(h.title) == tipo), libro.worksheets[0])
+            filas = hoja.iter_rows(values_only=True)
+            encabezados = [import_cell(v) for v in next(filas, ())]
+            datos = [(n, [import_cell(v) for v in fila]) for n, fila in enumerate(filas, start=2)]
+        finally:
+            libro.close()
+        return encabezados, datos
+
+    for encoding in ('utf-8-sig', 'cp1252'):
+        try:
+            with open(path, newline='', encoding=encoding) as f:
+                muestra = f.read(64 * 1024)
+                f.seek(0)
+                try:
+                    dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+                except csv.Error:
+                    dialecto = csv.excel
+                lector = csv.reader(f, dialecto)
+                encabezados = [v.strip() for v in next(lector, ())]
+                datos = [(n, [v.strip() for v in fila]) for n, fila in enumerate(lector, start=2)]
+            return encabezados, datos
+        except UnicodeDecodeError:
+            continue
+    raise ValueError("No se pudo leer el CSV: guárdelo con codificación UTF-8")
+
+def import_catalog_lookup(categoria):
+    """{clave: valor guardado} de una categoría, incluidas las opciones inactivas.
+
+    TIPO_INFORME es un árbol y se guarda como la ruta "nivel1 - nivel2 - nivel3":
+    se indexan todas las rutas posibles.
+    """
+    items = get_catalogo(categoria, incluir_inactivos=True)
+    if categoria != 'TIPO_INFORME':
+        opciones = {}
+        for item in items:
+            valor = item['valor'] or item['nombre']
+            opciones.setdefault(empresa_clave(valor), valor)
+            opciones.setdefault(empresa_clave(item['nombre']), valor)
+        return opciones
+
+    por_id = {item['id']: item for item in items}
+    opciones = {}
+    for item in items:
+        ruta, nodo, vistos = [], item, set()
+        while nodo is not None and nodo['id'] not in vistos:
+            vistos.add(nodo['id'])
+            ruta.append(nodo['valor'] or nodo['nombre'])
+            nodo = por_id.get(nodo['padre_id'])
+        valor = " - ".join(reversed(ruta))
+        opciones.setdefault(empresa_clave(valor), valor)
+    return opciones
+
+def import_users():
+    """{clave de nombre o email: id}; un nombre repetido entre usuarios queda como None (ambiguo)."""
+    usuarios = {}
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("SELECT id, nombre, email FROM usuarios")
+        for id_usuario, nombre, email in cur.fetchall():
+            clave = empresa_clave(nombre)
+            usuarios[clave] = None if clave in usuarios and usuarios[clave] != id_usuario else id_usuario
+            if email:
+                usuarios[email.strip().lower()] = id_usuario
+    return usuarios
+
+def import_column_lengths(tipo):
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT column_name, character_maximum_length
+            FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = %s
+              AND character_maximum_length IS NOT NULL
+        """, (tipo,))
+        return dict(cur.fetchall())
+
+def parse_import_date(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if hasattr(valor, 'year'):
+        return valor
+    for formato in ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y-%m-%d %H:%M:%S'):
+        try:
+            return datetime.strptime(str(valor), formato).date()
+        except ValueError:
+            pass
+    raise ValueError(f"fecha inválida '{valor}' (use AAAA-MM-DD o DD/MM/AAAA)")
+
+def parse_import_time(valor):
+    if hasattr(valor, 'hour'):
+        return valor.strftime('%H:%M:%S')
+    for formato in ('%H:%M', '%H:%M:%S'):
+        try:
+            return datetime.strptime(str(valor), formato).strftime('%H:%M:%S')
+        except ValueError:
+            pass
+    raise ValueError(f"hora inválida '{valor}' (use HH:MM)")
+
+def parse_import_code(tipo, codigo):
+    """(anio, numero) de un código como el de la exportación (PREFIJO.AAAA.NNN) o el guardado (PREFIJO.NNN.AAAA)."""
+    prefijo = re.escape(DOC_PREFIJOS[tipo])
+    m = re.fullmatch(rf'{prefijo}\.(\d{{4}})\.(\d+)', codigo, re.IGNORECASE)
+    if m:
+        return int(m.group(1)), int(m.group(2))
+    m = re.fullmatch(rf'{prefijo}\.(\d+)\.(\d{{4}})', codigo, re.IGNORECASE)
+    if m:
+        return int(m.group(2)), int(m.group(1))
+    raise ValueError(f"código inválido '{codigo}' (se espera {DOC_PREFIJOS[tipo]}.AAAA.NNN)")
+
+def validate_import_rows(tipo, encabezados, filas, id_usuario, estricto=False):
+    """Valida y normaliza las filas. Devuelve (documentos, errores, columnas_ignoradas).
+
+    Cada documento es un dict con fila, anio, numero (None si se asigna),
+    id_usuario, fecha, hora y las columnas de IMPORT_COLUMNAS[tipo].
+    """
+    columnas_tipo = IMPORT_COLUMNAS[tipo]
+    mapa = import_header_map()
+    posiciones, ignoradas = {}, []
+    for i, encabezado in enumerate(encabezados):
+        col = mapa.get(empresa_clave(str(encabezado)))
+        if col in columnas_tipo or col in ('codigo', 'fecha', 'hora', 'funcionario'):
+            posiciones.setdefault(col, i)
+        elif encabezado != '':
+            ignoradas.append(str(encabezado))
+    faltantes = [EXPORT_COLUMN_NAMES[c] for c in ('asunto', 'empresa') if c not in posiciones]
+    if faltantes:
+        raise ValueError(f"Faltan columnas en el archivo: {', '.join(faltantes)}")
+
+    # Empresas, fechas y catálogos se repiten mucho entre filas: cada valor se normaliza una vez
+    clave = functools.lru_cache(maxsize=None)(empresa_clave)
+    fecha_de = functools.lru_cache(maxsize=None)(parse_import_date)
+    hora_de = functools.lru_cache(maxsize=None)(parse_import_time)
+
+    catalogos = {col: import_catalog_lookup(cat) for col, cat in IMPORT_CATALOGOS[tipo].items()}
+    longitudes = import_column_lengths(tipo)
+    usuarios = import_users() if 'funcionario' in posiciones else {}
+    casos = {empresa_clave(c): c for c in CASOS_FORTUITOS}
+    ahora = datetime.now(pytz.timezone(APP_TZ))
+
+    documentos, errores, codigos = [], [], {}
+    for n, valores in filas:
+        valores = list(valores) + [''] * (len(encabezados) - len(valores))
+        if all(v == '' for v in valores):
+            continue
+        fila = {col: valores[i] for col, i in posiciones.items()}
+        problemas = []
+        doc = {'fila': n, 'anio': None, 'numero': None, 'id_usuario': id_usuario}
+
+        for col in columnas_tipo:
+            valor = fila.get(col, '')
+            doc[col] = valor if col == 'fecha_interrupcion' or valor == '' else str(valor)
+
+        for col, opciones in catalogos.items():
+            valor = doc[col]
+            if not valor:
+                continue
+            k = clave(valor)
+            if k == 'otros':
+                problemas.append(f"{EXPORT_COLUMN_NAMES[col]}: especifique el valor en lugar de 'Otros'")
+            elif k in opciones:
+                doc[col] = opciones[k]
+            elif estricto:
+                problemas.append(f"{EXPORT_COLUMN_NAMES[col]}: '{valor}' no está en el catálogo")
+
+        for col in IMPORT_OBLIGATORIAS[tipo]:
+            if not doc[col]:
+                problemas.append(f"{EXPORT_COLUMN_NAMES[col]} es obligatorio")
+
+        # Casos fortuitos: mismas reglas que el formulario
+        if tipo == 'informes':
+            if "caso fortuito" in (doc['tipo_informe'] or '').lower():
+                caso = casos.get(clave(doc['caso_tipo']))
+                doc['caso_tipo'] = caso
+                if caso is None:
+                    problemas.append(f"{EXPORT_COLUMN_NAMES['caso_tipo']} debe ser ALIMENTADOR o LINEAS DE SUBTRANSMISION")
+                elif caso == 'ALIMENTADOR':
+                    if not doc['nombre_alimentador'] or not doc['alimentador_subestacion']:
+                        problemas.append("En 'ALIMENTADOR' faltan el nombre del alimentador o la subestación")
+                    doc['linea_subtransmision_nombre'] = ''
+                else:
+                    if not doc['linea_subtransmision_nombre']:
+                        problemas.append("En 'LINEAS DE SUBTRANSMISION' falta el nombre de la línea")
+                    doc['nombre_alimentador'] = doc['alimentador_subestacion'] = ''
+                if doc['fecha_interrupcion'] == '':
+                    problemas.append(f"{EXPORT_COLUMN_NAMES['fecha_interrupcion']} es obligatoria en 'Caso Fortuito'")
+            else:
+                for col in ('caso_tipo', 'nombre_alimentador', 'alimentador_subestacion',
+                            'linea_subtransmision_nombre', 'fecha_interrupcion'):
+                    doc[col] = ''
+            if doc['fecha_interrupcion'] != '':
+                try:
+                    doc['fecha_interrupcion'] = fecha_de(doc['fecha_interrupcion'])
+                except ValueError as e:
+                    problemas.append(f"{EXPORT_COLUMN_NAMES['fecha_interrupcion']}: {e}")
+
+        for col in columnas_tipo:
+            limite = longitudes.get(col)
+            if limite and isinstance(doc[col], str) and len(doc[col]) > limite:
+                problemas.append(f"{EXPORT_COLUMN_NAMES[col]} supera los {limite} caracteres")
+
+        # Fecha y hora de registro: si faltan, las de ahora (como en /crear)
+        try:
+            doc['fecha'] = fecha_de(fila['fecha']) if fila.get('fecha', '') != '' else ahora.date()
+            doc['anio'] = doc['fecha'].year
+        except ValueError as e:
+            problemas.append(f"{EXPORT_COLUMN_NAMES['fecha']}: {e}")
+        try:
+            doc['hora'] = hora_de(fila['hora']) if fila.get('hora', '') != '' else ahora.strftime('%H:%M:%S')
+        except ValueError as e:
+            problemas.append(f"{EXPORT_COLUMN_NAMES['hora']}: {e}")
+
+        funcionario = str(fila.get('funcionario', ''))
+        if funcionario:
+            k = funcionario.lower() if '@' in funcionario else clave(funcionario)
+            if k not in usuarios:
+                problemas.append(f"Funcionario '{funcionario}' no existe")
+            elif usuarios[k] is None:
+                problemas.append(f"Funcionario '{funcionario}' es ambiguo (use el email)")
+            else:
+                doc['id_usuario'] = usuarios[k]
+
+        codigo = str(fila.get('codigo', ''))
+        if codigo:
+            try:
+                doc['anio'], doc['numero'] = parse_import_code(tipo, codigo)
+                if doc['numero'] < 1:
+                    raise ValueError(f"número inválido en '{codigo}'")
+            except ValueError as e:
+                problemas.append(f"{EXPORT_COLUMN_NAMES['codigo']}: {e}")
+            else:
+                previa = codigos.setdefault((doc['anio'], doc['numero']), n)
+                if previa != n:
+                    problemas.append(f"El código {codigo} ya aparece en la fila {previa}")
+
+        if problemas:
+            errores.append({"fila": n, "error": "; ".join(problemas)})
+        else:
+            documentos.append(doc)
+
+    return documentos, errores, ignoradas
+
+def import_result(tipo, total, importados, errores, ignoradas):
+    if errores:
+        mensaje = (f"No se importó ningún documento: {len(errores)} de {total} filas tienen errores. "
+                   "Corríjalas y vuelva a subir el archivo.")
+    else:
+        mensaje = f"Se importaron {importados} {tipo}."
+    if ignoradas:
+        mensaje += f" Columnas ignoradas: {', '.join(ignoradas)}."
+    return {
+        "mensaje": mensaje,
+        "importados": importados,
+        "filas": total,
+        "total_errores": len(errores),
+        "errores": sorted(errores, key=lambda e: e['fila'])[:IMPORT_MAX_ERRORES],
+    }
+
+def copy_documents(cur, tipo, documentos, progreso=None):
+    """COPY de los documentos (ya numerados) en lotes de IMPORT_BATCH_SIZE."""
+    columnas = ('numero', 'anio', 'id_usuario', 'fecha', 'hora') + IMPORT_COLUMNAS[tipo]
+    sentencia = pgsql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+        pgsql.Identifier(tipo), pgsql.SQL(", ").join(map(pgsql.Identifier, columnas))
+    ).as_string(cur)
+    for inicio in range(0, len(documentos), IMPORT_BATCH_SIZE):
+        lote = documentos[inicio:inicio + IMPORT_BATCH_SIZE]
+        buf = io.StringIO()
+        escritor = csv.writer(buf)
+        # Los vacíos van sin comillas: COPY los guarda como NULL
+        escritor.writerows([doc[c] for c in columnas] for doc in lote)
+        buf.seek(0)
+        try:
+            cur.copy_expert(sentencia, buf)
+        except psycopg2.Error as e:
+            m = re.search(r'line (\d+)', (e.diag.context or ''))
+            if m is None:
+                raise
+            doc = lote[int(m.group(1)) - 1]
+            return {"fila": doc['fila'], "error": (e.diag.message_primary or str(e)).strip()}
+        if progreso:
+            progreso(len(lote))
+    return None
+
+def import_documents(tipo, path, id_usuario, estricto=False, progreso=None):
+    encabezados, filas = read_import_rows(path, tipo)
+    if not encabezados:
+        raise ValueError("El archivo está vacío")
+    documentos, errores, ignoradas = validate_import_rows(tipo, encabezados, filas, id_usuario, estricto)
+    total = len(documentos) + len(errores)
+    if progreso:
+        progreso(0, total=total)
+
+    with get_conn() as conn, conn.cursor() as cur:
+        # Los números manuales adelantan el contador antes de nada: desde aquí
+        # ningún documento creado en paralelo puede tomarlos.
+        maximos = {}
+        for doc in documentos:
+            if doc['numero'] is not None:
+                maximos[doc['anio']] = max(maximos.get(doc['anio'], 0), doc['numero'])
+        for anio, numero in maximos.items():
+            cur.execute("SELECT numerador_avanzar(%s, %s, %s)", (tipo, anio, numero))
+
+        explicitos = [doc for doc in documentos if doc['numero'] is not None]
+        if explicitos:
+            cur.execute(pgsql.SQL("""
+                SELECT d.anio, d.numero
+                FROM {} d
+                JOIN unnest(%s::int[], %s::int[]) AS u(anio, numero) USING (anio, numero)
+            """).format(pgsql.Identifier(tipo)),
+                ([d['anio'] for d in explicitos], [d['numero'] for d in explicitos]))
+            existentes = set(cur.fetchall())
+            for doc in explicitos:
+                if (doc['anio'], doc['numero']) in existentes:
+                    errores.append({"fila": doc['fila'], "error": "Ese código ya está registrado"})
+
+        if errores:
+            conn.rollback()
+            return import_result(tipo, total, 0, errores, ignoradas)
+
+        # Un bloque de números por año para las filas sin código, en el orden del archivo
+        sin_numero = {}
+        for doc in documentos:
+            if doc['numero'] is None:
+                sin_numero.setdefault(doc['anio'], []).append(doc)
+        for anio, docs in sin_numero.items():
+            for doc, numero in zip(docs, reserve_doc_numbers(cur, tipo, anio, len(docs))):
+                doc['numero'] = numero
+
+        error = copy_documents(cur, tipo, documentos, progreso)
+        if error:
+            conn.rollback()
+            return import_result(tipo, total, 0, [error], ignoradas)
+
+        publish_invalidation(cur, "exportaciones", tipo)
+        conn.commit()
+    return import_result(tipo, total, len(documentos), [], ignoradas)
+
+@job_handler("importacion")
+def run_import_job(parametros, directorio, progreso):
+    try:
+        return import_documents(parametros['tipo'], parametros['archivo'], parametros['id_usuario'],
+                                parametros.get('estricto', False), progreso)
+    finally:
+        _unlink_quietly(parametros['archivo'])
+
+@app.route('/admin/documentos/importar/<tipo>', methods=['POST'])
+def importar_documentos(tipo):
+    """Recibe el archivo y encola su importación."""
+    if not require_admin():
+        return {"error": "Unauthorized"}, 403
+
+    tipo = (tipo or "").lower()
+    if tipo not in EXPORT_TIPOS:
+        return {"error": "Tipo de documento inválido."}, 400
+
+    file = request.files.get('archivo')
+    if not file or file.filename == '':
+        return {"error": "No se seleccionó ningún archivo"}, 400
+    extension = os.path.splitext(file.filename)[1].lower()
+    if extension not in IMPORT_FORMATOS:
+        return {"error": "El archivo debe ser .xlsx o .csv"}, 400
+
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="importacion_", suffix=extension, dir=JOBS_DIR)
+    os.close(fd)
+    file.save(path)
+    return create_job_response('importacion', {
+        'tipo': tipo,
+        'archivo': path,
+        'nombre': file.filename,
+        'id_usuario': session['user_id'],
+        'estricto': request.form.get('estricto') == '1',
+    })
+
 # ===============================
 # CRUD usuarios (admin)
 # ===============================
@@ -2185,7 +5514,7 @@ def editar_usuario(id):
             # Validar email único (que no sea de otro usuario)
             cur.execute("""
                 SELECT 1 FROM usuarios
-                WHERE email=%s AND id<>%s
+                WHERE LOWER(email)=%s AND id<>%s
             """, (email, id))
             if cur.fetchone():
                 flash("Ese correo ya está registrado en otro usuario.", "warning")
@@ -2194,17 +5523,19 @@ def editar_usuario(id):
             if password:
                 cur.execute("""
                     UPDATE usuarios
-                    SET nombre=%s, email=%s, rol=%s, password=%s
+                    SET nombre=%s, email=%s, rol=%s, password=%s, auth_version=auth_version + 1
                     WHERE id=%s
                 """, (nombre, email, rol, password, id))
             else:
                 cur.execute("""
                     UPDATE usuarios
-                    SET nombre=%s, email=%s, rol=%s
+                    SET nombre=%s, email=%s, rol=%s, auth_version=auth_version + 1
                     WHERE id=%s
                 """, (nombre, email, rol, id))
 
+            publish_invalidation(cur, "usuario", id)
             conn.commit()
+            invalidate_auth(id)
             flash("Usuario actualizado correctamente.", "success")
             return redirect('/admin')
 
@@ -2229,7 +5560,9 @@ def eliminar_usuario(id):
 
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute("DELETE FROM usuarios WHERE id=%s", (id,))
+        publish_invalidation(cur, "usuario", id)
         conn.commit()
+    invalidate_auth(id)
 
     flash("Usuario eliminado", "danger")
     return redirect('/admin')
@@ -2242,47 +5575,184 @@ def mis_documentos():
     if not require_login():
         return redirect('/')
 
-    per_page = request.args.get('per_page', '10')
-    page = request.args.get('page', 1, type=int)
-    if page < 1: page = 1
-    empresa_filtro = request.args.get('empresa', '').strip()
-    active_tab = request.args.get('tab', 'actas')
-    
-    # Comportamiento original: ver TODO (o corregir si se desea filtrar por user)
-    # user_id = session['user_id'] # Descomentar para filtrar por usuario
-    user_id = None
-
-    actas_raw, total_a, pages_a = get_paginated_docs('actas', empresa_filtro, user_id=user_id, page=page, per_page=per_page)
-    informes_raw, total_i, pages_i = get_paginated_docs('informes', empresa_filtro, user_id=user_id, page=page, per_page=per_page)
-    reportes_raw, total_r, pages_r = get_paginated_docs('reportes', empresa_filtro, user_id=user_id, page=page, per_page=per_page)
-    comisiones_raw, total_c, pages_c = get_paginated_docs('comisiones', empresa_filtro, user_id=user_id, page=page, per_page=per_page)
-
-    def fmt_docs(docs, tipo):
-        res = []
-        for d in docs:
-            codigo = format_doc_code(tipo, d['numero'], d['anio'])
-            if tipo == 'informes':
-                res.append((d['id'], codigo, d['empresa'], d['gestiones'], d['productos_asociados'], d['tipo_informe'], d['caso_tipo'], d['nombre_alimentador'], d['alimentador_subestacion'], d['linea_subtransmision_nombre'], d['fecha_interrupcion'], d['asunto'], d['observaciones'], d['fecha'], d['hora'], d['funcionario']))
-            elif tipo == 'reportes':
-                res.append((d['id'], codigo, d['empresa'], d['gestiones'], d['productos_asociados'], d['tipo_reporte'], d['asunto'], d['observaciones'], d['fecha'], d['hora'], d['funcionario']))
-            else:
-                res.append((d['id'], codigo, d['empresa'], d['gestiones'], d['productos_asociados'], d['asunto'], d['observaciones'], d['fecha'], d['hora'], d['funcionario']))
-        return res
+    page, per_page, empresa_filtro, active_tab = listing_args()
 
     return render_template(
         'mis_documentos.html',
-        actas=fmt_docs(actas_raw, 'actas'),
-        informes=fmt_docs(informes_raw, 'informes'),
-        reportes=fmt_docs(reportes_raw, 'reportes'),
-        comisiones=fmt_docs(comisiones_raw, 'comisiones'),
         page=page,
         per_page=per_page,
-        pages_a=pages_a, pages_i=pages_i, pages_r=pages_r, pages_c=pages_c,
         empresas=get_all_companies(),
         empresa_sel=empresa_filtro,
-        active_tab=active_tab
+        active_tab=active_tab,
+        **load_docs_tab(active_tab, empresa_filtro, mis_documentos_user_id(), page, per_page)
+    )
+
+@app.route('/mis_documentos/tab/<tipo>')
+def mis_documentos_tab(tipo):
+    if not require_login():
+        return "No autorizado", 403
+    if tipo not in DOC_TABS:
+        return "Tipo de documento inválido", 404
+
+    page, per_page, empresa_filtro, _ = listing_args(tipo)
+    return render_template(
+        'mis_documentos_tab.html',
+        page=page,
+        per_page=per_page,
+        empresa_sel=empresa_filtro,
+        **load_docs_tab(tipo, empresa_filtro, mis_documentos_user_id(), page, per_page)
+    )
+
+def mis_documentos_user_id():
+    # Comportamiento original: ver TODO (o corregir si se desea filtrar por user)
+    # return session['user_id'] # Descomentar para filtrar por usuario
+    return None
+
+
+# ===============================
+# Búsqueda de documentos
+# ===============================
+# La columna `busqueda` de cada tabla (initdb/16_busqueda.sql) es un tsvector
+# en español sin tildes con índice GIN. Cada tabla toma a lo sumo
+# BUSQUEDA_CANDIDATOS coincidencias, las más recientes: con un término raro
+# el planificador usa el GIN y las trae todas; con uno que está en medio
+# archivo recorre (anio, numero) hacia atrás y para al llegar al tope, en vez
+# de calcular ts_rank_cd sobre cientos de miles de filas. Entre esos
+# candidatos se ordena por relevancia y sólo la página pasa por ts_headline,
+# que es lo caro.
+BUSQUEDA_CONFIG = 'es_unaccent'
+BUSQUEDA_POR_PAGINA = 20
+BUSQUEDA_CANDIDATOS = 1000
+# El total se cuenta hasta este tope; más allá se muestra "más de N"
+BUSQUEDA_MAX_TOTAL = 1000
+# Marcas de resaltado que no aparecen en texto normal; se cambian por <mark>
+# después de escapar el fragmento
+_RESALTE_INICIO, _RESALTE_FIN = "\x02", "\x03"
+BUSQUEDA_HEADLINE = (f'StartSel={_RESALTE_INICIO}, StopSel={_RESALTE_FIN}, '
+                     'MaxFragments=2, MaxWords=25, MinWords=8, FragmentDelimiter=" … "')
+
+BUSQUEDA_TEXTO = {
+    'informes': "concat_ws(' · ', t.asunto, t.gestiones, t.productos_asociados, t.caso_tipo, "
+                "t.nombre_alimentador, t.alimentador_subestacion, t.linea_subtransmision_nombre, t.observaciones)",
+}
+BUSQUEDA_TEXTO_BASE = "concat_ws(' · ', t.asunto, t.gestiones, t.productos_asociados, t.observaciones)"
+
+def resaltar(fragmento):
+    texto = str(Markup.escape(fragmento or ""))
+    return Markup(texto.replace(_RESALTE_INICIO, "<mark>").replace(_RESALTE_FIN, "</mark>"))
+
+def search_documents(texto, tipos=DOC_TABS, user_id=None, page=1, per_page=BUSQUEDA_POR_PAGINA):
+    """Busca `texto` (sintaxis de buscador: "frase", -excluir, or) en los tipos
+    pedidos. Devuelve (hits, total); total llega como máximo a BUSQUEDA_MAX_TOTAL + 1."""
+    # La consulta va en línea (no en un CTE) para que el planificador estime
+    # cuántas filas coinciden y elija entre el GIN y el índice (anio, numero)
+    consulta = "websearch_to_tsquery(%(config)s, %(texto)s)"
+    filtro = "AND t.id_usuario = %(user_id)s" if user_id else ""
+    params = {
+        'config': BUSQUEDA_CONFIG,
+        'texto': texto,
+        'user_id': user_id,
+        'candidatos': max(BUSQUEDA_CANDIDATOS, page * per_page),
+        'tope': page * per_page,
+        'limite': per_page,
+        'desde': (page - 1) * per_page,
+        'headline': BUSQUEDA_HEADLINE,
+        'max_total': BUSQUEDA_MAX_TOTAL + 1,
+    }
+
+    partes, conteo = [], []
+    for tabla in tipos:
+        partes.append(f"""
+            (SELECT '{tabla}' AS tipo, t.id, t.numero, t.anio, t.empresa, t.fecha, t.asunto,
+                    {BUSQUEDA_TEXTO.get(tabla, BUSQUEDA_TEXTO_BASE)} AS texto,
+                    ts_rank_cd(t.busqueda, {consulta}) AS rango
+             FROM (
+                 SELECT * FROM {tabla} t
+                 WHERE t.busqueda @@ {consulta} {filtro}
+                 ORDER BY t.anio DESC, t.numero DESC
+                 LIMIT %(candidatos)s
+             ) t
+             ORDER BY rango DESC, t.anio DESC, t.numero DESC
+             LIMIT %(tope)s)
+        """)
+        conteo.append(f"(SELECT 1 FROM {tabla} t WHERE t.busqueda @@ {consulta} {filtro})")
+
+    with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(f"""
+            SELECT pagina.tipo, pagina.id, pagina.numero, pagina.anio, pagina.empresa,
+                   pagina.fecha, pagina.asunto, pagina.rango,
+                   ts_headline(%(config)s, pagina.texto, {consulta}, %(headline)s) AS fragmento
+            FROM (
+                SELECT * FROM ({" UNION ALL ".join(partes)}) hits
+                ORDER BY rango DESC, anio DESC, numero DESC
+                LIMIT %(limite)s OFFSET %(desde)s
+            ) pagina
+            ORDER BY pagina.rango DESC, pagina.anio DESC, pagina.numero DESC
+        """, params)
+        rows = cur.fetchall()
+
+        cur.execute(f"""
+            SELECT COUNT(*) AS total FROM (
+                SELECT 1 FROM ({" UNION ALL ".join(conteo)}) hits LIMIT %(max_total)s
+            ) limitado
+        """, params)
+        total = cur.fetchone()['total']
+
+    hits = [{
+        'tipo': r['tipo'],
+        'id': r['id'],
+        'codigo': format_doc_code(r['tipo'], r['numero'], r['anio']),
+        'empresa': r['empresa'],
+        'fecha': r['fecha'],
+        'asunto': r['asunto'],
+        'rango': round(float(r['rango']), 4),
+        'fragmento': resaltar(r['fragmento']),
+    } for r in rows]
+    return hits, total
+
+def busqueda_args():
+    """Lee q/tipo/page del query string; devuelve (texto, tipos, page, user_id)."""
+    texto = request.args.get('q', '').strip()[:200]
+    tipo = request.args.get('tipo', '').strip()
+    tipos = [tipo] if tipo in DOC_TABS else DOC_TABS
+    page = max(request.args.get('page', 1, type=int), 1)
+    # Mismo alcance que los listados: el admin ve todo; el usuario, lo de mis_documentos
+    user_id = None if session.get('rol') == 'admin' else mis_documentos_user_id()
+    return texto, tipos, page, user_id
+
+@app.route('/buscar')
+def buscar():
+    if not require_login():
+        return redirect('/')
+
+    texto, tipos, page, user_id = busqueda_args()
+    hits, total = search_documents(texto, tipos, user_id, page) if texto else ([], 0)
+    pages = (min(total, BUSQUEDA_MAX_TOTAL) + BUSQUEDA_POR_PAGINA - 1) // BUSQUEDA_POR_PAGINA
+    return render_template(
+        'buscar.html',
+        q=texto,
+        tipo_sel=tipos[0] if len(tipos) == 1 else '',
+        hits=hits,
+        total=total,
+        total_max=BUSQUEDA_MAX_TOTAL,
+        page=page,
+        pages=pages,
     )
 
+@app.route('/api/buscar')
+def api_buscar():
+    if not require_login():
+        return {"error": "No autorizado"}, 401
+
+    texto, tipos, page, user_id = busqueda_args()
+    if not texto:
+        return {"error": "Falta el texto a buscar (q)"}, 400
+    hits, total = search_documents(texto, tipos, user_id, page)
+    for hit in hits:
+        hit['fecha'] = hit['fecha'].isoformat() if hit['fecha'] else None
+        hit['fragmento'] = str(hit['fragmento'])
+    return {"data": hits, "total": min(total, BUSQUEDA_MAX_TOTAL), "mas": total > BUSQUEDA_MAX_TOTAL, "page": page}
+
 
 # ===============================
 # Utilidad CLI (opcional)
@@ -0,0 +1,128 @@
+"""
+Benchmark de la búsqueda de texto completo (/buscar).
+
+Llena las cuatro tablas de documentos con datos sintéticos (un millón de
+documentos en total por defecto) y mide search_documents con consultas de
+distinta selectividad: palabras raras, comunes, frases y exclusiones.
+
+Los datos son sintéticos: se crea el esquema `bench_busqueda` con copias
+vacías de `usuarios` y de las tablas de documentos (con sus índices, incluido
+el GIN de `busqueda`), se llenan con generate_series y se borra al terminar.
+La aplicación lo ve primero gracias al search_path de la conexión, así que
+las tablas reales no se tocan.
+
+Uso (dentro del contenedor web):
+    python bench_busqueda.py [documentos] [repeticiones]
+"""
+import os
+import statistics
+import sys
+import time
+
+import psycopg2
+
+ESQUEMA = "bench_busqueda"
+TABLAS = ("actas", "informes", "reportes", "comisiones")
+
+# Vocabulario con frecuencias muy distintas: cada palabra i aparece en
+# aproximadamente 1 de cada (i + 2) ** 2 documentos
+PALABRAS = [
+    "energía", "revisión", "mantenimiento", "alimentador", "subestación", "transformador",
+    "interrupción", "medidor", "facturación", "tarifa", "reclamo", "calidad", "pérdidas",
+    "generación", "distribución", "contrato", "auditoría", "regulación", "inspección",
+    "liquidación", "compensación", "fotovoltaica", "hidroeléctrica", "biomasa", "cogeneración",
+]
+
+CONSULTAS = [
+    ("rara", "cogeneración"),
+    ("media", "facturación"),
+    ("común", "energía"),
+    ("frase", '"alimentador norte"'),
+    ("dos términos", "transformador interrupción"),
+    ("exclusión", "mantenimiento -energía"),
+    ("sin tildes", "subestacion"),
+]
+
+
+def database_url():
+    url = os.environ["DATABASE_URL"]
+    separador = "&" if "?" in url else "?"
+    return f"{url}{separador}options=-csearch_path%3D{ESQUEMA},public"
+
+
+def crear_datos(documentos):
+    por_tabla = documentos // len(TABLAS)
+    with psycopg2.connect(os.environ["DATABASE_URL"]) as conn, conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {ESQUEMA} CASCADE")
+        cur.execute(f"CREATE SCHEMA {ESQUEMA}")
+        cur.execute(f"CREATE TABLE {ESQUEMA}.usuarios (LIKE public.usuarios INCLUDING DEFAULTS)")
+        cur.execute(f"""
+            INSERT INTO {ESQUEMA}.usuarios (id, nombre, email, password, rol)
+            SELECT g, 'Funcionario ' || g, 'f' || g || '@example.com', 'x', 'usuario'
+            FROM generate_series(1, 50) g
+        """)
+        # Texto: cada palabra entra según su frecuencia (hash del id)
+        texto = " || ' ' || ".join(
+            f"CASE WHEN hashtext(g::text || '{i}') %% {(i + 2) ** 2} = 0 THEN '{palabra}' ELSE '' END"
+            for i, palabra in enumerate(PALABRAS)
+        )
+        for tabla in TABLAS:
+            cur.execute(f"CREATE TABLE {ESQUEMA}.{tabla} (LIKE public.{tabla} INCLUDING DEFAULTS)")
+            cur.execute(f"""
+                INSERT INTO {ESQUEMA}.{tabla}
+                    (id, numero, anio, codigo, id_usuario, empresa, gestiones, productos_asociados,
+                     asunto, observaciones, fecha, hora)
+                SELECT g, g, 2025, '{tabla}.' || g, 1 + g %% 50,
+                       'Empresa Eléctrica ' || (g %% 20),
+                       'Gestión ' || (g %% 7),
+                       'Producto ' || (g %% 11),
+                       'Documento ' || g || ' sobre ' || {texto},
+                       'Se revisó el alimentador ' || (ARRAY['norte', 'sur', 'este', 'oeste'])[1 + g %% 4]
+                           || ' de la zona ' || (g %% 30) || '. ' || repeat('Texto de relleno. ', g %% 5),
+                       DATE '2025-01-01' + (g %% 365),
+                       TIME '08:00'
+                FROM generate_series(1, %s) g
+            """, (por_tabla,))
+            cur.execute(f"""
+                UPDATE {ESQUEMA}.{tabla}
+                SET busqueda = documento_busqueda(asunto, gestiones, productos_asociados, NULL, observaciones)
+            """)
+            cur.execute(f"CREATE INDEX ON {ESQUEMA}.{tabla} USING GIN (busqueda)")
+            cur.execute(f"CREATE UNIQUE INDEX ON {ESQUEMA}.{tabla} (anio, numero)")
+            cur.execute(f"ANALYZE {ESQUEMA}.{tabla}")
+
+
+def borrar_datos():
+    with psycopg2.connect(os.environ["DATABASE_URL"]) as conn, conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {ESQUEMA} CASCADE")
+
+
+def main():
+    documentos = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    print(f"Preparando {documentos} documentos sintéticos en el esquema {ESQUEMA}...")
+    inicio = time.perf_counter()
+    crear_datos(documentos)
+    print(f"Listo en {time.perf_counter() - inicio:.0f}s")
+    try:
+        os.environ["DATABASE_URL"] = database_url()
+        os.environ["SMTP_SERVER"] = ""
+        os.environ["JOBS_WORKER_THREAD"] = "false"
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import app as app_module
+
+        print(f"\n{'consulta':<14} {'texto':<30} {'total':>7} {'p50 (ms)':>9} {'máx (ms)':>9}")
+        for nombre, texto in CONSULTAS:
+            tiempos = []
+            for _ in range(repeticiones):
+                t0 = time.perf_counter()
+                _, total = app_module.search_documents(texto)
+                tiempos.append((time.perf_counter() - t0) * 1000)
+            mostrado = f"{app_module.BUSQUEDA_MAX_TOTAL}+" if total > app_module.BUSQUEDA_MAX_TOTAL else str(total)
+            print(f"{nombre:<14} {texto:<30} {mostrado:>7} {statistics.median(tiempos):>9.1f} {max(tiempos):>9.1f}")
+    finally:
+        borrar_datos()
+
+
+if __name__ == "__main__":
+    main()
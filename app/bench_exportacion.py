@@ -0,0 +1,169 @@
+"""
+Benchmark de la exportación de informes a Excel.
+
+Compara la exportación anterior (pandas + openpyxl, con bordes, alineación y
+anchos asignados celda por celda) contra la actual (cursor del servidor +
+XlsxWriter en constant_memory con formatos por columna). Cada variante corre
+en su propio proceso para medir su pico de memoria por separado.
+
+Los datos son sintéticos: se crea el esquema `bench_exportacion` con copias
+vacías de `usuarios` e `informes`, se llena con generate_series y se borra al
+terminar. La aplicación lo ve primero gracias al search_path de la conexión,
+así que las tablas reales no se tocan.
+
+Uso (dentro del contenedor web):
+    python bench_exportacion.py [filas]
+"""
+import os
+import resource
+import subprocess
+import sys
+import time
+from io import BytesIO
+
+import psycopg2
+
+ESQUEMA = "bench_exportacion"
+
+
+def database_url():
+    url = os.environ["DATABASE_URL"]
+    separador = "&" if "?" in url else "?"
+    return f"{url}{separador}options=-csearch_path%3D{ESQUEMA},public"
+
+
+def crear_datos(filas):
+    with psycopg2.connect(os.environ["DATABASE_URL"]) as conn, conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {ESQUEMA} CASCADE")
+        cur.execute(f"CREATE SCHEMA {ESQUEMA}")
+        cur.execute(f"CREATE TABLE {ESQUEMA}.usuarios (LIKE public.usuarios INCLUDING DEFAULTS)")
+        cur.execute(f"CREATE TABLE {ESQUEMA}.informes (LIKE public.informes INCLUDING DEFAULTS)")
+        cur.execute(f"""
+            INSERT INTO {ESQUEMA}.usuarios (id, nombre, email, password, rol)
+            SELECT g, 'Funcionario ' || g, 'f' || g || '@example.com', 'x', 'usuario'
+            FROM generate_series(1, 50) g
+        """)
+        cur.execute(f"""
+            INSERT INTO {ESQUEMA}.informes
+                (id, numero, anio, id_usuario, empresa, tipo_informe, gestiones,
+                 productos_asociados, asunto, observaciones, fecha, hora,
+                 caso_tipo, nombre_alimentador, fecha_interrupcion)
+            SELECT g, g, 2025, 1 + g %% 50,
+                   'Empresa Eléctrica ' || (g %% 20),
+                   'Tipo de informe ' || (g %% 40),
+                   'Gestión ' || (g %% 7),
+                   'Producto ' || (g %% 11),
+                   'Asunto del informe sintético número ' || g,
+                   repeat('Observación larga. ', g %% 9),
+                   DATE '2025-01-01' + (g %% 365),
+                   TIME '08:00' + (g %% 600) * INTERVAL '1 minute',
+                   CASE WHEN g %% 5 = 0 THEN 'ALIMENTADOR' END,
+                   CASE WHEN g %% 5 = 0 THEN 'Alimentador ' || (g %% 90) END,
+                   CASE WHEN g %% 5 = 0 THEN DATE '2025-01-01' + (g %% 300) END
+            FROM generate_series(1, %s) g
+        """, (filas,))
+        cur.execute(f"CREATE INDEX ON {ESQUEMA}.informes (anio, numero)")
+        cur.execute(f"ANALYZE {ESQUEMA}.informes")
+
+
+def borrar_datos():
+    with psycopg2.connect(os.environ["DATABASE_URL"]) as conn, conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {ESQUEMA} CASCADE")
+
+
+def exportar_anterior(app_module):
+    """Implementación previa de exportar_documentos('informes'), conservada sólo para comparar."""
+    import pandas as pd
+    from openpyxl.worksheet.table import Table, TableStyleInfo
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+
+    sql, _ = app_module.export_query('informes')
+    df = pd.read_sql_query(sql, app_module.engine)
+    df.rename(columns=app_module.EXPORT_COLUMN_NAMES, inplace=True)
+
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name='Informes', startrow=0, startcol=0)
+        worksheet = writer.sheets['Informes']
+        max_row = len(df) + 1
+        max_col = len(df.columns)
+
+        tab = Table(displayName="TablaInformes", ref=f"A1:{chr(64 + max_col)}{max_row}")
+        tab.tableStyleInfo = TableStyleInfo(name="TableStyleMedium2", showRowStripes=True)
+        worksheet.add_table(tab)
+
+        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+        header_font = Font(bold=True, color="FFFFFF", size=11)
+        header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+        for col_num in range(1, max_col + 1):
+            cell = worksheet.cell(row=1, column=col_num)
+            cell.fill = header_fill
+            cell.font = header_font
+            cell.alignment = header_alignment
+
+        for column in worksheet.columns:
+            max_length = 0
+            for cell in column:
+                cell_value = str(cell.value) if cell.value else ""
+                max_length = max(max_length, len(cell_value))
+            worksheet.column_dimensions[column[0].column_letter].width = min(max(max_length + 2, 12), 50)
+
+        thin_border = Border(
+            left=Side(style='thin', color='D0D0D0'),
+            right=Side(style='thin', color='D0D0D0'),
+            top=Side(style='thin', color='D0D0D0'),
+            bottom=Side(style='thin', color='D0D0D0')
+        )
+        for row in worksheet.iter_rows(min_row=2, max_row=max_row, min_col=1, max_col=max_col):
+            for cell in row:
+                cell.border = thin_border
+                cell.alignment = Alignment(vertical="top", wrap_text=True)
+
+    return len(output.getvalue())
+
+
+def exportar_actual(app_module):
+    path = app_module.build_xlsx_export('informes')
+    try:
+        return os.path.getsize(path)
+    finally:
+        os.unlink(path)
+
+
+def correr(variante):
+    """Proceso hijo: importa la app apuntando al esquema de prueba y exporta."""
+    os.environ["DATABASE_URL"] = database_url()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import app as app_module
+
+    fn = exportar_actual if variante == "actual" else exportar_anterior
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    inicio = time.perf_counter()
+    tamano = fn(app_module)
+    total = time.perf_counter() - inicio
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{variante}\t{total:.2f}\t{pico / 1024:.0f}\t{(pico - base) / 1024:.0f}\t{tamano / 1024 / 1024:.1f}")
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f"Preparando {filas} informes sintéticos en el esquema {ESQUEMA}...")
+    crear_datos(filas)
+    try:
+        print(f"\n{'variante':<10} {'tiempo (s)':>10} {'RSS pico (MiB)':>15} {'RSS extra (MiB)':>16} {'archivo (MiB)':>14}")
+        for variante in ("anterior", "actual"):
+            salida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--correr", variante],
+                check=True, capture_output=True, text=True,
+            ).stdout.strip().splitlines()[-1]
+            nombre, tiempo, pico, extra, tamano = salida.split("\t")
+            print(f"{nombre:<10} {tiempo:>10} {pico:>15} {extra:>16} {tamano:>14}")
+    finally:
+        borrar_datos()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--correr":
+        correr(sys.argv[2])
+    else:
+        main()
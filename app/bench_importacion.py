@@ -0,0 +1,169 @@
+"""
+Benchmark de la importación masiva de documentos (POST /admin/documentos/importar/<tipo>).
+
+Arma un CSV de actas con las columnas de la exportación (100 000 filas por
+defecto; la mitad con código explícito y la otra mitad sin código, para que
+se numeren por bloque) y lo importa con import_documents, midiendo por
+separado la lectura y validación en memoria y la carga completa. Al final
+comprueba que entraron todas las filas, que no hay números repetidos y que
+doc_conteos y empresas_directorio cuadran con la tabla.
+
+La variante `anterior` instala los triggers por fila de doc_conteos y
+empresas_directorio que había antes de initdb/18_importacion_masiva.sql, para
+comparar.
+
+Los datos son sintéticos: se crea el esquema `bench_importacion` con copias
+vacías de `usuarios`, `actas` y las tablas que mantienen sus triggers, y se
+borra al terminar. La aplicación lo ve primero gracias al search_path de la
+conexión, así que las tablas reales no se tocan.
+
+Uso (dentro del contenedor web):
+    python bench_importacion.py [filas] [anterior]
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+
+import psycopg2
+
+ESQUEMA = "bench_importacion"
+TABLAS = ("usuarios", "actas", "doc_numeradores", "doc_conteos", "empresas_directorio", "doc_modificaciones")
+USUARIOS = 200
+EMPRESAS = 300
+ANIOS = (2019, 2020, 2021, 2022, 2023)
+
+
+def database_url():
+    url = os.environ["DATABASE_URL"]
+    separador = "&" if "?" in url else "?"
+    return f"{url}{separador}options=-csearch_path%3D{ESQUEMA},public"
+
+
+def crear_datos(variante):
+    with psycopg2.connect(os.environ["DATABASE_URL"]) as conn, conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {ESQUEMA} CASCADE")
+        cur.execute(f"CREATE SCHEMA {ESQUEMA}")
+        for tabla in TABLAS:
+            # INCLUDING ALL trae los índices; los id dejan de usar las secuencias reales
+            cur.execute(f"CREATE TABLE {ESQUEMA}.{tabla} (LIKE public.{tabla} INCLUDING ALL)")
+            if tabla in ("usuarios", "actas"):
+                cur.execute(f"ALTER TABLE {ESQUEMA}.{tabla} ALTER COLUMN id DROP DEFAULT")
+                cur.execute(f"ALTER TABLE {ESQUEMA}.{tabla} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY")
+        cur.execute(f"""
+            INSERT INTO {ESQUEMA}.usuarios (id, nombre, email, password, rol)
+            OVERRIDING SYSTEM VALUE
+            SELECT g, 'Funcionario ' || g, 'funcionario' || g || '@example.com', 'x',
+                   CASE WHEN g = 1 THEN 'admin' ELSE 'usuario' END
+            FROM generate_series(1, %s) g
+        """, (USUARIOS,))
+
+        # Los mismos triggers que public.actas, sobre la copia
+        cur.execute("""
+            SELECT tgname, pg_get_triggerdef(oid)
+            FROM pg_trigger
+            WHERE tgrelid = 'public.actas'::regclass AND NOT tgisinternal
+        """)
+        for nombre, definicion in cur.fetchall():
+            if variante == "anterior" and nombre.startswith(("trg_actas_conteo", "trg_actas_empresa")) \
+                    and not nombre.endswith("_trunc"):
+                continue
+            cur.execute(definicion.replace(" ON public.actas ", f" ON {ESQUEMA}.actas "))
+        if variante == "anterior":
+            cur.execute(f"""
+                CREATE TRIGGER trg_actas_conteo AFTER INSERT OR DELETE ON {ESQUEMA}.actas
+                FOR EACH ROW EXECUTE FUNCTION doc_conteos_fila()
+            """)
+            cur.execute(f"""
+                CREATE TRIGGER trg_actas_empresa AFTER INSERT OR DELETE ON {ESQUEMA}.actas
+                FOR EACH ROW EXECUTE FUNCTION empresas_directorio_fila()
+            """)
+
+
+def borrar_datos():
+    with psycopg2.connect(os.environ["DATABASE_URL"]) as conn, conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {ESQUEMA} CASCADE")
+
+
+def crear_csv(filas, empresas_catalogo):
+    """CSV con las columnas de la exportación de actas; devuelve la ruta."""
+    fd, path = tempfile.mkstemp(prefix="bench_importacion_", suffix=".csv")
+    with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(["Código", "Empresa", "Gestiones", "Productos Asociados", "Asunto",
+                           "Observaciones", "Fecha Registro", "Hora Registro", "Funcionario"])
+        for i in range(filas):
+            anio = ANIOS[i % len(ANIOS)]
+            # Las pares traen código; las impares se numeran al importar
+            codigo = f"ACTAS.DTCD.{anio}.{i // 2 + 1:03d}" if i % 2 == 0 else ""
+            if i % 3 == 0 and empresas_catalogo:
+                # Escrita a mano, en minúsculas: se guarda como en el catálogo
+                empresa = empresas_catalogo[i % len(empresas_catalogo)].lower()
+            else:
+                empresa = f"Empresa {(i * 7919) % EMPRESAS}"
+            escritor.writerow([
+                codigo, empresa, f"Gestión {i % 7}", f"Producto {i % 11}",
+                f"Documento histórico {i} del alimentador {i % 500}", f"Observación {i}",
+                f"{(i % 28) + 1:02d}/{(i % 12) + 1:02d}/{anio}", f"{8 + i % 9:02d}:{i % 60:02d}",
+                f"Funcionario {1 + i % USUARIOS}",
+            ])
+    return path
+
+
+def verificar(filas):
+    with psycopg2.connect(database_url()) as conn, conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*), COUNT(DISTINCT (anio, numero)), COUNT(DISTINCT codigo) FROM actas")
+        total, numeros, codigos = cur.fetchone()
+        cur.execute("SELECT COALESCE(SUM(total), 0) FROM doc_conteos WHERE tabla = 'actas'")
+        conteo = cur.fetchone()[0]
+        cur.execute("SELECT COALESCE(SUM(documentos), 0) FROM empresas_directorio")
+        directorio = cur.fetchone()[0]
+    print(f"filas en actas: {total}, números distintos: {numeros}, códigos distintos: {codigos}")
+    print(f"doc_conteos: {conteo}, empresas_directorio: {directorio}")
+    return total == numeros == codigos == conteo == directorio == filas
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    variante = sys.argv[2] if len(sys.argv) > 2 else "actual"
+
+    print(f"Preparando el esquema {ESQUEMA} ({variante})...")
+    crear_datos(variante)
+    path = None
+    try:
+        os.environ["DATABASE_URL"] = database_url()
+        os.environ["SMTP_SERVER"] = ""
+        os.environ["JOBS_WORKER_THREAD"] = "false"
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import app as app_module
+
+        empresas = [c['valor'] or c['nombre'] for c in app_module.get_catalogo('EMPRESA')]
+        path = crear_csv(filas, empresas)
+        print(f"CSV de {filas} filas: {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+
+        t0 = time.perf_counter()
+        encabezados, datos = app_module.read_import_rows(path, "actas")
+        documentos, errores, _ = app_module.validate_import_rows("actas", encabezados, datos, 1)
+        t_validar = time.perf_counter() - t0
+        assert not errores, errores[:5]
+        print(f"lectura y validación: {t_validar:.2f} s ({len(documentos) / t_validar:,.0f} filas/s)")
+
+        t0 = time.perf_counter()
+        resultado = app_module.import_documents("actas", path, 1)
+        t_total = time.perf_counter() - t0
+        print(resultado["mensaje"])
+        print(f"importación completa: {t_total:.2f} s ({filas / t_total:,.0f} filas/s)")
+
+        if not verificar(filas):
+            print("FALLA: los totales no cuadran")
+            sys.exit(1)
+        print("OK")
+    finally:
+        if path:
+            os.unlink(path)
+        borrar_datos()
+
+
+if __name__ == "__main__":
+    main()
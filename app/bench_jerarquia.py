@@ -0,0 +1,74 @@
+"""
+Benchmark del árbol TIPO_INFORME con un catálogo sintético.
+
+Compara el build_hierarchy recursivo anterior (un escaneo de la lista por
+nodo) contra el actual, y el costo de serializar el árbol en cada request
+contra reutilizar los bytes ya serializados.
+
+Uso (dentro del contenedor web):
+    python bench_jerarquia.py [nodos] [hijos_por_nodo]
+"""
+import json
+import sys
+import time
+
+from app import build_hierarchy
+
+
+def catalogo_sintetico(total, ramas):
+    """Genera `total` filas estilo catalogos con `ramas` hijos por nodo."""
+    items = []
+    for i in range(1, total + 1):
+        padre = None if i <= ramas else (i - 1) // ramas
+        items.append({
+            'id': i,
+            'nombre': f'{i}. Tipo de informe {i}',
+            'valor': f'Tipo de informe {i}',
+            'padre_id': padre,
+            'meta_data': {'special': 'CASO_FORTUITO'} if i % 97 == 0 else None,
+        })
+    return items
+
+
+def build_hierarchy_anterior(items, parent_id=None):
+    """Implementación previa, conservada sólo para comparar."""
+    result = []
+    children = [x for x in items if x['padre_id'] == parent_id]
+    for child in children:
+        node = {'label': child['nombre'], 'value': child['valor'] or child['nombre']}
+        if child['meta_data'] and child['meta_data'].get('special'):
+            node['special'] = child['meta_data']['special']
+        grand_children = build_hierarchy_anterior(items, child['id'])
+        if grand_children:
+            node['children'] = grand_children
+        result.append(node)
+    return result
+
+
+def medir(nombre, fn, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = fn()
+    total = time.perf_counter() - inicio
+    print(f"{nombre:<40} {total / repeticiones * 1000:10.2f} ms")
+    return resultado
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    ramas = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    items = catalogo_sintetico(total, ramas)
+    print(f"Catálogo sintético: {total} nodos, {ramas} hijos por nodo\n")
+
+    nuevo = medir("build_hierarchy (indexado, iterativo)", lambda: build_hierarchy(items), 20)
+    anterior = medir("build_hierarchy anterior (recursivo)", lambda: build_hierarchy_anterior(items), 1)
+    assert nuevo == anterior, "Los árboles no coinciden"
+
+    payload = json.dumps({"data": nuevo}, ensure_ascii=False).encode("utf-8")
+    medir("json.dumps del árbol por request", lambda: json.dumps({"data": nuevo}).encode("utf-8"), 20)
+    medir("bytes pre-serializados", lambda: payload, 20)
+    print(f"\nTamaño de la respuesta: {len(payload) / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Benchmark de la cadena de respaldos: completo + incremental + restauración.
+
+Crea una base aparte (`<base>_bench_respaldos`), le aplica las migraciones y
+la llena con documentos sintéticos (50 000 actas por defecto). Luego:
+  1. respaldo completo (pg_dump custom);
+  2. cambios: ediciones, bajas y altas, y además el caso de una fila borrada
+     y vuelta a crear con la misma clave única en el mismo intervalo (un
+     usuario con el mismo email y un acta con el mismo número del año, y por
+     lo tanto el mismo código);
+  3. respaldo incremental;
+  4. restauración de la cadena con restore_to_live (staging + intercambio).
+Mide cada paso y compara, tabla por tabla, el contenido restaurado con el que
+había antes de restaurar.
+
+Todo ocurre en la base aparte y en un directorio temporal; al terminar se
+borran las dos bases (la restaurada y la reemplazada).
+
+Uso (dentro del contenedor web):
+    python bench_respaldos.py [actas]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import psycopg2
+from psycopg2 import sql as pgsql
+
+USUARIOS = 200
+TABLAS = ('usuarios', 'catalogos', 'actas', 'informes', 'reportes', 'comisiones')
+
+
+URL = os.environ["DATABASE_URL"]
+
+
+def url_de(base):
+    """DATABASE_URL con otra base (conserva los parámetros después de '?')."""
+    direccion, separador, parametros = URL.partition("?")
+    return f"{direccion.rsplit('/', 1)[0]}/{base}{separador}{parametros}"
+
+
+def conectar(base):
+    return psycopg2.connect(url_de(base))
+
+
+def preparar_entorno():
+    """Apunta la app a la base del benchmark; devuelve (base original, base del benchmark)."""
+    original = URL.partition("?")[0].rsplit("/", 1)[1]
+    base = f"{original}_bench_respaldos"
+    os.environ["DATABASE_URL"] = url_de(base)
+    os.environ["POSTGRES_DB"] = base
+    os.environ["BACKUP_DIR"] = tempfile.mkdtemp(prefix="bench_respaldos_")
+    os.environ["SMTP_SERVER"] = ""
+    os.environ["JOBS_WORKER_THREAD"] = "false"
+    return original, base
+
+
+def borrar_bases(original, base):
+    conn = conectar(original)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        for nombre in (base, f"{base}_anterior", f"{base}_restauracion"):
+            cur.execute(pgsql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(pgsql.Identifier(nombre)))
+    conn.close()
+
+
+def crear_base(original, base):
+    borrar_bases(original, base)
+    conn = conectar(original)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(pgsql.SQL("CREATE DATABASE {} TEMPLATE template0").format(pgsql.Identifier(base)))
+    conn.close()
+
+
+def llenar(app_module, actas):
+    with app_module.get_conn() as conn, conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO usuarios (nombre, email, password, rol)
+            SELECT 'Funcionario ' || g, 'funcionario' || g || '@example.com', 'x', 'usuario'
+            FROM generate_series(1, %s) g
+        """, (USUARIOS,))
+        # Números explícitos con el contador ya adelantado: el trigger no escribe por fila
+        cur.execute("""
+            INSERT INTO doc_numeradores (tabla, anio, ultimo)
+            SELECT 'actas', 2020 + a, %s FROM generate_series(0, 4) a
+            ON CONFLICT (tabla, anio) DO UPDATE SET ultimo = EXCLUDED.ultimo
+        """, (actas,))
+        cur.execute("""
+            INSERT INTO actas (numero, anio, id_usuario, empresa, gestiones, productos_asociados,
+                               asunto, observaciones, fecha, hora)
+            SELECT g, 2020 + g %% 5, u.id, 'Empresa ' || g %% 300, 'Gestión ' || g %% 7, 'Producto ' || g %% 11,
+                   'Documento ' || g, 'Observación ' || g, DATE '2020-01-01' + g %% 1800, TIME '08:00'
+            FROM generate_series(1, %s) g
+            JOIN (SELECT id, row_number() OVER (ORDER BY id) AS n FROM usuarios) u ON u.n = 1 + g %% %s
+        """, (actas, USUARIOS))
+
+
+def modificar(app_module):
+    """Ediciones, bajas y altas; incluye bajas y altas con la misma clave única."""
+    with app_module.get_conn() as conn, conn.cursor() as cur:
+        cur.execute("UPDATE actas SET observaciones = observaciones || ' (editada)' WHERE id % 10 = 0")
+        cur.execute("DELETE FROM actas WHERE id % 97 = 0")
+        cur.execute("""
+            INSERT INTO actas (anio, id_usuario, empresa, asunto, fecha, hora)
+            SELECT 2024, (SELECT MIN(id) FROM usuarios), 'Empresa nueva', 'Alta ' || g, CURRENT_DATE, TIME '09:00'
+            FROM generate_series(1, 500) g
+        """)
+
+        # El mismo email con otro id (sus actas se van en cascada)
+        cur.execute("SELECT id, nombre, email FROM usuarios WHERE email = 'funcionario2@example.com'")
+        _, nombre, email = cur.fetchone()
+        cur.execute("DELETE FROM usuarios WHERE email = %s", (email,))
+        cur.execute("INSERT INTO usuarios (nombre, email, password, rol) VALUES (%s, %s, 'y', 'usuario')",
+                    (nombre + " (nuevo)", email))
+
+        # El mismo número del año (numero_manual) y por lo tanto el mismo código, con otro id
+        cur.execute("SELECT id, numero, anio FROM actas WHERE anio = 2021 ORDER BY numero LIMIT 1")
+        viejo_id, numero, anio = cur.fetchone()
+        cur.execute("DELETE FROM actas WHERE id = %s", (viejo_id,))
+        cur.execute("""
+            INSERT INTO actas (numero, anio, id_usuario, empresa, asunto, fecha, hora)
+            VALUES (%s, %s, (SELECT MIN(id) FROM usuarios), 'Empresa', 'Reemplazo', CURRENT_DATE, TIME '10:00')
+        """, (numero, anio))
+
+
+def huellas(base):
+    """md5 del contenido de cada tabla, ordenado por id."""
+    resultado = {}
+    with conectar(base) as conn, conn.cursor() as cur:
+        for tabla in TABLAS:
+            cur.execute(pgsql.SQL("SELECT COUNT(*), md5(COALESCE(string_agg(t::text, '|' ORDER BY id), '')) FROM {} t")
+                        .format(pgsql.Identifier(tabla)))
+            resultado[tabla] = cur.fetchone()
+    return resultado
+
+
+def medir(nombre, fn, *args):
+    t0 = time.perf_counter()
+    resultado = fn(*args)
+    print(f"{nombre}: {time.perf_counter() - t0:.2f} s")
+    return resultado
+
+
+def main():
+    actas = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    original, base = preparar_entorno()
+    print(f"Preparando la base {base}...")
+    crear_base(original, base)
+    app_module = None
+    try:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import app as app_module
+
+        app_module.run_migrations(informar=lambda mensaje: None)
+        medir(f"carga de {actas} actas", llenar, app_module, actas)
+
+        medir("respaldo completo", app_module.create_chain_backup, 'completo')
+        medir("cambios", modificar, app_module)
+        incremental = medir("respaldo incremental", app_module.create_chain_backup, 'incremental')
+        print(incremental["mensaje"])
+
+        esperado = huellas(base)
+        completo, *incrementales = app_module.backup_chain(incremental["respaldo_id"])
+        resultado = medir("restauración de la cadena", app_module.restore_to_live,
+                          completo['archivo'], 'custom', lambda filas=0, total=None: None, incrementales)
+        print(resultado["mensaje"])
+
+        obtenido = huellas(base)
+        distintas = [t for t in TABLAS if esperado[t] != obtenido[t]]
+        for tabla in TABLAS:
+            print(f"  {tabla}: {obtenido[tabla][0]} filas{' (DISTINTA)' if tabla in distintas else ''}")
+        if distintas:
+            print("FALLA: la base restaurada no coincide")
+            sys.exit(1)
+        print("OK")
+    finally:
+        if app_module:
+            app_module.engine.dispose()
+        borrar_bases(original, base)
+        shutil.rmtree(os.environ["BACKUP_DIR"], ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +0,0 @@
-ALTER TABLE informes ADD COLUMN nombre_alimentador VARCHAR(255);
@@ -0,0 +1,82 @@
+// Trabajos en segundo plano: encola el trabajo, consulta su estado cada pocos
+// segundos y, cuando termina, muestra el enlace de descarga (o el resumen y
+// los errores por fila) en `contenedor`.
+// `datos` puede ser un objeto (se envía como JSON) o un FormData (archivos).
+function iniciarTrabajo(url, datos, contenedor) {
+  contenedor.innerHTML =
+    '<div class="progress" style="height: 1.25rem;">' +
+    '<div class="progress-bar progress-bar-striped progress-bar-animated" role="progressbar" style="width: 0%">0%</div>' +
+    '</div><div class="small text-muted mt-1">En cola…</div>';
+  const barra = contenedor.querySelector('.progress-bar');
+  const texto = contenedor.querySelector('.small');
+
+  function fallar(mensaje) {
+    barra.classList.remove('progress-bar-animated');
+    barra.classList.add('bg-danger');
+    texto.textContent = mensaje;
+  }
+
+  // Errores por fila (importaciones): [{fila, error}]
+  function mostrarErrores(errores) {
+    if (!errores || !errores.length) return;
+    barra.classList.replace('bg-success', 'bg-warning');
+    const lista = document.createElement('ul');
+    lista.className = 'small text-danger mt-1 mb-0';
+    errores.forEach(e => {
+      const li = document.createElement('li');
+      li.textContent = `Fila ${e.fila}: ${e.error}`;
+      lista.appendChild(li);
+    });
+    contenedor.appendChild(lista);
+  }
+
+  function consultar(estadoUrl) {
+    fetch(estadoUrl)
+      .then(r => r.json())
+      .then(({ data }) => {
+        if (!data) {
+          fallar('No se pudo consultar el trabajo.');
+          return;
+        }
+        const pct = data.porcentaje || 0;
+        barra.style.width = pct + '%';
+        barra.textContent = pct + '%';
+        if (data.estado === 'listo') {
+          barra.classList.remove('progress-bar-animated');
+          barra.classList.add('bg-success');
+          texto.innerHTML = '';
+          if (!data.descarga_url) {
+            texto.textContent = (data.resultado && data.resultado.mensaje) || 'Trabajo completado.';
+            mostrarErrores(data.resultado && data.resultado.errores);
+            return;
+          }
+          const enlace = document.createElement('a');
+          enlace.href = data.descarga_url;
+          enlace.className = 'btn btn-success btn-sm mt-1';
+          enlace.textContent = '📥 Descargar';
+          texto.appendChild(enlace);
+        } else if (data.estado === 'fallido' || data.estado === 'expirado') {
+          fallar(data.error || 'El trabajo no se pudo completar.');
+        } else {
+          texto.textContent = data.estado === 'pendiente'
+            ? 'En cola…'
+            : `Procesando ${data.progreso}${data.total ? ' de ' + data.total : ''}…`;
+          setTimeout(() => consultar(estadoUrl), 2000);
+        }
+      })
+      .catch(() => setTimeout(() => consultar(estadoUrl), 5000));
+  }
+
+  const esFormulario = datos instanceof FormData;
+  fetch(url, {
+    method: 'POST',
+    headers: esFormulario ? {} : { 'Content-Type': 'application/json' },
+    body: esFormulario ? datos : JSON.stringify(datos || {})
+  })
+    .then(r => r.json().then(j => ({ ok: r.ok, j })))
+    .then(({ ok, j }) => {
+      if (!ok) throw new Error(j.error || 'No se pudo iniciar el trabajo.');
+      consultar(j.data.estado_url);
+    })
+    .catch(e => fallar(e.message));
+}
@@ -0,0 +1,227 @@
+"""
+Prueba de concurrencia de la numeración anual de documentos.
+
+Lanza N creadores en paralelo (50 por defecto) contra POST /crear/actas, cada
+uno con su propia sesión, y además algunos lotes que reservan bloques de
+números con reserve_doc_numbers. Al final comprueba que:
+
+  * ninguna petición respondió algo distinto de 302 (ni un solo 500),
+  * se crearon todos los documentos y ningún número se repite,
+  * los números del año son consecutivos (sin huecos ni duplicados),
+  * el código de cada acta coincide con su número y año,
+  * un número manual ya usado se rechaza con aviso y uno libre se respeta,
+    y la numeración automática continúa después de él.
+
+La variante `anterior` instala el trigger MAX(numero) + 1 que había antes de
+initdb/15_numeradores.sql, para ver cuántas creaciones se perdían.
+
+Los datos son sintéticos: se crea el esquema `stress_numeracion` con copias
+vacías de `usuarios`, `actas`, `email_outbox` y `doc_numeradores`, y se borra
+al terminar. La aplicación lo ve primero gracias al search_path de la
+conexión, así que las tablas reales no se tocan.
+
+Uso (dentro del contenedor web):
+    python stress_numeracion.py [creadores] [documentos_por_creador] [anterior]
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+import psycopg2
+
+ESQUEMA = "stress_numeracion"
+LOTES = 5
+TAMANO_LOTE = 10
+
+
+def database_url():
+    url = os.environ["DATABASE_URL"]
+    separador = "&" if "?" in url else "?"
+    return f"{url}{separador}options=-csearch_path%3D{ESQUEMA},public"
+
+
+def crear_datos(creadores, variante):
+    with psycopg2.connect(os.environ["DATABASE_URL"]) as conn, conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {ESQUEMA} CASCADE")
+        cur.execute(f"CREATE SCHEMA {ESQUEMA}")
+        for tabla in ("usuarios", "actas", "email_outbox", "doc_numeradores"):
+            # INCLUDING ALL trae los UNIQUE; los id dejan de usar las secuencias reales
+            cur.execute(f"CREATE TABLE {ESQUEMA}.{tabla} (LIKE public.{tabla} INCLUDING ALL)")
+            if tabla != "doc_numeradores":
+                cur.execute(f"ALTER TABLE {ESQUEMA}.{tabla} ALTER COLUMN id DROP DEFAULT")
+                cur.execute(f"ALTER TABLE {ESQUEMA}.{tabla} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY")
+        cur.execute(f"""
+            INSERT INTO {ESQUEMA}.usuarios (id, nombre, email, password, rol)
+            OVERRIDING SYSTEM VALUE
+            SELECT g, 'Creador ' || g, 'c' || g || '@example.com', 'x', 'usuario'
+            FROM generate_series(1, %s) g
+        """, (creadores,))
+
+        if variante == "anterior":
+            # Numeración previa: el trigger siempre pisaba el número con MAX + 1
+            cur.execute(f"""
+                CREATE FUNCTION {ESQUEMA}.numero_anual_anterior() RETURNS TRIGGER AS $$
+                BEGIN
+                    NEW.anio := EXTRACT(YEAR FROM CURRENT_DATE)::INTEGER;
+                    NEW.numero := (SELECT COALESCE(MAX(numero), 0) + 1 FROM {ESQUEMA}.actas WHERE anio = NEW.anio);
+                    RETURN NEW;
+                END;
+                $$ LANGUAGE plpgsql
+            """)
+            cur.execute(f"""
+                CREATE TRIGGER trg_actas_1_numero BEFORE INSERT ON {ESQUEMA}.actas
+                FOR EACH ROW EXECUTE FUNCTION {ESQUEMA}.numero_anual_anterior()
+            """)
+        else:
+            cur.execute(f"""
+                CREATE TRIGGER trg_actas_1_numero BEFORE INSERT OR UPDATE OF numero, anio ON {ESQUEMA}.actas
+                FOR EACH ROW EXECUTE FUNCTION generar_numero_anual()
+            """)
+        cur.execute(f"""
+            CREATE TRIGGER trg_actas_2_codigo BEFORE INSERT OR UPDATE OF numero, anio ON {ESQUEMA}.actas
+            FOR EACH ROW EXECUTE FUNCTION generar_codigo_documento()
+        """)
+
+
+def borrar_datos():
+    with psycopg2.connect(os.environ["DATABASE_URL"]) as conn, conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {ESQUEMA} CASCADE")
+
+
+def cliente(app_module, uid):
+    client = app_module.app.test_client()
+    with client.session_transaction() as s:
+        s['user_id'] = uid
+        s['nombre'] = f"Creador {uid}"
+        s['rol'] = 'usuario'
+        s['auth_version'] = 1
+    return client
+
+
+def crear_acta(client, asunto, numero_manual=""):
+    return client.post("/crear/actas", data={
+        "asunto": asunto,
+        "empresa": "Empresa de prueba",
+        "gestiones": "Gestión",
+        "productos_asociados": "Producto",
+        "numero_manual": numero_manual,
+    })
+
+
+def crear_lote(app_module, anio, lote):
+    """Carga por lote: reserva un bloque y lo inserta en la misma transacción."""
+    with app_module.get_conn() as conn, conn.cursor() as cur:
+        numeros = app_module.reserve_doc_numbers(cur, "actas", anio, TAMANO_LOTE)
+        for numero in numeros:
+            cur.execute("""
+                INSERT INTO actas (numero, anio, id_usuario, empresa, asunto, fecha, hora)
+                VALUES (%s, %s, 1, 'Empresa de prueba', %s, CURRENT_DATE, LOCALTIME)
+            """, (numero, anio, f"Lote {lote}"))
+
+
+def estado_actas(anio):
+    with psycopg2.connect(database_url()) as conn, conn.cursor() as cur:
+        cur.execute("SELECT numero, codigo FROM actas WHERE anio = %s ORDER BY numero", (anio,))
+        return cur.fetchall()
+
+
+def main():
+    creadores = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    por_creador = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    variante = sys.argv[3] if len(sys.argv) > 3 else "actual"
+
+    print(f"Preparando el esquema {ESQUEMA} ({variante}) con {creadores} creadores...")
+    crear_datos(creadores, variante)
+    try:
+        os.environ["DATABASE_URL"] = database_url()
+        os.environ["DB_POOL_MAX"] = str(creadores + LOTES + 5)
+        os.environ["SMTP_SERVER"] = ""
+        os.environ["JOBS_WORKER_THREAD"] = "false"
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import app as app_module
+
+        # El mismo año que usa crear()
+        anio = app_module.datetime.now(app_module.pytz.timezone(app_module.APP_TZ)).year
+
+        barrera = threading.Barrier(creadores + LOTES)
+        estados = Counter()
+        errores = []
+        lock = threading.Lock()
+
+        def creador(uid):
+            client = cliente(app_module, uid)
+            barrera.wait()
+            for i in range(por_creador):
+                r = crear_acta(client, f"Creador {uid} documento {i}")
+                with lock:
+                    estados[r.status_code] += 1
+                    if r.status_code != 302 or "/crear/" in r.headers.get("Location", ""):
+                        errores.append((uid, r.status_code, r.headers.get("Location")))
+
+        def lote(n):
+            barrera.wait()
+            try:
+                crear_lote(app_module, anio, n)
+            except Exception as e:
+                with lock:
+                    errores.append((f"lote {n}", type(e).__name__, str(e).strip()))
+
+        hilos = [threading.Thread(target=creador, args=(uid,)) for uid in range(1, creadores + 1)]
+        hilos += [threading.Thread(target=lote, args=(n,)) for n in range(LOTES)]
+        inicio = time.perf_counter()
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+        total = time.perf_counter() - inicio
+
+        esperadas = creadores * por_creador + LOTES * TAMANO_LOTE
+        filas = estado_actas(anio)
+        numeros = [n for n, _ in filas]
+        repetidos = [n for n, k in Counter(numeros).items() if k > 1]
+        # Mismo formato que generar_codigo_documento()
+        incoherentes = [(n, c) for n, c in filas if c != f"ACTAS.DTCD.{n:03d}.{anio}"]
+
+        print(f"\n{len(hilos)} hilos, {esperadas} actas esperadas en {total:.2f}s")
+        print(f"respuestas: {dict(estados)}")
+        print(f"actas creadas: {len(filas)}  repetidas: {len(repetidos)}  código incoherente: {len(incoherentes)}")
+        for e in errores[:10]:
+            print("  error:", e)
+
+        fallas = []
+        if errores:
+            fallas.append(f"{len(errores)} creaciones fallaron")
+        if len(filas) != esperadas:
+            fallas.append(f"se crearon {len(filas)} de {esperadas}")
+        if repetidos:
+            fallas.append(f"números repetidos: {repetidos[:10]}")
+        if numeros != list(range(1, len(numeros) + 1)):
+            fallas.append("la numeración tiene huecos")
+        if incoherentes:
+            fallas.append(f"códigos que no coinciden con el número: {incoherentes[:5]}")
+
+        if variante != "anterior":
+            # Número manual: uno usado se rechaza con aviso, uno libre se respeta
+            client = cliente(app_module, 1)
+            r = crear_acta(client, "Manual repetido", numero_manual="1")
+            if r.status_code != 302 or "/crear/actas" not in r.headers.get("Location", ""):
+                fallas.append(f"número manual repetido respondió {r.status_code}")
+            libre = len(numeros) + 100
+            crear_acta(client, "Manual libre", numero_manual=str(libre))
+            crear_acta(client, "Después del manual")
+            ultimos = [n for n, _ in estado_actas(anio)][-2:]
+            if ultimos != [libre, libre + 1]:
+                fallas.append(f"tras el manual {libre} se esperaba {libre + 1}, quedaron {ultimos}")
+
+        if fallas:
+            print("\nFALLÓ:\n  " + "\n  ".join(fallas))
+            sys.exit(1)
+        print("\nOK: sin 500, sin duplicados y sin huecos")
+    finally:
+        borrar_datos()
+
+
+if __name__ == "__main__":
+    main()
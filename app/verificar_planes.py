@@ -0,0 +1,226 @@
+"""
+Verificación de planes de las consultas frecuentes.
+
+Llena un esquema de prueba con datos sintéticos, ejecuta los caminos de la
+aplicación que más se usan (listados con y sin filtros, paginación por
+OFFSET y por cursor, exportación filtrada, login, recuperación de contraseña,
+sesión y búsqueda) capturando el SQL que realmente mandan, y corre EXPLAIN
+sobre cada sentencia. Falla (código de salida 1) si alguna recorre con Seq
+Scan una tabla de más de UMBRAL filas: señal de que falta un índice o de que
+un cambio en la consulta dejó de aprovecharlo.
+
+Los datos son sintéticos: se crea el esquema `verificar_planes` con copias
+de las tablas involucradas (con todos sus índices, tal como están en public)
+y se borra al terminar. La aplicación lo ve primero gracias al search_path de
+la conexión, así que las tablas reales no se tocan.
+
+Uso (dentro del contenedor web):
+    python verificar_planes.py [filas_por_tabla] [umbral]
+"""
+import json
+import os
+import sys
+from contextlib import contextmanager
+
+import psycopg2
+
+ESQUEMA = "verificar_planes"
+TABLAS = ("usuarios", "actas", "informes", "reportes", "comisiones", "password_resets", "email_outbox")
+DOCUMENTOS = ("actas", "informes", "reportes", "comisiones")
+USUARIOS = 20000
+EMPRESAS = 300
+SENTENCIAS = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+
+def database_url():
+    url = os.environ["DATABASE_URL"]
+    separador = "&" if "?" in url else "?"
+    return f"{url}{separador}options=-csearch_path%3D{ESQUEMA},public"
+
+
+def crear_datos(filas):
+    with psycopg2.connect(os.environ["DATABASE_URL"]) as conn, conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {ESQUEMA} CASCADE")
+        cur.execute(f"CREATE SCHEMA {ESQUEMA}")
+        for tabla in TABLAS:
+            # INCLUDING ALL trae los índices; los id dejan de usar las secuencias reales
+            cur.execute(f"CREATE TABLE {ESQUEMA}.{tabla} (LIKE public.{tabla} INCLUDING ALL)")
+            cur.execute(f"ALTER TABLE {ESQUEMA}.{tabla} ALTER COLUMN id DROP DEFAULT")
+            cur.execute(f"ALTER TABLE {ESQUEMA}.{tabla} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY")
+        cur.execute(f"""
+            INSERT INTO {ESQUEMA}.usuarios (id, nombre, email, password, rol)
+            OVERRIDING SYSTEM VALUE
+            SELECT g, 'Funcionario ' || g, 'funcionario' || g || '@example.com', 'x',
+                   CASE WHEN g = 1 THEN 'admin' ELSE 'usuario' END
+            FROM generate_series(1, %s) g
+        """, (USUARIOS,))
+        for tabla in DOCUMENTOS:
+            cur.execute(f"""
+                INSERT INTO {ESQUEMA}.{tabla}
+                    (id, numero, anio, codigo, id_usuario, empresa, gestiones, productos_asociados,
+                     asunto, observaciones, fecha, hora)
+                OVERRIDING SYSTEM VALUE
+                SELECT g, g, 2018 + g %% 8, '{tabla}.' || g, 1 + g %% {USUARIOS},
+                       'Empresa ' || (g * 7919) %% {EMPRESAS},
+                       'Gestión ' || (g %% 7),
+                       'Producto ' || (g %% 11),
+                       'Documento ' || g || ' del alimentador ' || (g %% 500),
+                       'Observación ' || g,
+                       DATE '2018-01-01' + (g %% 2900),
+                       TIME '08:00'
+                FROM generate_series(1, %s) g
+            """, (filas,))
+            cur.execute(f"""
+                UPDATE {ESQUEMA}.{tabla}
+                SET busqueda = documento_busqueda(asunto, gestiones, productos_asociados, NULL, observaciones)
+            """)
+        for tabla in TABLAS:
+            cur.execute(f"ANALYZE {ESQUEMA}.{tabla}")
+
+
+def borrar_datos():
+    with psycopg2.connect(os.environ["DATABASE_URL"]) as conn, conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {ESQUEMA} CASCADE")
+
+
+class CursorCapturado:
+    """Cursor que anota cada sentencia (con sus parámetros ya puestos) antes de ejecutarla."""
+
+    def __init__(self, cur, capturadas, etiqueta):
+        self._cur = cur
+        self._capturadas = capturadas
+        self._etiqueta = etiqueta
+
+    def execute(self, sentencia, params=None):
+        texto = self._cur.mogrify(sentencia, params).decode()
+        if texto.lstrip().upper().startswith(SENTENCIAS):
+            self._capturadas.append((self._etiqueta[0], texto))
+        return self._cur.execute(sentencia, params)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cur.close()
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __getattr__(self, nombre):
+        return getattr(self._cur, nombre)
+
+
+class ConexionCapturada:
+    def __init__(self, conn, capturadas, etiqueta):
+        self._conn = conn
+        self._capturadas = capturadas
+        self._etiqueta = etiqueta
+
+    def cursor(self, *args, **kwargs):
+        return CursorCapturado(self._conn.cursor(*args, **kwargs), self._capturadas, self._etiqueta)
+
+    def __getattr__(self, nombre):
+        return getattr(self._conn, nombre)
+
+
+def nodos(plan):
+    yield plan
+    for hijo in plan.get("Plans", []):
+        yield from nodos(hijo)
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    umbral = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+
+    print(f"Preparando {filas} documentos por tabla en el esquema {ESQUEMA}...")
+    crear_datos(filas)
+    try:
+        os.environ["DATABASE_URL"] = database_url()
+        os.environ["SMTP_SERVER"] = ""
+        os.environ["JOBS_WORKER_THREAD"] = "false"
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import app as app_module
+
+        capturadas = []
+        etiqueta = [None]
+        get_conn_original = app_module.get_conn
+
+        @contextmanager
+        def get_conn_capturando():
+            with get_conn_original() as conn:
+                yield ConexionCapturada(conn, capturadas, etiqueta)
+
+        app_module.get_conn = get_conn_capturando
+        client = app_module.app.test_client()
+        empresa = ["Empresa 42", "EMPRESA 42"]
+
+        pasos = [
+            ("login", lambda: client.post("/login", data={"email": "Funcionario77@Example.com", "password": "x"})),
+            ("recuperación de contraseña", lambda: client.post("/enviar_recuperacion", data={"email": "funcionario78@example.com"})),
+            ("sesión (get_auth_info)", lambda: app_module.get_auth_info(1234)),
+            ("búsqueda", lambda: app_module.search_documents("alimentador 137")),
+        ]
+        for tabla in DOCUMENTOS:
+            pasos += [
+                (f"{tabla}: listado", lambda t=tabla: app_module.get_paginated_docs(t)),
+                (f"{tabla}: listado página 500", lambda t=tabla: app_module.get_paginated_docs(t, page=500)),
+                (f"{tabla}: listado por cursor", lambda t=tabla: app_module.get_paginated_docs(t, after="2022.5000")),
+                (f"{tabla}: por empresa", lambda t=tabla: app_module.get_paginated_docs(t, empresa=empresa)),
+                (f"{tabla}: por empresa y cursor",
+                 lambda t=tabla: app_module.get_paginated_docs(t, empresa=empresa, after="2022.5000")),
+                (f"{tabla}: por usuario", lambda t=tabla: app_module.get_paginated_docs(t, user_id=77)),
+                (f"{tabla}: por usuario y empresa",
+                 lambda t=tabla: app_module.get_paginated_docs(t, empresa=empresa, user_id=77)),
+            ]
+
+        for nombre, paso in pasos:
+            etiqueta[0] = nombre
+            paso()
+        for tabla in DOCUMENTOS:
+            sentencia, params = app_module.export_query(tabla, {'empresa': empresa, 'anio': 2024})
+            with psycopg2.connect(database_url()) as conn, conn.cursor() as cur:
+                capturadas.append((f"{tabla}: exportación por empresa y año", cur.mogrify(sentencia, params).decode()))
+        app_module.get_conn = get_conn_original
+
+        fallas = 0
+        vistas = set()
+        print(f"\n{'consulta':<40} {'acceso':<70} resultado")
+        with psycopg2.connect(database_url()) as conn, conn.cursor() as cur:
+            for nombre, sentencia in capturadas:
+                if (nombre, sentencia) in vistas:
+                    continue
+                vistas.add((nombre, sentencia))
+                cur.execute("EXPLAIN (FORMAT JSON) " + sentencia)
+                plan = cur.fetchone()[0]
+                plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+
+                accesos, malos = [], []
+                for nodo in nodos(plan):
+                    relacion = nodo.get("Relation Name")
+                    if not relacion:
+                        continue
+                    indice = nodo.get("Index Name")
+                    accesos.append(f"{nodo['Node Type']} {indice or relacion}")
+                    if nodo["Node Type"] == "Seq Scan":
+                        cur.execute("SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)", (relacion,))
+                        tuplas = cur.fetchone()[0]
+                        if tuplas > umbral:
+                            malos.append(f"Seq Scan {relacion} ({tuplas:.0f} filas)")
+                if not accesos:
+                    continue
+                resultado = "FALLA: " + ", ".join(malos) if malos else "ok"
+                fallas += bool(malos)
+                acceso = "; ".join(dict.fromkeys(accesos))
+                print(f"{nombre:<40} {acceso[:70]:<70} {resultado}")
+
+        if fallas:
+            print(f"\n{fallas} consultas recorren tablas grandes con Seq Scan (umbral {umbral} filas)")
+            sys.exit(1)
+        print(f"\nOK: ninguna consulta hace Seq Scan sobre tablas de más de {umbral} filas")
+    finally:
+        borrar_datos()
+
+
+if __name__ == "__main__":
+    main()
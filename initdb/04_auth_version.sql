@@ -0,0 +1,6 @@
+-- =========================
+-- VERSIÓN DE AUTENTICACIÓN
+-- =========================
+-- Se incrementa cada vez que un admin modifica al usuario; las sesiones
+-- guardan la versión con la que iniciaron y se refrescan si cambia.
+ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS auth_version INTEGER NOT NULL DEFAULT 1;
@@ -0,0 +1,24 @@
+-- =========================
+-- OUTBOX DE CORREOS
+-- =========================
+-- Los correos se insertan en la misma transacción que el documento y los
+-- envía en segundo plano el worker del outbox (ver app.py).
+-- estado: pendiente -> enviando -> enviado | fallido (tras OUTBOX_MAX_INTENTOS)
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    destinatario VARCHAR(255) NOT NULL,
+    asunto VARCHAR(255) NOT NULL,
+    html TEXT NOT NULL,
+    estado VARCHAR(20) NOT NULL DEFAULT 'pendiente',
+    intentos INTEGER NOT NULL DEFAULT 0,
+    proximo_intento TIMESTAMP NOT NULL DEFAULT NOW(),
+    ultimo_error TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    actualizado_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    enviado_at TIMESTAMP
+);
+
+-- Sólo las filas por enviar: el índice se mantiene pequeño aunque el histórico crezca
+CREATE INDEX IF NOT EXISTS idx_email_outbox_pendientes
+    ON email_outbox (proximo_intento, id)
+    WHERE estado IN ('pendiente', 'enviando');
@@ -0,0 +1,34 @@
+-- =========================
+-- VERSIÓN DE CATÁLOGOS
+-- =========================
+-- Contador global que se incrementa con cada escritura sobre catalogos. El
+-- trigger además avisa a los workers (canal actas_invalidacion) para que
+-- descarten su caché de catálogos.
+CREATE TABLE IF NOT EXISTS catalogos_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version BIGINT NOT NULL DEFAULT 1
+);
+
+INSERT INTO catalogos_version (id, version) VALUES (1, 1)
+ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION catalogos_incrementar_version()
+RETURNS TRIGGER AS $$
+DECLARE
+    nueva_version BIGINT;
+BEGIN
+    UPDATE catalogos_version
+    SET version = version + 1
+    WHERE id = 1
+    RETURNING version INTO nueva_version;
+
+    PERFORM pg_notify('actas_invalidacion', 'catalogos:' || nueva_version);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_catalogos_version ON catalogos;
+CREATE TRIGGER trg_catalogos_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON catalogos
+FOR EACH STATEMENT
+EXECUTE FUNCTION catalogos_incrementar_version();
@@ -0,0 +1,10 @@
+-- =========================
+-- ÍNDICES PARA PAGINACIÓN KEYSET
+-- =========================
+-- Los listados ordenan por (anio DESC, numero DESC) y paginan con
+-- (anio, numero) < cursor. El UNIQUE (numero, anio) existente tiene las
+-- columnas en el orden contrario y no sirve para ese recorrido.
+CREATE INDEX IF NOT EXISTS idx_actas_anio_numero ON actas (anio, numero);
+CREATE INDEX IF NOT EXISTS idx_informes_anio_numero ON informes (anio, numero);
+CREATE INDEX IF NOT EXISTS idx_reportes_anio_numero ON reportes (anio, numero);
+CREATE INDEX IF NOT EXISTS idx_comisiones_anio_numero ON comisiones (anio, numero);
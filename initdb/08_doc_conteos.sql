@@ -0,0 +1,81 @@
+-- =========================
+-- CONTEOS DE DOCUMENTOS
+-- =========================
+-- Totales por (tabla, empresa, id_usuario, anio) mantenidos por triggers.
+-- Los listados suman estas pocas filas en lugar de hacer COUNT(*) sobre la
+-- tabla completa (ver count_docs en app.py).
+CREATE TABLE IF NOT EXISTS doc_conteos (
+    tabla VARCHAR(20) NOT NULL,
+    empresa VARCHAR(200) NOT NULL DEFAULT '',
+    id_usuario INTEGER NOT NULL,
+    anio INTEGER NOT NULL,
+    total BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (tabla, empresa, id_usuario, anio)
+);
+
+CREATE INDEX IF NOT EXISTS idx_doc_conteos_usuario ON doc_conteos (tabla, id_usuario);
+
+CREATE OR REPLACE FUNCTION doc_conteos_ajustar(p_tabla TEXT, p_empresa TEXT, p_usuario INTEGER, p_anio INTEGER, p_delta INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO doc_conteos (tabla, empresa, id_usuario, anio, total)
+    VALUES (p_tabla, COALESCE(p_empresa, ''), p_usuario, p_anio, p_delta)
+    ON CONFLICT (tabla, empresa, id_usuario, anio)
+    DO UPDATE SET total = doc_conteos.total + EXCLUDED.total;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION doc_conteos_fila()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM doc_conteos_ajustar(TG_TABLE_NAME, OLD.empresa, OLD.id_usuario, OLD.anio, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM doc_conteos_ajustar(TG_TABLE_NAME, NEW.empresa, NEW.id_usuario, NEW.anio, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION doc_conteos_truncate()
+RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM doc_conteos WHERE tabla = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['actas', 'informes', 'reportes', 'comisiones'] LOOP
+        -- Bloquear escrituras mientras se recalculan los totales de la tabla
+        EXECUTE format('LOCK TABLE %I IN SHARE MODE', t);
+
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_conteo ON %I', t, t);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_conteo_upd ON %I', t, t);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_conteo_trunc ON %I', t, t);
+
+        EXECUTE format('CREATE TRIGGER trg_%s_conteo AFTER INSERT OR DELETE ON %I
+                        FOR EACH ROW EXECUTE FUNCTION doc_conteos_fila()', t, t);
+        -- En UPDATE sólo importa si cambia alguna columna de la clave
+        EXECUTE format('CREATE TRIGGER trg_%s_conteo_upd AFTER UPDATE OF empresa, id_usuario, anio ON %I
+                        FOR EACH ROW
+                        WHEN (OLD.empresa IS DISTINCT FROM NEW.empresa
+                              OR OLD.id_usuario IS DISTINCT FROM NEW.id_usuario
+                              OR OLD.anio IS DISTINCT FROM NEW.anio)
+                        EXECUTE FUNCTION doc_conteos_fila()', t, t);
+        EXECUTE format('CREATE TRIGGER trg_%s_conteo_trunc AFTER TRUNCATE ON %I
+                        FOR EACH STATEMENT EXECUTE FUNCTION doc_conteos_truncate()', t, t);
+
+        -- Recalcular desde cero (el script se puede volver a ejecutar)
+        DELETE FROM doc_conteos WHERE tabla = t;
+        EXECUTE format('INSERT INTO doc_conteos (tabla, empresa, id_usuario, anio, total)
+                        SELECT %L, COALESCE(empresa, ''''), id_usuario, anio, COUNT(*)
+                        FROM %I
+                        GROUP BY 2, 3, 4', t, t);
+    END LOOP;
+END;
+$$;
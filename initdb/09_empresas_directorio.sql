@@ -0,0 +1,90 @@
+-- =========================
+-- DIRECTORIO DE EMPRESAS
+-- =========================
+-- Una fila por cada escritura distinta de `empresa` usada en documentos, con
+-- cuántos documentos la usan. La mantienen triggers sobre las cuatro tablas;
+-- get_all_companies la lee en lugar de hacer SELECT DISTINCT sobre ellas.
+CREATE TABLE IF NOT EXISTS empresas_directorio (
+    empresa VARCHAR(200) PRIMARY KEY,
+    documentos BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION empresas_directorio_ajustar(p_empresa TEXT, p_delta INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    IF p_empresa IS NULL OR btrim(p_empresa) = '' THEN
+        RETURN;
+    END IF;
+    INSERT INTO empresas_directorio (empresa, documentos)
+    VALUES (p_empresa, p_delta)
+    ON CONFLICT (empresa)
+    DO UPDATE SET documentos = empresas_directorio.documentos + EXCLUDED.documentos;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION empresas_directorio_fila()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM empresas_directorio_ajustar(OLD.empresa, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM empresas_directorio_ajustar(NEW.empresa, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION empresas_directorio_recalcular()
+RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM empresas_directorio;
+    INSERT INTO empresas_directorio (empresa, documentos)
+    SELECT empresa, COUNT(*)
+    FROM (
+        SELECT empresa FROM actas
+        UNION ALL SELECT empresa FROM informes
+        UNION ALL SELECT empresa FROM reportes
+        UNION ALL SELECT empresa FROM comisiones
+    ) d
+    WHERE empresa IS NOT NULL AND btrim(empresa) <> ''
+    GROUP BY empresa;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+LOCK TABLE actas, informes, reportes, comisiones IN SHARE MODE;
+
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['actas', 'informes', 'reportes', 'comisiones'] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_empresa ON %I', t, t);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_empresa_upd ON %I', t, t);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_empresa_trunc ON %I', t, t);
+
+        EXECUTE format('CREATE TRIGGER trg_%s_empresa AFTER INSERT OR DELETE ON %I
+                        FOR EACH ROW EXECUTE FUNCTION empresas_directorio_fila()', t, t);
+        EXECUTE format('CREATE TRIGGER trg_%s_empresa_upd AFTER UPDATE OF empresa ON %I
+                        FOR EACH ROW
+                        WHEN (OLD.empresa IS DISTINCT FROM NEW.empresa)
+                        EXECUTE FUNCTION empresas_directorio_fila()', t, t);
+        EXECUTE format('CREATE TRIGGER trg_%s_empresa_trunc AFTER TRUNCATE ON %I
+                        FOR EACH STATEMENT EXECUTE FUNCTION empresas_directorio_recalcular()', t, t);
+    END LOOP;
+END;
+$$;
+
+-- Carga inicial (el script se puede volver a ejecutar)
+DELETE FROM empresas_directorio;
+INSERT INTO empresas_directorio (empresa, documentos)
+SELECT empresa, COUNT(*)
+FROM (
+    SELECT empresa FROM actas
+    UNION ALL SELECT empresa FROM informes
+    UNION ALL SELECT empresa FROM reportes
+    UNION ALL SELECT empresa FROM comisiones
+) d
+WHERE empresa IS NOT NULL AND btrim(empresa) <> ''
+GROUP BY empresa;
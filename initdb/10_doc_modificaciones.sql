@@ -0,0 +1,38 @@
+-- =========================
+-- ÚLTIMA MODIFICACIÓN POR TABLA DE DOCUMENTOS
+-- =========================
+-- Un trigger por sentencia marca la hora de la última escritura en cada tabla.
+-- Junto con MAX(id) y el conteo forma la marca de agua del caché de
+-- exportaciones: cualquier INSERT/UPDATE/DELETE/TRUNCATE, venga de la
+-- aplicación o de psql, cambia la marca y el archivo cacheado deja de servirse.
+CREATE TABLE IF NOT EXISTS doc_modificaciones (
+    tabla VARCHAR(20) PRIMARY KEY,
+    modificado_en TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION doc_modificaciones_marcar()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO doc_modificaciones (tabla, modificado_en)
+    VALUES (TG_TABLE_NAME, clock_timestamp())
+    ON CONFLICT (tabla) DO UPDATE SET modificado_en = EXCLUDED.modificado_en;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['actas', 'informes', 'reportes', 'comisiones'] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_modificado ON %I', t, t);
+        EXECUTE format('CREATE TRIGGER trg_%s_modificado
+                        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I
+                        FOR EACH STATEMENT EXECUTE FUNCTION doc_modificaciones_marcar()', t, t);
+    END LOOP;
+END;
+$$;
+
+INSERT INTO doc_modificaciones (tabla)
+VALUES ('actas'), ('informes'), ('reportes'), ('comisiones')
+ON CONFLICT (tabla) DO NOTHING;
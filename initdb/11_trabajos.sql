@@ -0,0 +1,34 @@
+-- =========================
+-- TRABAJOS EN SEGUNDO PLANO (exportaciones y respaldos)
+-- =========================
+-- Cola de trabajos en PostgreSQL: la web inserta una fila y avisa por
+-- NOTIFY actas_trabajos; el worker (flask --app app trabajos) la toma con
+-- FOR UPDATE SKIP LOCKED, genera el archivo en disco y va actualizando el
+-- progreso. Los archivos se borran al vencer expira_en.
+CREATE TABLE IF NOT EXISTS trabajos (
+    id BIGSERIAL PRIMARY KEY,
+    tipo VARCHAR(20) NOT NULL,               -- 'exportacion' | 'respaldo' | 'restauracion'
+    parametros JSONB NOT NULL DEFAULT '{}',
+    id_usuario INTEGER REFERENCES usuarios(id) ON DELETE CASCADE,
+    estado VARCHAR(20) NOT NULL DEFAULT 'pendiente',  -- pendiente | ejecutando | listo | fallido | expirado
+    intentos INTEGER NOT NULL DEFAULT 0,
+    progreso BIGINT NOT NULL DEFAULT 0,
+    total BIGINT,
+    archivo TEXT,
+    nombre_descarga VARCHAR(200),
+    mimetype VARCHAR(100),
+    tamano BIGINT,
+    error TEXT,
+    creado_en TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    iniciado_en TIMESTAMPTZ,
+    actualizado_en TIMESTAMPTZ,
+    terminado_en TIMESTAMPTZ,
+    expira_en TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_trabajos_pendientes
+    ON trabajos (id) WHERE estado = 'pendiente';
+CREATE INDEX IF NOT EXISTS idx_trabajos_ejecutando
+    ON trabajos (actualizado_en) WHERE estado = 'ejecutando';
+CREATE INDEX IF NOT EXISTS idx_trabajos_expira
+    ON trabajos (expira_en) WHERE estado IN ('listo', 'fallido');
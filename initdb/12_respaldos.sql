@@ -0,0 +1,19 @@
+-- =========================
+-- HISTORIAL DE RESPALDOS
+-- =========================
+-- Una fila por cada pg_dump (descarga directa o trabajo en segundo plano)
+-- con su formato, tamaño y duración; se muestra en /admin/respaldo.
+CREATE TABLE IF NOT EXISTS respaldos (
+    id BIGSERIAL PRIMARY KEY,
+    formato VARCHAR(20) NOT NULL,            -- sql | sql.gz | custom
+    origen VARCHAR(20) NOT NULL,             -- descarga | trabajo
+    estado VARCHAR(20) NOT NULL,             -- ok | fallido | cancelado
+    bytes BIGINT,
+    duracion_ms INTEGER,
+    error TEXT,
+    id_usuario INTEGER REFERENCES usuarios(id) ON DELETE SET NULL,
+    iniciado_en TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    terminado_en TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_respaldos_iniciado ON respaldos (iniciado_en DESC);
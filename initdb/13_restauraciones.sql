@@ -0,0 +1,6 @@
+-- =========================
+-- RESULTADO DE TRABAJOS SIN ARCHIVO (restauraciones)
+-- =========================
+-- Una restauración no deja nada que descargar: su resumen (tablas, filas,
+-- advertencias) queda en trabajos.resultado.
+ALTER TABLE trabajos ADD COLUMN IF NOT EXISTS resultado JSONB;
@@ -0,0 +1,72 @@
+-- =========================
+-- RESPALDOS INCREMENTALES
+-- =========================
+-- Cada tabla de datos (usuarios, catálogos y documentos) lleva updated_at,
+-- que un trigger pone en NOW() en cada INSERT y UPDATE; las filas existentes
+-- toman su created_at. Los DELETE quedan en respaldo_eliminados. Un respaldo
+-- incremental exporta lo que cambió desde la marca del respaldo anterior de la
+-- cadena (ver create_chain_backup en app.py).
+CREATE OR REPLACE FUNCTION tocar_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at := NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TABLE IF NOT EXISTS respaldo_eliminados (
+    tabla VARCHAR(20) NOT NULL,
+    id INTEGER NOT NULL,
+    eliminado_en TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_respaldo_eliminados_fecha ON respaldo_eliminados (eliminado_en);
+
+CREATE OR REPLACE FUNCTION respaldo_registrar_eliminado()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO respaldo_eliminados (tabla, id) VALUES (TG_TABLE_NAME, OLD.id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['usuarios', 'catalogos', 'actas', 'informes', 'reportes', 'comisiones'] LOOP
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = t AND column_name = 'updated_at'
+        ) THEN
+            EXECUTE format('ALTER TABLE %I ADD COLUMN updated_at TIMESTAMPTZ', t);
+            IF t = 'catalogos' THEN
+                EXECUTE format('UPDATE %I SET updated_at = NOW()', t);
+            ELSE
+                EXECUTE format('UPDATE %I SET updated_at = created_at', t);
+            END IF;
+            EXECUTE format('ALTER TABLE %I ALTER COLUMN updated_at SET DEFAULT NOW(), ALTER COLUMN updated_at SET NOT NULL', t);
+        END IF;
+        EXECUTE format('CREATE INDEX IF NOT EXISTS idx_%s_updated_at ON %I (updated_at)', t, t);
+
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_updated_at ON %I', t, t);
+        EXECUTE format('CREATE TRIGGER trg_%s_updated_at BEFORE INSERT OR UPDATE ON %I
+                        FOR EACH ROW EXECUTE FUNCTION tocar_updated_at()', t, t);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_eliminado ON %I', t, t);
+        EXECUTE format('CREATE TRIGGER trg_%s_eliminado AFTER DELETE ON %I
+                        FOR EACH ROW EXECUTE FUNCTION respaldo_registrar_eliminado()', t, t);
+    END LOOP;
+END;
+$$;
+
+-- Cadena de respaldos: un respaldo completo (pg_dump custom) seguido de
+-- incrementales, cada uno apuntando al anterior. `marca` es hasta dónde llega
+-- el respaldo; el siguiente incremental exporta desde ahí.
+ALTER TABLE respaldos ADD COLUMN IF NOT EXISTS tipo VARCHAR(20) NOT NULL DEFAULT 'completo';  -- completo | incremental
+ALTER TABLE respaldos ADD COLUMN IF NOT EXISTS archivo TEXT;
+ALTER TABLE respaldos ADD COLUMN IF NOT EXISTS base_id BIGINT REFERENCES respaldos(id) ON DELETE SET NULL;
+ALTER TABLE respaldos ADD COLUMN IF NOT EXISTS anterior_id BIGINT REFERENCES respaldos(id) ON DELETE SET NULL;
+ALTER TABLE respaldos ADD COLUMN IF NOT EXISTS desde TIMESTAMPTZ;
+ALTER TABLE respaldos ADD COLUMN IF NOT EXISTS marca TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_respaldos_cadena ON respaldos (id) WHERE archivo IS NOT NULL;
@@ -0,0 +1,125 @@
+-- =========================
+-- NUMERADORES POR (TABLA, AÑO)
+-- =========================
+-- La numeración anual ya no se calcula con MAX(numero) + 1 (dos creadores
+-- simultáneos leían el mismo máximo y el segundo chocaba con el UNIQUE):
+-- cada (tabla, año) tiene una fila contador que se incrementa con
+-- UPDATE ... RETURNING dentro de la transacción del INSERT. El bloqueo de esa
+-- fila dura sólo hasta el COMMIT y serializa a los creadores del mismo año
+-- sin reintentos. Un número manual se respeta y adelanta el contador.
+-- Se bloquean las inserciones mientras se cambian los triggers y se siembran
+-- los contadores, para que ningún documento quede numerado por el método viejo.
+LOCK TABLE actas, informes, reportes, comisiones IN SHARE ROW EXCLUSIVE MODE;
+
+CREATE TABLE IF NOT EXISTS doc_numeradores (
+    tabla VARCHAR(20) NOT NULL,
+    anio INTEGER NOT NULL,
+    ultimo INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (tabla, anio)
+);
+
+-- Reserva `p_cantidad` números consecutivos y devuelve el primero.
+-- Con p_cantidad > 1 sirve para creaciones por lote (ver reserve_doc_numbers).
+CREATE OR REPLACE FUNCTION reservar_numeros(p_tabla TEXT, p_anio INTEGER, p_cantidad INTEGER DEFAULT 1)
+RETURNS INTEGER AS $$
+DECLARE
+    primero INTEGER;
+BEGIN
+    IF p_cantidad < 1 THEN
+        RAISE EXCEPTION 'cantidad inválida: %', p_cantidad;
+    END IF;
+
+    UPDATE doc_numeradores
+    SET ultimo = ultimo + p_cantidad
+    WHERE tabla = p_tabla AND anio = p_anio
+    RETURNING ultimo - p_cantidad + 1 INTO primero;
+
+    IF NOT FOUND THEN
+        -- Primer documento del año; ON CONFLICT cubre a dos creadores a la vez
+        INSERT INTO doc_numeradores (tabla, anio, ultimo)
+        VALUES (p_tabla, p_anio, p_cantidad)
+        ON CONFLICT (tabla, anio) DO UPDATE SET ultimo = doc_numeradores.ultimo + EXCLUDED.ultimo
+        RETURNING ultimo - p_cantidad + 1 INTO primero;
+    END IF;
+
+    RETURN primero;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Un número asignado a mano nunca vuelve a salir del contador
+CREATE OR REPLACE FUNCTION numerador_avanzar(p_tabla TEXT, p_anio INTEGER, p_numero INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO doc_numeradores (tabla, anio, ultimo)
+    VALUES (p_tabla, p_anio, p_numero)
+    ON CONFLICT (tabla, anio) DO UPDATE SET ultimo = EXCLUDED.ultimo
+    WHERE doc_numeradores.ultimo < EXCLUDED.ultimo;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Siembra los contadores desde los documentos existentes. Se usa aquí y al
+-- restaurar una cadena de respaldos (los incrementales se aplican en modo
+-- réplica, sin triggers). Nunca retrocede un contador.
+CREATE OR REPLACE FUNCTION numeradores_recalcular()
+RETURNS VOID AS $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['actas', 'informes', 'reportes', 'comisiones'] LOOP
+        EXECUTE format(
+            'INSERT INTO doc_numeradores (tabla, anio, ultimo)
+             SELECT %L, anio, MAX(numero) FROM %I
+             WHERE anio IS NOT NULL AND numero IS NOT NULL
+             GROUP BY anio
+             ON CONFLICT (tabla, anio) DO UPDATE SET ultimo = EXCLUDED.ultimo
+             WHERE doc_numeradores.ultimo < EXCLUDED.ultimo', t, t);
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- El año se toma del documento (la app lo calcula en APP_TZ) y sólo si falta
+-- se usa el de la base. El número se reserva sólo si no viene uno manual.
+CREATE OR REPLACE FUNCTION generar_numero_anual()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.anio IS NULL THEN
+        NEW.anio := EXTRACT(YEAR FROM CURRENT_DATE)::INTEGER;
+    END IF;
+
+    IF NEW.numero IS NULL THEN
+        IF TG_OP = 'INSERT' THEN
+            NEW.numero := reservar_numeros(TG_TABLE_NAME, NEW.anio);
+        ELSE
+            NEW.numero := OLD.numero;
+        END IF;
+    ELSE
+        PERFORM numerador_avanzar(TG_TABLE_NAME, NEW.anio, NEW.numero);
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Los triggers BEFORE se disparan en orden alfabético: antes el código
+-- (trg_X_codigo) se armaba con el número previo a la numeración. Con los
+-- prefijos 1_/2_ el número se fija primero y el código se recalcula también
+-- al editar el número.
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['actas', 'informes', 'reportes', 'comisiones'] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_numero ON %I', t, t);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_codigo ON %I', t, t);
+
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_1_numero ON %I', t, t);
+        EXECUTE format('CREATE TRIGGER trg_%s_1_numero BEFORE INSERT OR UPDATE OF numero, anio ON %I
+                        FOR EACH ROW EXECUTE FUNCTION generar_numero_anual()', t, t);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_2_codigo ON %I', t, t);
+        EXECUTE format('CREATE TRIGGER trg_%s_2_codigo BEFORE INSERT OR UPDATE OF numero, anio ON %I
+                        FOR EACH ROW EXECUTE FUNCTION generar_codigo_documento()', t, t);
+    END LOOP;
+END;
+$$;
+
+SELECT numeradores_recalcular();
@@ -0,0 +1,78 @@
+-- =========================
+-- BÚSQUEDA DE TEXTO COMPLETO
+-- =========================
+-- Cada tabla de documentos lleva `busqueda` (tsvector en español, sin tildes)
+-- con asunto, gestiones, productos, los campos de caso fortuito (informes) y
+-- observaciones, indexado con GIN. Lo mantiene un trigger al insertar y al
+-- editar esos campos; /buscar consulta con la misma configuración es_unaccent
+-- (ver search_documents en app.py).
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- Español sin tildes: "energia" encuentra "Energía"
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'es_unaccent') THEN
+        CREATE TEXT SEARCH CONFIGURATION es_unaccent (COPY = spanish);
+        ALTER TEXT SEARCH CONFIGURATION es_unaccent
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+    END IF;
+END;
+$$;
+
+-- Pesos: A asunto, B gestiones/productos, C caso fortuito, D observaciones
+CREATE OR REPLACE FUNCTION documento_busqueda(
+    p_asunto TEXT, p_gestiones TEXT, p_productos TEXT, p_caso TEXT, p_observaciones TEXT
+) RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('es_unaccent', COALESCE(p_asunto, '')), 'A')
+        || setweight(to_tsvector('es_unaccent', concat_ws(' ', p_gestiones, p_productos)), 'B')
+        || setweight(to_tsvector('es_unaccent', COALESCE(p_caso, '')), 'C')
+        || setweight(to_tsvector('es_unaccent', COALESCE(p_observaciones, '')), 'D');
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION busqueda_actualizar()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'informes' THEN
+        NEW.busqueda := documento_busqueda(
+            NEW.asunto, NEW.gestiones, NEW.productos_asociados,
+            concat_ws(' ', NEW.caso_tipo, NEW.nombre_alimentador,
+                      NEW.alimentador_subestacion, NEW.linea_subtransmision_nombre),
+            NEW.observaciones);
+    ELSE
+        NEW.busqueda := documento_busqueda(
+            NEW.asunto, NEW.gestiones, NEW.productos_asociados, NULL, NEW.observaciones);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- El relleno inicial se hace en modo réplica para no disparar updated_at
+-- (si no, el siguiente respaldo incremental llevaría todas las filas).
+SET LOCAL session_replication_role = replica;
+
+DO $$
+DECLARE
+    t TEXT;
+    columnas TEXT;
+    caso TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['actas', 'informes', 'reportes', 'comisiones'] LOOP
+        columnas := 'asunto, observaciones, gestiones, productos_asociados';
+        caso := 'NULL';
+        IF t = 'informes' THEN
+            columnas := columnas || ', caso_tipo, nombre_alimentador, alimentador_subestacion, linea_subtransmision_nombre';
+            caso := 'concat_ws('' '', caso_tipo, nombre_alimentador, alimentador_subestacion, linea_subtransmision_nombre)';
+        END IF;
+
+        EXECUTE format('ALTER TABLE %I ADD COLUMN IF NOT EXISTS busqueda tsvector', t);
+        EXECUTE format('UPDATE %I SET busqueda = documento_busqueda(asunto, gestiones, productos_asociados, %s, observaciones)
+                        WHERE busqueda IS NULL', t, caso);
+        EXECUTE format('CREATE INDEX IF NOT EXISTS idx_%s_busqueda ON %I USING GIN (busqueda)', t, t);
+
+        -- Después de numero/codigo (los BEFORE se disparan en orden alfabético)
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_3_busqueda ON %I', t, t);
+        EXECUTE format('CREATE TRIGGER trg_%s_3_busqueda BEFORE INSERT OR UPDATE OF %s ON %I
+                        FOR EACH ROW EXECUTE FUNCTION busqueda_actualizar()', t, columnas, t);
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,45 @@
+-- =========================
+-- ÍNDICES DE LISTADOS, FILTROS Y LOGIN
+-- =========================
+-- Cubren los filtros de get_paginated_docs y de las exportaciones, que
+-- ordenan siempre por (anio DESC, numero DESC):
+--   * empresa = ANY(%s)  -> (empresa, anio, numero)
+--   * id_usuario = %s    -> (id_usuario, anio, numero); sirve además al
+--     ON DELETE CASCADE de usuarios, que hoy recorre las cuatro tablas
+-- y las búsquedas de usuario por correo, que comparan LOWER(email) y no
+-- pueden usar el UNIQUE (email). app/verificar_planes.py comprueba con
+-- EXPLAIN que ninguna de estas consultas vuelva a un Seq Scan.
+CREATE INDEX IF NOT EXISTS idx_actas_empresa_anio_numero ON actas (empresa, anio, numero);
+CREATE INDEX IF NOT EXISTS idx_informes_empresa_anio_numero ON informes (empresa, anio, numero);
+CREATE INDEX IF NOT EXISTS idx_reportes_empresa_anio_numero ON reportes (empresa, anio, numero);
+CREATE INDEX IF NOT EXISTS idx_comisiones_empresa_anio_numero ON comisiones (empresa, anio, numero);
+
+CREATE INDEX IF NOT EXISTS idx_actas_usuario_anio_numero ON actas (id_usuario, anio, numero);
+CREATE INDEX IF NOT EXISTS idx_informes_usuario_anio_numero ON informes (id_usuario, anio, numero);
+CREATE INDEX IF NOT EXISTS idx_reportes_usuario_anio_numero ON reportes (id_usuario, anio, numero);
+CREATE INDEX IF NOT EXISTS idx_comisiones_usuario_anio_numero ON comisiones (id_usuario, anio, numero);
+
+-- Login, recuperación y restablecimiento buscan por LOWER(email). Si no hay
+-- correos que sólo difieran en mayúsculas el índice además lo impide a futuro.
+DO $$
+BEGIN
+    IF to_regclass('idx_usuarios_email_lower') IS NULL THEN
+        IF EXISTS (SELECT 1 FROM usuarios GROUP BY LOWER(email) HAVING COUNT(*) > 1) THEN
+            RAISE NOTICE 'Hay correos repetidos sin distinguir mayúsculas; el índice LOWER(email) no será UNIQUE';
+            CREATE INDEX idx_usuarios_email_lower ON usuarios (LOWER(email));
+        ELSE
+            CREATE UNIQUE INDEX idx_usuarios_email_lower ON usuarios (LOWER(email));
+        END IF;
+    END IF;
+END;
+$$;
+
+-- get_auth_info corre en cada request con la caché vencida: con este índice
+-- es un Index Only Scan que no toca la tabla
+CREATE UNIQUE INDEX IF NOT EXISTS idx_usuarios_auth ON usuarios (id) INCLUDE (auth_version, rol, nombre);
+
+ANALYZE actas;
+ANALYZE informes;
+ANALYZE reportes;
+ANALYZE comisiones;
+ANALYZE usuarios;
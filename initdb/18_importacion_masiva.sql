@@ -0,0 +1,186 @@
+-- =========================
+-- CARGA MASIVA DE DOCUMENTOS
+-- =========================
+-- La importación (POST /admin/documentos/importar/<tipo>) carga decenas de
+-- miles de filas con COPY en una sola transacción. Con los triggers por fila
+-- cada documento hacía un upsert sobre las mismas pocas filas de doc_conteos
+-- y empresas_directorio, y el costo crecía con el tamaño de la carga. Aquí:
+--   * los totales se ajustan una vez por sentencia, agrupando las tablas de
+--     transición (una fila por clave en lugar de una por documento);
+--   * el trigger de numeración sólo toca doc_numeradores si el número manual
+--     de verdad adelanta el contador;
+--   * el código se arma sin truncar números de cuatro o más cifras (LPAD a 3
+--     dejaba el 1000 como "100" y chocaba con el UNIQUE de codigo).
+LOCK TABLE actas, informes, reportes, comisiones IN SHARE ROW EXCLUSIVE MODE;
+
+CREATE OR REPLACE FUNCTION generar_codigo_documento()
+RETURNS TRIGGER AS $$
+DECLARE
+    prefijo TEXT;
+BEGIN
+    IF TG_TABLE_NAME = 'informes' THEN
+        prefijo := 'INF.DTCD';
+    ELSIF TG_TABLE_NAME = 'actas' THEN
+        prefijo := 'ACTAS.DTCD';
+    ELSIF TG_TABLE_NAME = 'reportes' THEN
+        prefijo := 'REP.DTCD';
+    ELSIF TG_TABLE_NAME = 'comisiones' THEN
+        prefijo := 'CMS.DTCD';
+    ELSE
+        prefijo := UPPER(TG_TABLE_NAME);
+    END IF;
+
+    NEW.codigo := prefijo || '.' || LPAD(NEW.numero::text, GREATEST(3, length(NEW.numero::text)), '0')
+                  || '.' || NEW.anio;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION generar_numero_anual()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.anio IS NULL THEN
+        NEW.anio := EXTRACT(YEAR FROM CURRENT_DATE)::INTEGER;
+    END IF;
+
+    IF NEW.numero IS NULL THEN
+        IF TG_OP = 'INSERT' THEN
+            NEW.numero := reservar_numeros(TG_TABLE_NAME, NEW.anio);
+        ELSE
+            NEW.numero := OLD.numero;
+        END IF;
+    ELSIF NOT EXISTS (
+        SELECT 1 FROM doc_numeradores
+        WHERE tabla = TG_TABLE_NAME AND anio = NEW.anio AND ultimo >= NEW.numero
+    ) THEN
+        -- Los números ya reservados (p. ej. por reserve_doc_numbers) no escriben
+        PERFORM numerador_avanzar(TG_TABLE_NAME, NEW.anio, NEW.numero);
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Ajuste por sentencia. En UPDATE se cruzan filas viejas y nuevas, así que
+-- una edición que no cambia la clave no escribe nada.
+CREATE OR REPLACE FUNCTION doc_conteos_lote()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO doc_conteos (tabla, empresa, id_usuario, anio, total)
+        SELECT TG_TABLE_NAME, COALESCE(empresa, ''), id_usuario, anio, COUNT(*)
+        FROM nuevas
+        GROUP BY 2, 3, 4
+        ON CONFLICT (tabla, empresa, id_usuario, anio)
+        DO UPDATE SET total = doc_conteos.total + EXCLUDED.total;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO doc_conteos (tabla, empresa, id_usuario, anio, total)
+        SELECT TG_TABLE_NAME, COALESCE(empresa, ''), id_usuario, anio, -COUNT(*)
+        FROM viejas
+        GROUP BY 2, 3, 4
+        ON CONFLICT (tabla, empresa, id_usuario, anio)
+        DO UPDATE SET total = doc_conteos.total + EXCLUDED.total;
+    ELSE
+        INSERT INTO doc_conteos (tabla, empresa, id_usuario, anio, total)
+        SELECT TG_TABLE_NAME, empresa, id_usuario, anio, SUM(delta)
+        FROM (
+            SELECT COALESCE(v.empresa, '') AS empresa, v.id_usuario, v.anio, -1 AS delta
+            FROM viejas v JOIN nuevas n ON n.id = v.id
+            WHERE (v.empresa, v.id_usuario, v.anio) IS DISTINCT FROM (n.empresa, n.id_usuario, n.anio)
+            UNION ALL
+            SELECT COALESCE(n.empresa, ''), n.id_usuario, n.anio, 1
+            FROM viejas v JOIN nuevas n ON n.id = v.id
+            WHERE (v.empresa, v.id_usuario, v.anio) IS DISTINCT FROM (n.empresa, n.id_usuario, n.anio)
+        ) d
+        GROUP BY 2, 3, 4
+        HAVING SUM(delta) <> 0
+        ON CONFLICT (tabla, empresa, id_usuario, anio)
+        DO UPDATE SET total = doc_conteos.total + EXCLUDED.total;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION empresas_directorio_lote()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO empresas_directorio (empresa, documentos)
+        SELECT empresa, COUNT(*)
+        FROM nuevas
+        WHERE empresa IS NOT NULL AND btrim(empresa) <> ''
+        GROUP BY empresa
+        ON CONFLICT (empresa)
+        DO UPDATE SET documentos = empresas_directorio.documentos + EXCLUDED.documentos;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO empresas_directorio (empresa, documentos)
+        SELECT empresa, -COUNT(*)
+        FROM viejas
+        WHERE empresa IS NOT NULL AND btrim(empresa) <> ''
+        GROUP BY empresa
+        ON CONFLICT (empresa)
+        DO UPDATE SET documentos = empresas_directorio.documentos + EXCLUDED.documentos;
+    ELSE
+        INSERT INTO empresas_directorio (empresa, documentos)
+        SELECT empresa, SUM(delta)
+        FROM (
+            SELECT v.empresa, -1 AS delta
+            FROM viejas v JOIN nuevas n ON n.id = v.id
+            WHERE v.empresa IS DISTINCT FROM n.empresa
+            UNION ALL
+            SELECT n.empresa, 1
+            FROM viejas v JOIN nuevas n ON n.id = v.id
+            WHERE v.empresa IS DISTINCT FROM n.empresa
+        ) d
+        WHERE empresa IS NOT NULL AND btrim(empresa) <> ''
+        GROUP BY empresa
+        HAVING SUM(delta) <> 0
+        ON CONFLICT (empresa)
+        DO UPDATE SET documentos = empresas_directorio.documentos + EXCLUDED.documentos;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Las tablas de transición no admiten lista de columnas ni varios eventos por
+-- trigger: uno por evento. Los de TRUNCATE (08 y 09) siguen igual.
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['actas', 'informes', 'reportes', 'comisiones'] LOOP
+        -- Los por fila de 08 y 09 (los _upd se reemplazan abajo con el mismo nombre)
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_conteo ON %I', t, t);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_empresa ON %I', t, t);
+
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_conteo_ins ON %I', t, t);
+        EXECUTE format('CREATE TRIGGER trg_%s_conteo_ins AFTER INSERT ON %I
+                        REFERENCING NEW TABLE AS nuevas
+                        FOR EACH STATEMENT EXECUTE FUNCTION doc_conteos_lote()', t, t);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_conteo_del ON %I', t, t);
+        EXECUTE format('CREATE TRIGGER trg_%s_conteo_del AFTER DELETE ON %I
+                        REFERENCING OLD TABLE AS viejas
+                        FOR EACH STATEMENT EXECUTE FUNCTION doc_conteos_lote()', t, t);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_conteo_upd ON %I', t, t);
+        EXECUTE format('CREATE TRIGGER trg_%s_conteo_upd AFTER UPDATE ON %I
+                        REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+                        FOR EACH STATEMENT EXECUTE FUNCTION doc_conteos_lote()', t, t);
+
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_empresa_ins ON %I', t, t);
+        EXECUTE format('CREATE TRIGGER trg_%s_empresa_ins AFTER INSERT ON %I
+                        REFERENCING NEW TABLE AS nuevas
+                        FOR EACH STATEMENT EXECUTE FUNCTION empresas_directorio_lote()', t, t);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_empresa_del ON %I', t, t);
+        EXECUTE format('CREATE TRIGGER trg_%s_empresa_del AFTER DELETE ON %I
+                        REFERENCING OLD TABLE AS viejas
+                        FOR EACH STATEMENT EXECUTE FUNCTION empresas_directorio_lote()', t, t);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_empresa_upd ON %I', t, t);
+        EXECUTE format('CREATE TRIGGER trg_%s_empresa_upd AFTER UPDATE ON %I
+                        REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+                        FOR EACH STATEMENT EXECUTE FUNCTION empresas_directorio_lote()', t, t);
+
+        -- Códigos truncados por el LPAD anterior (números de 1000 en adelante)
+        EXECUTE format('UPDATE %I SET numero = numero WHERE numero >= 1000', t);
+    END LOOP;
+END;
+$$;